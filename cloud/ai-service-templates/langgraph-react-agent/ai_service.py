@@ -1,5 +1,34 @@
 def deployable_ai_service(context, **custom):
-    from langgraph_react_agent.agent import get_graph_closure
+    import uuid
+
+    from langgraph_react_agent.agent import get_graph_closure, get_message_watermark
+    from langgraph_react_agent.batch import BatchRunner
+    from langgraph_react_agent.checkpoint import BoundedMemorySaver, SqliteCheckpointer
+    from langgraph_react_agent.compaction import HistoryCompactor
+    from langgraph_react_agent.credentials import (
+        aiterate_with_token,
+        http_client_config,
+        iterate_with_token,
+        request_token,
+        scope_credentials,
+    )
+    from langgraph_react_agent import dataset_store
+    from langgraph_react_agent.datasets import DATASETS
+    from langgraph_react_agent.encoding import dumps
+    from langgraph_react_agent.metrics import (
+        METRICS,
+        InstrumentedCheckpointer,
+        RequestTimings,
+        aiterate_with_timings,
+        iterate_with_timings,
+    )
+    from langgraph_react_agent.precompute import Precomputer
+    from langgraph_react_agent.streaming import acoalesce_chunks, coalesce_chunks
+    from langgraph_react_agent.response_cache import ResponseCache, normalise_messages, normalise_request
+    from langgraph_react_agent import TOOLS, regression
+    from langgraph_react_agent.tools import warm_up_tools
+    from langgraph_react_agent.usage import UsageTracker
+    from langgraph_react_agent.validation import RequestValidationError, request_validator
     from ibm_watsonx_ai import APIClient, Credentials
     from langchain_core.messages import (
         BaseMessage,
@@ -9,12 +38,167 @@ def deployable_ai_service(context, **custom):
     )
 
     model_id = custom.get("model_id")
-    client = APIClient(
-        credentials=Credentials(url=custom.get("url"), token=context.generate_token()),
-        space_id=custom.get("space_id"),
+
+    # Datasets above the threshold are fitted by the tools with the one-pass, bounded-memory engine
+    regression.configure(
+        streaming_threshold=custom.get("ols_streaming_threshold"),
+        normality_test=custom.get("normality_test", "auto"),
+        diagnostics_sample_size=custom.get("diagnostics_sample_size"),
+        diagnostics_seed=custom.get("diagnostics_seed", 0),
+    )
+    # Messages may reference windows of the stored datasets instead of sending their values
+    dataset_store.configure(root=custom.get("dataset_store"))
+    # The client is shared by all the requests, each of them is authenticated with its own token
+    # while reusing the keep-alive connections of the client's pooled HTTP sessions
+    http_pool_size = custom.get("http_pool_size", 10)
+    client = scope_credentials(
+        APIClient(
+            credentials=Credentials(url=custom.get("url"), token=context.generate_token()),
+            space_id=custom.get("space_id"),
+            httpx_client=http_client_config(http_pool_size),
+            async_httpx_client=http_client_config(http_pool_size),
+        )
+    )
+
+    if custom.get("checkpointer", "memory") == "sqlite":
+        # Durable checkpointer, conversations survive restarts of the service
+        checkpointer = SqliteCheckpointer(
+            custom.get("checkpointer_path", "checkpoints.sqlite"),
+            snapshot_every=custom.get("checkpointer_snapshot_every", 50),
+        )
+    else:
+        # In-memory checkpointer keeping only the latest checkpoints of the most recently used threads
+        checkpointer = BoundedMemorySaver(
+            max_threads=custom.get("max_threads", 1000),
+            max_checkpoints_per_thread=custom.get("max_checkpoints_per_thread", 10),
+            max_bytes=custom.get("max_checkpointer_bytes"),
+            ttl=custom.get("thread_ttl"),
+        )
+
+    # Opt-in instrumentation: per-request timings of the conversion, graph, nodes, model and tool calls
+    # and checkpointer I/O, aggregated in the process-wide metrics registry
+    metrics = METRICS if custom.get("metrics", False) else None
+    if metrics is not None:
+        checkpointer = InstrumentedCheckpointer(checkpointer)
+
+    # Old tool outputs are cut to short digests and old turns dropped to keep the prompt within the budget
+    compactor = (
+        HistoryCompactor(
+            token_budget=custom.get("history_token_budget"),
+            keep_turns=custom.get("history_keep_turns", 2),
+            digest_chars=custom.get("tool_output_digest_chars", 300),
+        )
+        if custom.get("history_compaction", True)
+        else None
+    )
+
+    graph = get_graph_closure(
+        client,
+        model_id,
+        graph_cache_size=custom.get("graph_cache_size", 8),
+        checkpointer=checkpointer,
+        tool_workers=custom.get("tool_workers", 4),
+        tool_timeout=custom.get("tool_timeout", 30.0),
+        tool_max_pending=custom.get("tool_max_pending"),
+        compactor=compactor,
+    )
+
+    if custom.get("warm_up", True):
+        # Warm-up: precompile the graph for the default system prompt (creating the chat model), so the first
+        # request only performs a cache lookup, and call every tool once to import statsmodels and scipy
+        graph()
+        warm_up_tools(TOOLS)
+
+    # Opt-in cache of the agent's responses, repeated requests are answered without calling the model and the tools
+    response_cache = (
+        ResponseCache(maxsize=custom.get("response_cache_size", 256), ttl=custom.get("response_cache_ttl"))
+        if custom.get("response_cache", False)
+        else None
+    )
+
+    # Request bodies are validated against the request schema (compiled once) before being handled,
+    # with limits on the number of messages and on the size of their data
+    validate_request = (
+        request_validator(
+            max_messages=custom.get("max_request_messages", 100),
+            max_observations=custom.get("max_data_observations", 1_000_000),
+            max_variables=custom.get("max_data_variables", 100),
+            max_conversations=custom.get("max_batch_conversations", 500),
+        )
+        if custom.get("request_validation", True)
+        else None
+    )
+    # Opt-in: the JSON bodies and the SSE chunks are returned already encoded (by orjson when installed)
+    encode_responses = custom.get("encode_responses", False)
+
+    # Consecutive deltas of the streamed answer are merged into chunks of up to `stream_coalesce_bytes` bytes
+    # or `stream_coalesce_delay` seconds, at most `stream_buffer_size` chunks are buffered for a slow consumer
+    stream_coalescing = {
+        "max_bytes": custom.get("stream_coalesce_bytes", 64),
+        "max_delay": custom.get("stream_coalesce_delay", 0.02),
+        "buffer_size": custom.get("stream_buffer_size", 256),
+    }
+
+    # The conversations of the batch requests run concurrently on a pool of `batch_workers` threads, the threads
+    # created for them are deleted once they are answered unless `batch_keep_threads` is set
+    batch_runner = BatchRunner(max_workers=custom.get("batch_workers", 4))
+    batch_keep_threads = custom.get("batch_keep_threads", False)
+
+    # The OLS fit and the assumption tests of the data sent with a message are computed in the background while
+    # the model generates its tool calls, the tools use the finished or in-flight results
+    precomputer = (
+        Precomputer(max_workers=custom.get("precompute_workers", 2), metrics=metrics)
+        if custom.get("precompute", True)
+        else None
     )
 
-    graph = get_graph_closure(client, model_id)
+    # The tokens and the throughput of the model calls are returned with every response, the running totals
+    # of every thread are kept in the metadata of its checkpoints
+    usage_accounting = custom.get("usage", True)
+
+    if metrics is not None:
+        metrics.register_gauge(
+            "ols_fit_cache_hits", lambda: regression.OLS_FIT_CACHE.hits, "OLS fits reused by the regression tools."
+        )
+        metrics.register_gauge(
+            "ols_fit_cache_misses", lambda: regression.OLS_FIT_CACHE.misses, "OLS fits computed by the regression tools."
+        )
+        if precomputer is not None:
+            metrics.register_gauge(
+                "precompute_wasted_ratio",
+                lambda: precomputer.stats()["wasted_ratio"],
+                "Fraction of the background computation time spent on data no tool has used.",
+            )
+            metrics.register_gauge(
+                "precompute_overlap_ratio",
+                lambda: precomputer.stats()["overlap_ratio"],
+                "Fraction of the background computation time of the used data done before the tools needed it.",
+            )
+        if isinstance(checkpointer.checkpointer, BoundedMemorySaver):
+            metrics.register_gauge(
+                "checkpointer_dropped_writes",
+                lambda: checkpointer.dropped_writes,
+                "Writes dropped because their thread was evicted while the request was running.",
+            )
+        if response_cache is not None:
+            metrics.register_gauge(
+                "response_cache_hit_rate",
+                lambda: response_cache.stats()["hit_rate"],
+                "Fraction of the requests answered from the response cache.",
+            )
+
+    def get_payload(context) -> dict:
+        """JSON body of the request, raises `RequestValidationError` if it does not match the request schema"""
+
+        payload = context.get_json()
+        if validate_request is not None:
+            validate_request(payload)
+        return payload
+
+    def encode_response(body: dict) -> dict | str:
+        """Response body or SSE chunk, encoded to a JSON string with `encode_responses`"""
+
+        return dumps(body).decode() if encode_responses else body
 
     def get_formatted_message(resp: BaseMessage) -> dict | None:
         role = resp.type
@@ -25,16 +209,20 @@ def deployable_ai_service(context, **custom):
             elif role == "ai":
                 return {"role": "assistant", "content": resp.content}
             elif role == "tool":
-                return {
+                message = {
                     "role": role,
                     "id": resp.id,
                     "tool_call_id": resp.tool_call_id,
                     "name": resp.name,
                     "content": resp.content,
                 }
+                # Wall-clock time of the tool call and of the whole agent step, in seconds
+                for key in ("duration", "step_duration"):
+                    if key in resp.response_metadata:
+                        message[key] = resp.response_metadata[key]
+                return message
         elif role == "ai":  # this implies resp.additional_kwargs
             if additional_kw := resp.additional_kwargs:
-                tool_call = additional_kw["tool_calls"][0]
                 return {
                     "role": "assistant",
                     "tool_calls": [
@@ -46,11 +234,20 @@ def deployable_ai_service(context, **custom):
                                 "arguments": tool_call["function"]["arguments"],
                             },
                         }
+                        for tool_call in additional_kw["tool_calls"]
                     ],
                 }
 
-    def convert_dict_to_message(_dict: dict) -> BaseMessage:
-        """Convert user message in dict to langchain_core.messages.BaseMessage"""
+    def get_thread_id(payload: dict) -> str:
+        """Conversation thread id sent with the request, falling back to the deployment's default one"""
+
+        return payload.get("thread_id") or custom.get("thread_id")
+
+    def convert_dict_to_message(_dict: dict, data_handles: list[tuple[str, str]]) -> BaseMessage:
+        """
+        Convert user message in dict to langchain_core.messages.BaseMessage, the handles of its data are appended
+        to `data_handles`
+        """
 
         if _dict["role"] == "assistant":
             return AIMessage(content=_dict["content"])
@@ -59,15 +256,272 @@ def deployable_ai_service(context, **custom):
         else:
             data = _dict.get("data")
             user_message = _dict["content"]
-            # If data is provided, enhance the question string with the data
+            # If data is provided, store it server-side and enhance the question string with its handles
             if data:
-                exog_data = data.get("exog", [])
-                endog_data = data.get("endog", [])
+                exog_handle = dataset_store.register_data(data.get("exog", []))
+                endog_handle = dataset_store.register_data(data.get("endog", []))
+                data_handles.append((exog_handle, endog_handle))
 
-                # Append the data information to the question string
-                user_message += f" Explanatory variables (independent): {exog_data}. Dependent variable (response): {endog_data}."
+                # Append the data description to the question string
+                user_message += (
+                    f" Explanatory variables (independent): {DATASETS.describe(exog_handle)}."
+                    f" Dependent variable (response): {DATASETS.describe(endog_handle)}."
+                    " Pass the dataset handles as the tools' `exog` and `endog` arguments."
+                )
             return HumanMessage(content=user_message)
 
+    def prepare_request(payload: dict, timings: RequestTimings) -> tuple:
+        """
+        Return the graph, the input messages, the checkpointer configuration of the request and the handles
+        of the data sent with its messages
+        """
+
+        raw_messages = payload.get("messages", [])
+        data_handles = []
+        with timings.span("convert_messages"):
+            messages = [convert_dict_to_message(_dict, data_handles) for _dict in raw_messages]
+
+        with timings.span("get_graph"):
+            if messages and messages[0].type == "system":
+                agent = graph(messages[0])
+                del messages[0]
+            else:
+                agent = graph()
+
+        config = {
+            "configurable": {"thread_id": get_thread_id(payload), "request_id": str(uuid.uuid4())}
+        }  # Checkpointer configuration, the request id keys the request's compaction reports
+        if timings.enabled:
+            config["callbacks"] = timings.callbacks()
+
+        if messages:
+            # Messages produced by the agent follow the last input message in the thread,
+            # give it a known id so they can be located without scanning the checkpoints
+            messages[-1].id = messages[-1].id or str(uuid.uuid4())
+
+        return agent, messages, config, data_handles
+
+    def start_precompute(data_handles: list[tuple[str, str]]) -> None:
+        """Compute the results of the request's data in the background, called once the response cache missed"""
+
+        if precomputer is not None:
+            for exog_handle, endog_handle in data_handles:
+                precomputer.submit(exog_handle, endog_handle)
+
+    def add_usage_tracker(config: dict, saved) -> UsageTracker | None:
+        """Account for the model calls of the request on top of the totals of the thread's latest checkpoint"""
+
+        if not usage_accounting:
+            return None
+        tracker = UsageTracker(saved.metadata.get("usage") if saved else None, metrics=metrics)
+        config["callbacks"] = config.get("callbacks", []) + [tracker]
+        # Every checkpoint written for the request carries the running totals of the thread
+        config["metadata"] = {"usage": tracker.thread}
+        return tracker
+
+    def track_usage(config: dict) -> UsageTracker | None:
+        return add_usage_tracker(config, checkpointer.get_tuple(config) if usage_accounting else None)
+
+    async def atrack_usage(config: dict) -> UsageTracker | None:
+        return add_usage_tracker(config, await checkpointer.aget_tuple(config) if usage_accounting else None)
+
+    def get_usage_chunk(usage: UsageTracker | None) -> list[dict]:
+        """Final response chunk with the usage of the request, as the last chunk of OpenAI's streams"""
+
+        return [] if usage is None else [{"choices": [], "usage": usage.summary()}]
+
+    def get_new_messages(
+        state_messages: list[BaseMessage], messages: list[BaseMessage], watermark: int | None
+    ) -> list[BaseMessage]:
+        """Messages generated by the agent, i.e. the ones following the watermark"""
+
+        if watermark is None:
+            watermark = get_message_watermark(state_messages, messages[-1].id)
+        return state_messages[watermark:]
+
+    def get_prompt_tokens(config: dict) -> list[dict] | None:
+        """Prompt-token counts before and after compaction of the model calls made for the request"""
+
+        if compactor is None:
+            return None
+        return compactor.pop_reports(config["configurable"]["request_id"])
+
+    def get_response(
+        new_messages: list[BaseMessage],
+        cache_status: str | None = None,
+        prompt_tokens: list[dict] | None = None,
+        timings: RequestTimings | None = None,
+        usage: UsageTracker | None = None,
+    ) -> dict:
+        """Response body with the messages generated by the agent"""
+
+        choices = []
+        execute_response = {
+            "headers": {"Content-Type": "application/json"},
+            "body": {"choices": choices},
+        }
+        if usage is not None:
+            execute_response["body"]["usage"] = usage.summary()
+        if cache_status is not None:
+            execute_response["headers"]["X-Response-Cache"] = cache_status
+            execute_response["headers"]["X-Response-Cache-Hit-Rate"] = f"{response_cache.stats()['hit_rate']:.4f}"
+        if prompt_tokens:
+            # One value per model call of the turn
+            for key in ("before", "after"):
+                execute_response["headers"][f"X-Prompt-Tokens-{key.capitalize()}"] = ",".join(
+                    str(report[key]) for report in prompt_tokens
+                )
+        if timings is not None and timings.enabled and custom.get("timing_header", False):
+            # Timing breakdown of the request, in milliseconds
+            execute_response["headers"]["Server-Timing"] = timings.server_timing()
+
+        for resp in new_messages:
+            if (message := get_formatted_message(resp)) is not None:
+                choices.append({"index": 0, "message": message})
+
+        return execute_response
+
+    def get_metrics_response(metrics_format: str) -> dict:
+        """Dump of the metrics registry, as JSON or in the Prometheus text format"""
+
+        body = {
+            "choices": [],
+            "metrics": metrics.to_prometheus() if metrics_format == "prometheus" else metrics.snapshot(),
+        }
+        return {"headers": {"Content-Type": "application/json"}, "body": encode_response(body)}
+
+    def get_cache_key(payload: dict, history: list[BaseMessage]) -> str:
+        """Response cache key of the request continuing the conversation `history`"""
+
+        return ResponseCache.key(
+            model_id, normalise_request(payload.get("messages", [])), normalise_messages(history)
+        )
+
+    def replay_messages(cached: list[BaseMessage]) -> list[BaseMessage]:
+        """Copies of the cached messages with new ids, ready to be appended to the thread"""
+
+        return [message.model_copy(update={"id": str(uuid.uuid4())}) for message in cached]
+
+    def lookup_response(payload: dict, agent, config: dict, messages: list[BaseMessage]) -> tuple:
+        """
+        Return the response cache key of the request and, on a hit, the replayed messages.
+        The replayed messages are stored in the thread, so the conversation can be continued.
+        """
+
+        if response_cache is None or not messages:
+            return None, None
+        cache_key = get_cache_key(payload, agent.get_state(config).values.get("messages", []))
+        if (cached := response_cache.get(cache_key)) is None:
+            return cache_key, None
+        new_messages = replay_messages(cached)
+        agent.update_state(config, {"messages": messages + new_messages}, as_node="agent")
+        return cache_key, new_messages
+
+    async def alookup_response(payload: dict, agent, config: dict, messages: list[BaseMessage]) -> tuple:
+        """Asynchronous counterpart of `lookup_response`"""
+
+        if response_cache is None or not messages:
+            return None, None
+        cache_key = get_cache_key(payload, (await agent.aget_state(config)).values.get("messages", []))
+        if (cached := response_cache.get(cache_key)) is None:
+            return cache_key, None
+        new_messages = replay_messages(cached)
+        await agent.aupdate_state(config, {"messages": messages + new_messages}, as_node="agent")
+        return cache_key, new_messages
+
+    def get_replay_chunks(new_messages: list[BaseMessage]) -> list[dict]:
+        """Response chunks replaying cached messages, the final answer is sent as a single delta"""
+
+        chunks = []
+        for resp in new_messages:
+            if resp.type == "ai" and resp.content and not resp.tool_calls:
+                message = {"role": "assistant", "delta": resp.content}
+            elif (message := get_formatted_message(resp)) is None:
+                continue
+            chunks.append({"choices": [{"index": 0, "message": message}]})
+        return chunks
+
+    def get_stream_chunks(chunk_type: str, data) -> list[dict]:
+        """Response chunks for one item of the graph's stream"""
+
+        if chunk_type == "messages":
+            msg_objs = [data[0]]
+            if msg_objs[0].type == "tool":
+                return []
+        elif chunk_type == "updates":
+            if agent := data.get("agent"):
+                msg_objs = agent["messages"][:1]
+                if msg_objs[0].response_metadata.get("finish_reason") == "stop":
+                    return []
+            elif tool := data.get("tools"):
+                # One message per tool call executed in the agent step
+                msg_objs = tool["messages"]
+            else:
+                return []
+        else:
+            return []
+
+        return [
+            {"choices": [{"index": 0, "message": message}]}
+            for msg_obj in msg_objs
+            if (message := get_formatted_message(msg_obj)) is not None
+        ]
+
+    def validate_conversation(index: int, conversation: dict) -> None:
+        if validate_request is not None:
+            validate_request(conversation, f"$.conversations[{index}]")
+
+    def release_thread(conversation: dict, generated_thread_id: bool) -> None:
+        """Delete the thread created for a conversation of a batch, unless `batch_keep_threads` is set"""
+
+        if generated_thread_id and not batch_keep_threads:
+            checkpointer.delete_thread(conversation["thread_id"])
+
+    def get_batch_response(conversations: list[dict], token: str) -> dict:
+        """Response to a batch request, every conversation is answered as a separate request"""
+
+        def handle(index: int, conversation: dict, generated_thread_id: bool) -> dict:
+            try:
+                validate_conversation(index, conversation)
+                return answer(conversation, token)["body"]
+            finally:
+                release_thread(conversation, generated_thread_id)
+
+        body = batch_runner.run(conversations, handle)
+        if metrics is not None:
+            metrics.observe("batch", body["batch"]["duration"])
+        return {"headers": {"Content-Type": "application/json"}, "body": body}
+
+    async def aget_batch_response(conversations: list[dict], token: str) -> dict:
+        """Asynchronous counterpart of `get_batch_response`"""
+
+        async def handle(index: int, conversation: dict, generated_thread_id: bool) -> dict:
+            try:
+                validate_conversation(index, conversation)
+                return (await aanswer(conversation, token))["body"]
+            finally:
+                release_thread(conversation, generated_thread_id)
+
+        body = await batch_runner.arun(conversations, handle)
+        if metrics is not None:
+            metrics.observe("batch", body["batch"]["duration"])
+        return {"headers": {"Content-Type": "application/json"}, "body": body}
+
+    def reject_batch(payload: dict) -> None:
+        if "conversations" in payload:
+            raise RequestValidationError("$.conversations", "batch requests are only answered by `generate`")
+        if "metrics" in payload:
+            raise RequestValidationError("$.metrics", "the metrics are only returned by `generate`")
+
+    def is_metrics_request(payload: dict) -> bool:
+        """Whether the request asks for the dump of the metrics registry, which requires the `metrics` parameter"""
+
+        if "metrics" not in payload:
+            return False
+        if metrics is None:
+            raise RequestValidationError("$.metrics", "the metrics are disabled (`metrics` deployment parameter)")
+        return True
+
     def generate(context) -> dict:
         """
         The `generate` function handles the REST call to the inference endpoint
@@ -79,6 +533,7 @@ def deployable_ai_service(context, **custom):
 
         A JSON body sent to the above endpoint should follow the format:
         {
+            "thread_id"[OPTIONAL]: <conversation thread id, defaults to the `thread_id` deployment parameter>,
             "messages": [
                 {
                     "role": "system",
@@ -95,40 +550,64 @@ def deployable_ai_service(context, **custom):
             ]
         }
         Please note that the `system message` MUST be placed first in the list of messages!
-        """
+        A body not matching the request schema (`schema/request.json`) raises `RequestValidationError`.
 
-        client.set_token(context.get_token())
+        With `metrics = true` in the deployment parameters, a body {"messages": [], "metrics": "json" | "prometheus"}
+        returns the dump of the metrics registry instead. Without it, such a body raises `RequestValidationError`.
 
-        payload = context.get_json()
-        raw_messages = payload.get("messages", [])
-        messages = [convert_dict_to_message(_dict) for _dict in raw_messages]
+        A batch of independent conversations is answered in one call with the body:
+        {
+            "messages": [],
+            "conversations": [
+                {"thread_id"[OPTIONAL]: <a new thread by default>, "messages": [...]},
+                ...
+            ]
+        }
+        The conversations run concurrently (at most `batch_workers` at a time). The response body lists the result
+        of every conversation, i.e. its `choices` or its `error`, under "conversations" and the aggregate timing
+        of the batch under "batch".
+
+        With `usage = true` (the default) the response body reports the tokens of the model calls made for the
+        request, their time to the first token and tokens per second, and the totals of the thread under "usage".
+        """
 
-        if messages and messages[0].type == "system":
-            agent = graph(messages[0])
-            del messages[0]
+        payload = get_payload(context)
+        if is_metrics_request(payload):
+            return get_metrics_response(payload["metrics"])
+
+        if "conversations" in payload:
+            execute_response = get_batch_response(payload["conversations"], context.get_token())
         else:
-            agent = graph()
+            execute_response = answer(payload, context.get_token())
+        execute_response["body"] = encode_response(execute_response["body"])
+        return execute_response
 
-        config = {
-            "configurable": {"thread_id": custom.get("thread_id")}
-        }  # Checkpointer configuration
+    def answer(payload: dict, token: str) -> dict:
+        """Response to the request with the given body, run by the agent or replayed from the response cache"""
 
-        prev_checkpoint_n = len(list(agent.checkpointer.list(config)))
-        # Invoke agent
-        generated_response = agent.invoke({"messages": messages}, config)
-        new_mess_n = len(list(agent.checkpointer.list(config))) - prev_checkpoint_n - 1
+        timings = RequestTimings(metrics)
+        agent, messages, config, data_handles = prepare_request(payload, timings)
+        usage = track_usage(config)
 
-        choices = []
-        execute_response = {
-            "headers": {"Content-Type": "application/json"},
-            "body": {"choices": choices},
-        }
+        cache_key, new_messages = lookup_response(payload, agent, config, messages)
+        if new_messages is not None:
+            return get_response(new_messages, cache_status="hit", timings=timings, usage=usage)
+        start_precompute(data_handles)
 
-        for resp in generated_response["messages"][-new_mess_n:]:
-            if (message := get_formatted_message(resp)) is not None:
-                choices.append({"index": 0, "message": message})
+        with request_token(token):
+            watermark = None if messages else len(agent.get_state(config).values.get("messages", []))
 
-        return execute_response
+            # Invoke agent
+            generated_response = agent.invoke({"messages": messages}, config)
+
+        new_messages = get_new_messages(generated_response["messages"], messages, watermark)
+        prompt_tokens = get_prompt_tokens(config)
+        if cache_key is not None:
+            response_cache.put(cache_key, new_messages)
+            return get_response(
+                new_messages, cache_status="miss", prompt_tokens=prompt_tokens, timings=timings, usage=usage
+            )
+        return get_response(new_messages, prompt_tokens=prompt_tokens, timings=timings, usage=usage)
 
     def generate_stream(context) -> dict:
         """
@@ -141,6 +620,7 @@ def deployable_ai_service(context, **custom):
 
         A JSON body sent to the above endpoint should follow the format:
         {
+            "thread_id"[OPTIONAL]: <conversation thread id, defaults to the `thread_id` deployment parameter>,
             "messages": [
                 {
                     "role": "system",
@@ -157,44 +637,135 @@ def deployable_ai_service(context, **custom):
             ]
         }
         Please note that the `system message` MUST be placed first in the list of messages!
+        With `usage = true` (the default) the last chunk carries no choices, only the "usage" of the request.
         """
-        client.set_token(context.get_token())
+        payload = get_payload(context)
+        reject_batch(payload)
+        timings = RequestTimings(metrics)
+        agent, messages, config, data_handles = prepare_request(payload, timings)
+        usage = track_usage(config)
 
-        payload = context.get_json()
-        raw_messages = payload.get("messages", [])
-        messages = [convert_dict_to_message(_dict) for _dict in raw_messages]
+        cache_key, new_messages = lookup_response(payload, agent, config, messages)
+        if new_messages is not None:
+            yield from map(encode_response, get_replay_chunks(new_messages) + get_usage_chunk(usage))
+            return
+        start_precompute(data_handles)
+
+        response_stream = agent.stream(
+            {"messages": messages}, config, stream_mode=["updates", "messages"]
+        )
+
+        chunks = (
+            chunk_response
+            for chunk_type, data in iterate_with_timings(
+                iterate_with_token(response_stream, context.get_token()), timings
+            )
+            for chunk_response in get_stream_chunks(chunk_type, data)
+        )
+        yield from map(encode_response, coalesce_chunks(chunks, **stream_coalescing))
+        yield from map(encode_response, get_usage_chunk(usage))
+        # The SSE responses carry no headers, the prompt-token counts are only collected
+        get_prompt_tokens(config)
+
+        if cache_key is not None:
+            state_messages = agent.get_state(config).values["messages"]
+            response_cache.put(cache_key, get_new_messages(state_messages, messages, None))
+
+    async def agenerate(context) -> dict:
+        """
+        Asynchronous counterpart of `generate`, accepting the same JSON body.
+
+        The graph is run with `ainvoke`, so the handler does not block the event loop while waiting
+        for the model, and the tools run on the tool node's thread pool.
+        """
 
-        if messages and messages[0].type == "system":
-            agent = graph(messages[0])
-            del messages[0]
+        payload = get_payload(context)
+        if is_metrics_request(payload):
+            return get_metrics_response(payload["metrics"])
+
+        if "conversations" in payload:
+            execute_response = await aget_batch_response(payload["conversations"], context.get_token())
         else:
-            agent = graph()
+            execute_response = await aanswer(payload, context.get_token())
+        execute_response["body"] = encode_response(execute_response["body"])
+        return execute_response
 
-        # Checkpointer configuration
-        config = {"configurable": {"thread_id": custom.get("thread_id")}}
-        response_stream = agent.stream(
+    async def aanswer(payload: dict, token: str) -> dict:
+        """Asynchronous counterpart of `answer`"""
+
+        timings = RequestTimings(metrics)
+        agent, messages, config, data_handles = prepare_request(payload, timings)
+        usage = await atrack_usage(config)
+
+        cache_key, new_messages = await alookup_response(payload, agent, config, messages)
+        if new_messages is not None:
+            return get_response(new_messages, cache_status="hit", timings=timings, usage=usage)
+        start_precompute(data_handles)
+
+        with request_token(token):
+            watermark = None if messages else len((await agent.aget_state(config)).values.get("messages", []))
+
+            # Invoke agent
+            generated_response = await agent.ainvoke({"messages": messages}, config)
+
+        new_messages = get_new_messages(generated_response["messages"], messages, watermark)
+        prompt_tokens = get_prompt_tokens(config)
+        if cache_key is not None:
+            response_cache.put(cache_key, new_messages)
+            return get_response(
+                new_messages, cache_status="miss", prompt_tokens=prompt_tokens, timings=timings, usage=usage
+            )
+        return get_response(new_messages, prompt_tokens=prompt_tokens, timings=timings, usage=usage)
+
+    async def agenerate_stream(context):
+        """
+        Asynchronous counterpart of `generate_stream`, accepting the same JSON body.
+
+        The graph is run with `astream` and the chunks are produced by an async generator.
+        """
+
+        payload = get_payload(context)
+        reject_batch(payload)
+        timings = RequestTimings(metrics)
+        agent, messages, config, data_handles = prepare_request(payload, timings)
+        usage = await atrack_usage(config)
+
+        cache_key, new_messages = await alookup_response(payload, agent, config, messages)
+        if new_messages is not None:
+            for chunk_response in get_replay_chunks(new_messages) + get_usage_chunk(usage):
+                yield encode_response(chunk_response)
+            return
+        start_precompute(data_handles)
+
+        response_stream = agent.astream(
             {"messages": messages}, config, stream_mode=["updates", "messages"]
         )
 
-        for chunk_type, data in response_stream:
-            if chunk_type == "messages":
-                msg_obj = data[0]
-                if msg_obj.type == "tool":
-                    continue
-            elif chunk_type == "updates":
-                if agent := data.get("agent"):
-                    msg_obj = agent["messages"][0]
-                    if msg_obj.response_metadata.get("finish_reason") == "stop":
-                        continue
-                elif tool := data.get("tools"):
-                    msg_obj = tool["messages"][0]
-                else:
-                    continue
-            else:
-                continue
+        # The graph is advanced with the request's token in a private context, the token is not held across the yields
+        token_stream = aiterate_with_token(response_stream, context.get_token())
+        chunks = (
+            chunk_response
+            async for chunk_type, data in aiterate_with_timings(token_stream, timings)
+            for chunk_response in get_stream_chunks(chunk_type, data)
+        )
+        coalesced = acoalesce_chunks(chunks, **stream_coalescing)
+        try:
+            async for chunk_response in coalesced:
+                yield encode_response(chunk_response)
+        finally:
+            # Also when the client disconnects, the chunks stop being produced before the graph's stream is closed
+            await coalesced.aclose()
+            await token_stream.aclose()
+        for chunk_response in get_usage_chunk(usage):
+            yield encode_response(chunk_response)
+        get_prompt_tokens(config)
+
+        if cache_key is not None:
+            state_messages = (await agent.aget_state(config)).values["messages"]
+            response_cache.put(cache_key, get_new_messages(state_messages, messages, None))
 
-            if (message := get_formatted_message(msg_obj)) is not None:
-                chunk_response = {"choices": [{"index": 0, "message": message}]}
-                yield chunk_response
+    if custom.get("async_handlers", False):
+        # Coroutine handlers, for runtimes serving many concurrent requests on one event loop
+        generate, generate_stream = agenerate, agenerate_stream
 
     return generate, generate_stream
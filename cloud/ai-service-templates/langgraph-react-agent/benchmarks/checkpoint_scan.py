@@ -0,0 +1,76 @@
+"""
+Compares per-request latency of locating the agent's new messages in a growing thread:
+
+- `scan`: the previous approach, counting checkpoints with `checkpointer.list` before and after `invoke`,
+- `watermark`: the current approach, locating the last input message by id in the returned state.
+
+The `scan` approach deserializes every checkpoint of the thread twice per request, so its latency grows quadratically
+with the conversation length; expect the largest milestones to take minutes.
+
+Usage (from the template's root directory):
+    python benchmarks/checkpoint_scan.py --checkpoints 10 100 500 1000 2000
+"""
+import argparse
+import time
+import uuid
+
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.prebuilt import create_react_agent
+
+from langgraph_react_agent import TOOLS
+from tests.fake_chat_model import FakeChatModel
+
+
+def scan_request(agent, config: dict, messages: list) -> list:
+    prev_checkpoint_n = len(list(agent.checkpointer.list(config)))
+    generated_response = agent.invoke({"messages": messages}, config)
+    new_mess_n = len(list(agent.checkpointer.list(config))) - prev_checkpoint_n - 1
+    return generated_response["messages"][-new_mess_n:]
+
+
+def watermark_request(agent, config: dict, messages: list) -> list:
+    messages[-1].id = str(uuid.uuid4())
+    generated_response = agent.invoke({"messages": messages}, config)
+    state_messages = generated_response["messages"]
+    for i in range(len(state_messages) - 1, -1, -1):
+        if state_messages[i].id == messages[-1].id:
+            return state_messages[i + 1:]
+    return state_messages
+
+
+def run(milestones: list[int], repeats: int) -> None:
+    agent = create_react_agent(FakeChatModel(), tools=TOOLS, checkpointer=MemorySaver())
+    config = {"configurable": {"thread_id": "bench"}}
+    requests = {"scan": scan_request, "watermark": watermark_request}
+
+    agent.invoke({"messages": [HumanMessage(content="Hello!")]}, config)
+    checkpoints_per_request = checkpoints_n = len(list(agent.checkpointer.list(config)))
+
+    print(f"{'checkpoints':>12} | {'scan [ms]':>10} | {'watermark [ms]':>14}")
+    print("-" * 43)
+    for milestone in sorted(milestones):
+        # Grow the thread up to the milestone without measuring
+        while checkpoints_n < milestone:
+            agent.invoke({"messages": [HumanMessage(content="Hello!")]}, config)
+            checkpoints_n += checkpoints_per_request
+
+        timings = {}
+        for name, request in requests.items():
+            start = time.perf_counter()
+            for _ in range(repeats):
+                new_messages = request(agent, config, [HumanMessage(content="Hello!")])
+                assert new_messages[-1].type == "ai"
+            timings[name] = (time.perf_counter() - start) / repeats * 1e3
+        checkpoints_n += 2 * repeats * checkpoints_per_request
+
+        print(f"{checkpoints_n:>12} | {timings['scan']:>10.2f} | {timings['watermark']:>14.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checkpoints", type=int, nargs="+", default=[10, 100, 500, 1000, 2000])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    run(args.checkpoints, args.repeats)
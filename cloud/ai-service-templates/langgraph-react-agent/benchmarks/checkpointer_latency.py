@@ -0,0 +1,97 @@
+"""
+Compares write (`put`) and read (`get_tuple`) latency of the `MemorySaver` and `SqliteCheckpointer` checkpointers
+when serving many conversation threads.
+
+Every thread holds a short conversation driven by a graph echoing the user's message. After all the conversations
+are stored, the latest checkpoint of randomly chosen threads is read back.
+
+Usage (from the template's root directory):
+    python benchmarks/checkpointer_latency.py --threads 10000 --turns 3
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Annotated, TypedDict
+
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import StateGraph
+from langgraph.graph.message import add_messages
+
+from langgraph_react_agent.checkpoint import SqliteCheckpointer
+
+
+class State(TypedDict):
+    messages: Annotated[list, add_messages]
+
+
+def echo(state: State) -> dict:
+    return {"messages": [("ai", f"echo: {state['messages'][-1].content}")]}
+
+
+def build_graph(checkpointer):
+    builder = StateGraph(State)
+    builder.add_node("echo", echo)
+    builder.set_entry_point("echo")
+    builder.set_finish_point("echo")
+    return builder.compile(checkpointer=checkpointer)
+
+
+def timed(func, timings: list):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        timings.append(time.perf_counter() - start)
+        return result
+
+    return wrapper
+
+
+def summary(timings: list) -> str:
+    timings = sorted(timings)
+    p50 = statistics.median(timings) * 1e6
+    p99 = timings[int(0.99 * (len(timings) - 1))] * 1e6
+    return f"p50 {p50:>8.1f} us | p99 {p99:>8.1f} us"
+
+
+def run(checkpointer, threads: int, turns: int, reads: int) -> None:
+    graph = build_graph(checkpointer)
+    put_timings = []
+    checkpointer.put = timed(checkpointer.put, put_timings)
+
+    start = time.perf_counter()
+    for turn in range(turns):
+        for thread in range(threads):
+            graph.invoke(
+                {"messages": [("user", f"turn {turn} of conversation {thread}")]},
+                {"configurable": {"thread_id": str(thread)}},
+            )
+    write_time = time.perf_counter() - start
+
+    get_timings = []
+    for thread in random.Random(0).choices(range(threads), k=reads):
+        start = time.perf_counter()
+        checkpoint = checkpointer.get_tuple({"configurable": {"thread_id": str(thread)}})
+        get_timings.append(time.perf_counter() - start)
+        assert len(checkpoint.checkpoint["channel_values"]["messages"]) == 2 * turns
+
+    print(f"{type(checkpointer).__name__}: {threads} threads x {turns} turns stored in {write_time:.1f} s")
+    print(f"  put       {summary(put_timings)}")
+    print(f"  get_tuple {summary(get_timings)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=10_000)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--reads", type=int, default=1_000)
+    args = parser.parse_args()
+
+    run(MemorySaver(), args.threads, args.turns, args.reads)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sqlite_checkpointer = SqliteCheckpointer(str(Path(tmp_dir) / "checkpoints.sqlite"))
+        run(sqlite_checkpointer, args.threads, args.turns, args.reads)
+        print(f"  database size {(Path(tmp_dir) / 'checkpoints.sqlite').stat().st_size / 2**20:.1f} MiB")
+        sqlite_checkpointer.close()
@@ -0,0 +1,53 @@
+"""
+Shows how the throughput of the AI service scales with the number of concurrent requests, for the synchronous handlers
+(`generate`, one worker thread per request) and the asynchronous ones (`agenerate`, one task per request on a single
+event loop).
+
+The service runs offline, with the scripted stand-in for the chat model used by `load.py`. With a model latency
+dominating the request time, the throughput of the asynchronous handlers should grow almost linearly with the
+concurrency, without a thread per in-flight request.
+
+Usage (from the template's root directory):
+    python benchmarks/concurrency_scaling.py --concurrency 1 2 4 8 16 32 64 --latency 0.2
+"""
+import argparse
+import json
+
+from benchmarks.load import run_endpoint
+from tests.fake_chat_model import ScriptedChatModel
+from tests.stubs import build_ai_service
+from utils import load_config
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--requests-per-worker", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.2, help="time to the first token of the model [s]")
+    parser.add_argument("--token-rate", type=float, default=0.0, help="tokens generated by the model per second")
+    parser.add_argument("--stream", action="store_true", help="benchmark the streaming handlers")
+    args = parser.parse_args()
+
+    custom = {**load_config("deployment").get("custom", {}), "model_id": "scripted"}
+    chat_model = ScriptedChatModel(latency=args.latency, token_rate=args.token_rate)
+    handlers = {
+        use_async: build_ai_service(chat_model, custom | {"async_handlers": use_async})[args.stream]
+        for use_async in (False, True)
+    }
+    for use_async, func in handlers.items():
+        run_endpoint(func, args.stream, 1, 1, 25, use_async)  # warm-up
+
+    print(f"{'concurrency':>11} | {'sync [req/s]':>12} | {'sync p50 [ms]':>13} | {'async [req/s]':>13} | {'async p50 [ms]':>14}")
+    for concurrency in args.concurrency:
+        requests = concurrency * args.requests_per_worker
+        results = [
+            run_endpoint(func, args.stream, requests, concurrency, 25, use_async)
+            for use_async, func in handlers.items()
+        ]
+        print(
+            f"{concurrency:>11} | "
+            + " | ".join(
+                f"{r['requests_per_second']:>{w}.1f} | {r['latency_ms']['p50']:>{w + 1}.1f}"
+                for r, w in zip(results, (12, 13))
+            )
+        )
@@ -0,0 +1,69 @@
+"""
+Compares the time of the residuals' normality and homoscedasticity tests for growing samples.
+
+- normality: scipy's Shapiro-Wilk and D'Agostino-Pearson tests with the D'Agostino-Pearson and Jarque-Bera tests
+  computed from the sample moments (`langgraph_react_agent.diagnostics`), and the test chosen by the tools,
+  by sample size (`auto`) or on a subsample (`--sample-size`),
+- homoscedasticity: statsmodels' `het_breuschpagan`, which fits the auxiliary regression, with the Breusch-Pagan
+  statistic computed from the sufficient statistics of the fit (`OLSFit.breusch_pagan`).
+
+Shapiro-Wilk is only timed up to `--shapiro-max` observations.
+
+Usage (from the template's root directory):
+    python benchmarks/diagnostic_tests.py --sizes 10 100 1000 10000 100000 1000000 10000000 --regressors 1
+"""
+import argparse
+import time
+import warnings
+
+import numpy as np
+import statsmodels.api as sm
+from scipy.stats import normaltest, shapiro
+from statsmodels.stats.diagnostic import het_breuschpagan
+
+from langgraph_react_agent import diagnostics, regression
+from langgraph_react_agent.regression import OLSFit
+
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def moments_test(test):
+    return lambda values: test(*diagnostics.sample_moments(values))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10**i for i in range(1, 8)])
+    parser.add_argument("--regressors", type=int, default=1)
+    parser.add_argument("--shapiro-max", type=int, default=1_000_000)
+    parser.add_argument("--sample-size", type=int, default=None, help="test the residuals on a subsample")
+    args = parser.parse_args()
+    regression.configure(diagnostics_sample_size=args.sample_size)
+    # scipy warns that Shapiro-Wilk's p-value may be inaccurate above 5000 observations
+    warnings.simplefilter("ignore", UserWarning)
+
+    rng = np.random.default_rng(0)
+    columns = ["shapiro", "normaltest", "K^2 moments", "JB moments", "auto", "het_bp", "BP moments"]
+    print(f"{'n':>10} | {'auto test':>17} | " + " | ".join(f"{column:>11}" for column in columns) + "   [ms]")
+    for n in args.sizes:
+        exog = rng.normal(size=(n, args.regressors))
+        endog = 1.0 + exog.sum(axis=1) + rng.normal(size=n)
+        design = sm.add_constant(exog, has_constant="add")
+        fit = OLSFit(results=sm.OLS(endog, design).fit(), exog=design, endog=endog)
+        resid = np.asarray(fit.resid)
+
+        times = [
+            timed(shapiro, resid) if n <= args.shapiro_max else None,
+            timed(normaltest, resid) if n >= 8 else None,
+            timed(moments_test(diagnostics.dagostino_pearson_from_moments), resid) if n >= 20 else None,
+            timed(moments_test(diagnostics.jarque_bera_from_moments), resid),
+            timed(fit.normality_test),
+            timed(het_breuschpagan, resid, design),
+            timed(fit.breusch_pagan),
+        ]
+        cells = [f"{t * 1e3:>11.3f}" if t is not None else f"{'-':>11}" for t in times]
+        print(f"{n:>10} | {fit.normality_method:>17} | " + " | ".join(cells))
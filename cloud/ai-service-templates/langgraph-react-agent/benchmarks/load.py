@@ -0,0 +1,187 @@
+"""
+Load test of the AI service run fully offline.
+
+`deployable_ai_service` is driven through a stand-in `RuntimeContext`, with `ChatWatsonx` replaced by a chat model
+replaying a scripted tool-calling transcript (with a configurable latency and token rate) and the `APIClient` replaced
+by a stub. Every request starts a new conversation thread with its own dataset, so the tools, the checkpointer and the
+graph run exactly as in a deployment. The requests are sent from a pool of `--concurrency` threads or, with `--async`,
+as `--concurrency` concurrent tasks awaiting the asynchronous handlers on one event loop.
+
+Reported per endpoint (`generate` and `generate_stream`):
+- p50/p95/p99 latency of the whole request,
+- p50/p95/p99 time to the first token (the first chunk of the stream, the whole response for `generate`),
+- requests per second and RSS growth of the process.
+
+The results are printed and, with `--output`, stored as JSON so that they can be compared across versions.
+
+Usage (from the template's root directory):
+    python benchmarks/load.py --requests 200 --concurrency 8 --latency 0.05 --token-rate 200 --output results.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import resource
+import statistics
+import sys
+import time
+import tomllib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from tests.fake_chat_model import ScriptedChatModel
+from tests.stubs import StubRuntimeContext, build_ai_service, make_payload
+from utils import load_config
+
+ENDPOINTS = ("generate", "generate_stream")
+
+
+def rss_bytes() -> int:
+    """Current resident set size of the process (peak RSS where /proc is not available)"""
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def percentiles(values: list[float]) -> dict:
+    values = sorted(values)
+    return {
+        f"p{p}": round(values[int(p / 100 * (len(values) - 1))] * 1e3, 3)
+        for p in (50, 95, 99)
+    } | {"mean": round(statistics.fmean(values) * 1e3, 3)}
+
+
+def send_request(func, stream: bool, payload: dict) -> tuple[float, float]:
+    """Return the latency and the time to the first token of one request"""
+    context = StubRuntimeContext(payload)
+    start = time.perf_counter()
+    if stream:
+        first_token = None
+        for _ in func(context):
+            first_token = first_token or time.perf_counter()
+        end = time.perf_counter()
+        return end - start, (first_token or end) - start
+
+    response = func(context)
+    end = time.perf_counter()
+    assert response["body"]["choices"], "empty response"
+    return end - start, end - start
+
+
+async def asend_request(func, stream: bool, payload: dict) -> tuple[float, float]:
+    """Asynchronous counterpart of `send_request`"""
+    context = StubRuntimeContext(payload)
+    start = time.perf_counter()
+    if stream:
+        first_token = None
+        async for _ in func(context):
+            first_token = first_token or time.perf_counter()
+        end = time.perf_counter()
+        return end - start, (first_token or end) - start
+
+    response = await func(context)
+    end = time.perf_counter()
+    assert response["body"]["choices"], "empty response"
+    return end - start, end - start
+
+
+async def asend_requests(func, stream: bool, payloads: list[dict], concurrency: int) -> list[tuple[float, float]]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(payload: dict) -> tuple[float, float]:
+        async with semaphore:
+            return await asend_request(func, stream, payload)
+
+    return await asyncio.gather(*(send(payload) for payload in payloads))
+
+
+def run_endpoint(
+    func, stream: bool, requests: int, concurrency: int, observations: int, use_async: bool = False
+) -> dict:
+    rng = np.random.default_rng(0)
+    payloads = [make_payload(rng, observations) for _ in range(requests)]
+
+    rss_before = rss_bytes()
+    start = time.perf_counter()
+    if use_async:
+        results = asyncio.run(asend_requests(func, stream, payloads, concurrency))
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(lambda payload: send_request(func, stream, payload), payloads))
+    elapsed = time.perf_counter() - start
+
+    latencies, ttfts = zip(*results)
+    return {
+        "requests": requests,
+        "duration_s": round(elapsed, 3),
+        "requests_per_second": round(requests / elapsed, 2),
+        "latency_ms": percentiles(list(latencies)),
+        "ttft_ms": percentiles(list(ttfts)),
+        "rss_growth_mib": round((rss_bytes() - rss_before) / 2**20, 2),
+    }
+
+
+def main(args: argparse.Namespace) -> dict:
+    custom = {**load_config("deployment").get("custom", {}), **json.loads(args.custom)}
+    custom.setdefault("model_id", "scripted")
+    custom["async_handlers"] = args.use_async
+    chat_model = ScriptedChatModel(latency=args.latency, token_rate=args.token_rate)
+    if args.transcript:
+        chat_model.transcript = json.loads(Path(args.transcript).read_text())
+
+    generate, generate_stream = build_ai_service(chat_model, custom)
+    funcs = {"generate": (generate, False), "generate_stream": (generate_stream, True)}
+
+    # Warm-up: first calls of the tools, the graph and the serializers
+    for func, stream in funcs.values():
+        run_endpoint(func, stream, 1, 1, args.observations, args.use_async)
+
+    results = {
+        "version": tomllib.loads(Path("pyproject.toml").read_text())["tool"]["poetry"]["version"],
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "parameters": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "async": args.use_async,
+            "latency_s": args.latency,
+            "token_rate": args.token_rate,
+            "observations": args.observations,
+            "transcript": args.transcript,
+        },
+        "endpoints": {},
+    }
+    for name in args.endpoints:
+        func, stream = funcs[name]
+        results["endpoints"][name] = run_endpoint(
+            func, stream, args.requests, args.concurrency, args.observations, args.use_async
+        )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="number of requests sent to every endpoint")
+    parser.add_argument("--concurrency", type=int, default=8, help="number of requests sent at the same time")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="use the asynchronous handlers")
+    parser.add_argument("--latency", type=float, default=0.05, help="time to the first token of the model [s]")
+    parser.add_argument("--token-rate", type=float, default=200.0, help="tokens generated by the model per second")
+    parser.add_argument("--observations", type=int, default=25, help="size of the dataset sent with every request")
+    parser.add_argument("--transcript", help="JSON file with the transcript replayed by the model")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--custom", default="{}", help="JSON object overriding the deployment's custom parameters")
+    parser.add_argument("--output", help="path of the JSON file to store the results in")
+    args = parser.parse_args()
+
+    results = main(args)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
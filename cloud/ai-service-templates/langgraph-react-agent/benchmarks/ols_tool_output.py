@@ -0,0 +1,60 @@
+"""
+Compares the output of the `ordinary_least_squared_regression` tool rendered as the full statsmodels text summary
+(`full_summary=True`) and as the default compact result: the time of the tool call, the size of the tool message
+stored in the conversation thread and the number of prompt tokens it adds to every following model call.
+
+The fit is taken from the shared OLS cache in both cases (it is warmed up beforehand), so the times compare the
+rendering of the result only. The token counts are estimated with langchain's `count_tokens_approximately`.
+
+Usage (from the template's root directory):
+    python benchmarks/ols_tool_output.py --sizes 100 10000 100000 --regressors 1 3
+"""
+import argparse
+import time
+
+import numpy as np
+from langchain_core.messages import ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langgraph.prebuilt.tool_node import msg_content_output
+
+from langgraph_react_agent import ordinary_least_squared_regression
+from langgraph_react_agent.datasets import DATASETS
+
+
+def measure(payload: dict, repeats: int) -> tuple[float, int, int]:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        output = ordinary_least_squared_regression.invoke(payload)
+    elapsed = (time.perf_counter() - start) / repeats
+
+    # Content of the tool message, as serialized by the graph's tool node
+    content = msg_content_output(output)
+    message = ToolMessage(content=content, name="ordinary_least_squared_regression", tool_call_id="call")
+    return elapsed, len(content.encode()), count_tokens_approximately([message])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--regressors", type=int, nargs="+", default=[1, 3])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(
+        f"{'n':>8} | {'k':>2} | {'summary [ms]':>12} | {'compact [ms]':>12} | "
+        f"{'summary [B]':>11} | {'compact [B]':>11} | {'summary [tok]':>13} | {'compact [tok]':>13}"
+    )
+    for n in args.sizes:
+        for k in args.regressors:
+            exog = rng.normal(size=(n, k))
+            endog = 1.0 + exog.sum(axis=1) + rng.normal(size=n)
+            payload = {"exog": DATASETS.register(exog), "endog": DATASETS.register(endog)}
+            ordinary_least_squared_regression.invoke(payload)  # warm-up, fits the model
+
+            full = measure(payload | {"full_summary": True}, args.repeats)
+            compact = measure(payload, args.repeats)
+            print(
+                f"{n:>8} | {k:>2} | {full[0] * 1e3:>12.3f} | {compact[0] * 1e3:>12.3f} | "
+                f"{full[1]:>11} | {compact[1]:>11} | {full[2]:>13} | {compact[2]:>13}"
+            )
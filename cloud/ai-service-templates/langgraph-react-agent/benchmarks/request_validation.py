@@ -0,0 +1,85 @@
+"""
+Measures the cost per request of validating the request body against the compiled request schema, for requests
+carrying datasets of growing size, and the time of encoding the response bodies and the SSE chunks as JSON with
+the standard library and with orjson.
+
+Usage (from the template's root directory):
+    python benchmarks/request_validation.py --observations 25 1000 100000 1000000 --variables 1 5
+"""
+import argparse
+import json
+import timeit
+
+import numpy as np
+
+from langgraph_react_agent.encoding import orjson
+from langgraph_react_agent.validation import request_validator
+from tests.fake_chat_model import ScriptedChatModel
+from tests.stubs import StubRuntimeContext, build_ai_service, make_payload
+from utils import load_config
+
+
+def make_request(rng: np.random.Generator, observations: int, variables: int) -> dict:
+    exog = rng.normal(size=(observations, variables))
+    return {
+        "messages": [
+            {"role": "system", "content": "You are a helpful assistant that uses tools to answer questions in detail."},
+            {
+                "role": "user",
+                "content": "Fit a regression model and check its assumptions.",
+                "data": {
+                    "exog": (exog[:, 0] if variables == 1 else exog).tolist(),
+                    "endog": (exog.sum(axis=1) + rng.normal(size=observations)).tolist(),
+                },
+            },
+        ]
+    }
+
+
+def per_call(func, min_time: float = 0.2) -> float:
+    """Mean time of one call in seconds"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    return min(timer.repeat(repeat=3, number=number)) / number
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--observations", type=int, nargs="+", default=[25, 1_000, 100_000, 1_000_000])
+    parser.add_argument("--variables", type=int, nargs="+", default=[1, 5])
+    args = parser.parse_args()
+
+    custom = load_config("deployment").get("custom", {})
+    validate = request_validator(
+        max_messages=custom.get("max_request_messages", 100),
+        max_observations=custom.get("max_data_observations", 1_000_000),
+        max_variables=custom.get("max_data_variables", 100),
+    )
+    rng = np.random.default_rng(0)
+
+    print(f"{'observations':>12} | {'variables':>9} | {'body [kB]':>9} | {'validation [ms]':>15} | {'json.loads [ms]':>15}")
+    for observations in args.observations:
+        for variables in args.variables:
+            payload = make_request(rng, observations, variables)
+            body = json.dumps(payload)
+            validation = per_call(lambda: validate(payload))
+            parsing = per_call(lambda: json.loads(body))
+            print(
+                f"{observations:>12} | {variables:>9} | {len(body) / 1e3:>9.1f} | "
+                f"{validation * 1e3:>15.3f} | {parsing * 1e3:>15.3f}"
+            )
+
+    # A JSON response and the chunks of a streamed one, as produced by the service
+    generate, generate_stream = build_ai_service(ScriptedChatModel(), {**custom, "model_id": "scripted"})
+    response = generate(StubRuntimeContext(make_payload(rng, 25) | {"thread_id": "json"}))["body"]
+    chunks = list(generate_stream(StubRuntimeContext(make_payload(rng, 25) | {"thread_id": "sse"})))
+
+    print(f"\n{'encoder':>8} | {'JSON body [us]':>14} | {'SSE chunks [us]':>15}")
+    encoders = {"json": lambda obj: json.dumps(obj).encode()}
+    if orjson is not None:
+        encoders["orjson"] = orjson.dumps
+    for name, encode in encoders.items():
+        body_time = per_call(lambda: encode(response))
+        chunks_time = per_call(lambda: [encode(chunk) for chunk in chunks])
+        print(f"{name:>8} | {body_time * 1e6:>14.1f} | {chunks_time * 1e6:>15.1f}")
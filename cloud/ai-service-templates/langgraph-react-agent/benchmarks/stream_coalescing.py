@@ -0,0 +1,67 @@
+"""
+Compares the streamed responses of `generate_stream` sent token by token and with the deltas coalesced into larger
+chunks: the number of chunks, the bytes on the wire (every chunk framed as a Server-Sent Event), the time to the first
+token and the latency of the whole response.
+
+The service runs offline, with the scripted stand-in for the chat model used by `load.py` generating the final
+answer at `--token-rate` tokens per second.
+
+Usage (from the template's root directory):
+    python benchmarks/stream_coalescing.py --token-rate 50 200 1000 --settings 0:0 64:0.02 256:0.05
+"""
+import argparse
+import json
+import statistics
+import time
+
+import numpy as np
+
+from langgraph_react_agent.streaming import get_delta
+from tests.fake_chat_model import ScriptedChatModel
+from tests.stubs import StubRuntimeContext, build_ai_service, make_payload
+from utils import load_config
+
+
+def measure(generate_stream, payload: dict) -> tuple[int, int, float, float]:
+    """Number of chunks, bytes on the wire, time to the first token and latency of one streamed response"""
+    chunks, wire_bytes, first_token = 0, 0, None
+    start = time.perf_counter()
+    for chunk in generate_stream(StubRuntimeContext(payload)):
+        chunks += 1
+        wire_bytes += len(f"data: {json.dumps(chunk)}\n\n".encode())
+        if first_token is None and get_delta(chunk):
+            first_token = time.perf_counter() - start
+    return chunks, wire_bytes, first_token, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--token-rate", type=float, nargs="+", default=[50.0, 200.0, 1000.0])
+    parser.add_argument(
+        "--settings",
+        nargs="+",
+        default=["0:0", "64:0.02", "256:0.05"],
+        help="coalescing settings as `max_bytes:max_delay`, `0:0` streams token by token",
+    )
+    parser.add_argument("--requests", type=int, default=5)
+    args = parser.parse_args()
+
+    custom = {**load_config("deployment").get("custom", {}), "model_id": "scripted"}
+    rng = np.random.default_rng(0)
+    print(
+        f"{'tokens/s':>8} | {'bytes:delay':>11} | {'chunks':>6} | {'wire [B]':>8} | {'TTFT [ms]':>9} | {'latency [ms]':>12}"
+    )
+    for token_rate in args.token_rate:
+        for setting in args.settings:
+            max_bytes, max_delay = setting.split(":")
+            _, generate_stream = build_ai_service(
+                ScriptedChatModel(token_rate=token_rate),
+                custom | {"stream_coalesce_bytes": int(max_bytes), "stream_coalesce_delay": float(max_delay)},
+            )
+            measure(generate_stream, make_payload(rng, 25))  # warm-up
+            results = [measure(generate_stream, make_payload(rng, 25)) for _ in range(args.requests)]
+            chunks, wire_bytes, ttft, latency = (statistics.median(values) for values in zip(*results))
+            print(
+                f"{token_rate:>8.0f} | {setting:>11} | {chunks:>6.0f} | {wire_bytes:>8.0f} | "
+                f"{ttft * 1e3:>9.1f} | {latency * 1e3:>12.1f}"
+            )
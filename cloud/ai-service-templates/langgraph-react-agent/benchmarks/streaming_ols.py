@@ -0,0 +1,51 @@
+"""
+Compares the time and peak memory of fitting an OLS model and running the four regression diagnostics (summary,
+normality, independence and homoscedasticity) with statsmodels and with the one-pass `IncrementalOLS` engine.
+
+The peak memory is the memory allocated on top of the input data, as reported by `tracemalloc`.
+
+Usage (from the template's root directory):
+    python benchmarks/streaming_ols.py --sizes 10000 100000 1000000 --regressors 1
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import statsmodels.api as sm
+
+from langgraph_react_agent.regression import IncrementalOLS, OLSFit
+
+
+def statsmodels_fit(exog: np.ndarray, endog: np.ndarray) -> OLSFit:
+    design = sm.add_constant(exog)
+    return OLSFit(results=sm.OLS(endog, design).fit(), exog=design, endog=endog)
+
+
+def measure(fit_func, exog: np.ndarray, endog: np.ndarray) -> tuple[float, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    fit = fit_func(exog, endog)
+    fit.summary()
+    fit.normality_test()
+    fit.durbin_watson()
+    fit.breusch_pagan()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--regressors", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'n':>10} | {'statsmodels':>22} | {'streaming engine':>22}")
+    for n in args.sizes:
+        exog = rng.normal(size=(n, args.regressors))
+        endog = 1.0 + exog.sum(axis=1) + rng.normal(size=n)
+        results = [measure(fit_func, exog, endog) for fit_func in (statsmodels_fit, IncrementalOLS.from_arrays)]
+        print(f"{n:>10} | " + " | ".join(f"{t:>8.3f} s {m:>8.1f} MiB" for t, m in results))
@@ -1,10 +1,13 @@
 import textwrap
 import json
+import uuid
 from collections.abc import Generator
 from typing import Callable
 
 from statsmodels import datasets
 
+from langgraph_react_agent.dataset_store import DatasetStore
+
 
 class InteractiveChat:
     def __init__(
@@ -14,8 +17,17 @@ class InteractiveChat:
         data: dict = None,
         stream: bool = False,
         verbose: bool = True,
+        store: DatasetStore = None,
+        send_references: bool = False,
+        window: int = 25,
     ) -> None:
         self.ai_service_invoke = ai_service_invoke
+        # every dataset is converted once into the store, the questions send a window of its rows
+        self.store = DatasetStore("datasets") if store is None else store
+        # send references to the windows (`cancer/exog[0:25]`) instead of their values, requires the AI service
+        # to share the store (`dataset_store` deployment parameter)
+        self.send_references = send_references
+        self.window = window
         self._ordered_list = lambda seq_: "\n".join(f"\t{i}) {k}" for i, k in enumerate(seq_, 1))
         self._delta_start = False
         self.verbose = verbose
@@ -98,6 +110,13 @@ class InteractiveChat:
 
                 yield
 
+    def _window_data(self, name: str) -> dict:
+        dataset = self.store.register_statsmodels(self.data[name])
+        rows = slice(0, self.window)
+        if self.send_references:
+            return {"exog": dataset.reference("exog", rows), "endog": dataset.reference("endog", rows)}
+        return {"exog": dataset.window("exog", rows).tolist(), "endog": dataset.window("endog", rows).tolist()}
+
     def _print_message(self, message: dict) -> None:
         header = f" {message['role'].capitalize()} Message ".center(80, '=')
         if delta := message.get("delta"):
@@ -112,6 +131,8 @@ class InteractiveChat:
 
     def run(self) -> None:
         # TODO implement signal handling (especially Ctrl-C)
+        # every chat session is a separate conversation thread on the AI service side
+        thread_id = str(uuid.uuid4())
         while True:
             try:
                 q, d = None, None
@@ -166,21 +187,11 @@ class InteractiveChat:
                                 )
                             else:
                                 user_message["content"] = self.questions[number - 1]
-                                user_message["data"] = {
-                                    "exog": self.data[self._data_names[d - 1]]
-                                    .load_pandas()
-                                    .exog.iloc[:25, 0]
-                                    .to_numpy()
-                                    .tolist(),
-                                    "endog": self.data[self._data_names[d - 1]]
-                                    .load_pandas()
-                                    .endog.iloc[:25]
-                                    .to_numpy()
-                                    .tolist(),
-                                }
+                                user_message["data"] = self._window_data(self._data_names[d - 1])
 
                         request_payload_json = {
-                            "messages": [{"role": "user", **user_message}]
+                            "thread_id": thread_id,
+                            "messages": [{"role": "user", **user_message}],
                         }
 
                         resp = self.ai_service_invoke(request_payload_json)
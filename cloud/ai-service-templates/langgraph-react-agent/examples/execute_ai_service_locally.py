@@ -4,6 +4,7 @@ from ibm_watsonx_ai.deployments import RuntimeContext
 from ai_service import deployable_ai_service
 from utils import load_config
 from examples._interactive_chat import InteractiveChat
+from langgraph_react_agent.dataset_store import DatasetStore
 
 stream = False
 config = load_config()
@@ -24,5 +25,7 @@ def ai_service_invoke(payload):
     context.request_payload_json = payload
     return ai_service_resp_func(context)
 
-chat = InteractiveChat(ai_service_invoke, stream=stream)
+# The AI service runs in this process, it reads the datasets referenced by the chat from the same store
+store = DatasetStore(custom.get("dataset_store", "datasets"))
+chat = InteractiveChat(ai_service_invoke, stream=stream, store=store, send_references="dataset_store" in custom)
 chat.run()
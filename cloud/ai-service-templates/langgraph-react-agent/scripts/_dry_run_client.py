@@ -0,0 +1,117 @@
+import itertools
+import threading
+import time
+
+import requests
+from ibm_watsonx_ai.wml_client_error import ApiRequestFailure, ResourceIdByNameNotFound
+
+
+class _MetaNames:
+    """Meta names of the stand-in resources, every attribute is its own lowercase name"""
+
+    def __getattr__(self, name: str) -> str:
+        return name.lower()
+
+
+class _Resource:
+    def __init__(self, client: "DryRunAPIClient", kind: str) -> None:
+        self.client = client
+        self.kind = kind
+        self.ConfigurationMetaNames = _MetaNames()
+
+    def store(self, meta_props: dict, **kwargs) -> dict:
+        return self.client.create(self.kind, meta_props)
+
+    @staticmethod
+    def get_id(details: dict) -> str:
+        return details["metadata"]["id"]
+
+    def get_details(self, asset_id: str) -> dict:
+        return self.client.get_details(self.kind, asset_id)
+
+
+class _SoftwareSpecifications(_Resource):
+    def get_id_by_name(self, name: str) -> str:
+        asset_id = self.client.call("software_specification.get_id_by_name", self.client.names.get(name))
+        if asset_id is None:
+            raise ResourceIdByNameNotFound(name, "software specification")
+        return asset_id
+
+    def delete(self, asset_id: str) -> None:
+        self.client.call("software_specification.delete")
+        with self.client.lock:
+            self.client.names = {name: i for name, i in self.client.names.items() if i != asset_id}
+            self.client.deleted.add(asset_id)
+
+
+class _Repository:
+    def __init__(self, client: "DryRunAPIClient") -> None:
+        self.client = client
+        self.AIServiceMetaNames = _MetaNames()
+
+    def store_ai_service(self, function, meta_props: dict) -> dict:
+        return self.client.create("ai_service", meta_props)
+
+    def get_ai_service_details(self, ai_service_id: str) -> dict:
+        return self.client.get_details("ai_service", ai_service_id)
+
+
+class _Deployments(_Resource):
+    def create(self, artifact_id: str, meta_props: dict) -> dict:
+        return self.client.create("deployment", meta_props)
+
+
+class DryRunAPIClient:
+    """
+    Local stand-in for `ibm_watsonx_ai.APIClient` used by the dry run of `scripts/deploy.py`.
+
+    It implements the calls made by the deployment steps, records them in `calls` and answers every one of them
+    after `latency` seconds, with generated asset ids. The base software specifications are always found, and so
+    is every asset (also the ones recorded by a real deployment) unless it has been removed with `delete_asset`.
+
+    :param latency: Time (in seconds) of every call
+    :type latency: float
+    """
+
+    def __init__(self, latency: float = 0.1, space_id: str = "dry-run-space", url: str = "https://dry-run") -> None:
+        self.latency = latency
+        self.default_space_id = space_id
+        self.credentials = type("Credentials", (), {"url": url})()
+        self.calls: list[str] = []
+        self.names: dict[str, str] = {"runtime-24.1-py3.11": "base-software-specification"}
+        self.deleted: set[str] = set()
+        self.lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+        self.package_extensions = _Resource(self, "package_extension")
+        self.software_specifications = _SoftwareSpecifications(self, "software_specification")
+        self.repository = _Repository(self)
+        self.deployments = _Deployments(self, "deployment")
+
+    def call(self, name: str, result=None):
+        time.sleep(self.latency)
+        with self.lock:
+            self.calls.append(name)
+        return result
+
+    def create(self, kind: str, meta_props: dict) -> dict:
+        with self.lock:
+            asset_id = f"dry-run-{kind.replace('_', '-')}-{next(self._ids)}"
+            if name := meta_props.get("name"):
+                self.names[name] = asset_id
+        return self.call(f"{kind}.create", {"metadata": {"id": asset_id, "name": meta_props.get("name")}})
+
+    def get_details(self, kind: str, asset_id: str) -> dict:
+        details = self.call(f"{kind}.get_details", {"metadata": {"id": asset_id}})
+        if asset_id in self.deleted:
+            response = requests.Response()
+            response.status_code = 404
+            response._content = b'{"errors": [{"code": "not_found"}]}'
+            response.request = requests.Request("GET", f"{self.credentials.url}/{kind}/{asset_id}").prepare()
+            raise ApiRequestFailure(f"Failure during getting {kind} details", response)
+        return details
+
+    def delete_asset(self, asset_id: str) -> None:
+        """Delete an asset outside of the deployment, e.g. in the UI of the space"""
+        with self.lock:
+            self.deleted.add(asset_id)
@@ -1,6 +1,9 @@
+import hashlib
 import shutil
 import subprocess
+import tempfile
 import tomllib
+import zipfile
 from pathlib import Path
 
 
@@ -21,28 +24,60 @@ def get_package_name_and_version(pyproject_path: str) -> tuple[str, str]:
     return package_name, package_version
 
 
+def hash_files(root: Path, paths: list[str]) -> str:
+    """
+    SHA-256 digest of the content and the relative paths of the given files and of all the files in the given
+    directories (Python bytecode caches are ignored).
+
+    :param root: Directory the paths are relative to
+    :type root: Path
+
+    :param paths: Files and directories to hash, relative to `root`
+    :type paths: list[str]
+    """
+    digest = hashlib.sha256()
+    files = []
+    for path in paths:
+        path = root / path
+        files.extend(path.rglob("*") if path.is_dir() else [path])
+    for file in sorted(f for f in files if f.is_file() and "__pycache__" not in f.parts):
+        digest.update(file.relative_to(root).as_posix().encode() + b"\0")
+        digest.update(file.read_bytes())
+    return digest.hexdigest()
+
+
+def write_zip(source_dir: Path, zip_path: Path) -> None:
+    """
+    Create a ZIP archive of the directory whose bytes only depend on the files' content and paths.
+
+    The entries are sorted and stamped with a fixed date (ZIP does not support the 1970 timestamps set by
+    Poetry in the sdist), so an unchanged package is rebuilt into an identical archive.
+    """
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for file in sorted(f for f in source_dir.rglob("*") if f.is_file()):
+            info = zipfile.ZipInfo(file.relative_to(source_dir).as_posix(), date_time=(1980, 1, 1, 0, 0, 0))
+            info.external_attr = 0o644 << 16
+            info.compress_type = zipfile.ZIP_DEFLATED
+            archive.writestr(info, file.read_bytes())
+
+
 def build_zip_sc(sc_dir: Path) -> None:
     """
     Build and package a source distribution as a ZIP archive.
 
     This function performs the following steps:
-    1. Builds a source distribution using Poetry.
+    1. Builds a source distribution using Poetry in a temporary directory.
     2. Extracts the built archive.
-    3. Normalizes file timestamps to fix ZIP timestamp issues.
-    4. Creates a ZIP archive of the source directory.
+    3. Creates a reproducible ZIP archive of the source directory (see `write_zip`).
 
     :param sc_dir: Path to the source directory for building and packaging.
     :type sc_dir: Path
     """
-    subprocess.run(["poetry", "build", f"--output={sc_dir.parent}", "--format=sdist"], check=True)
-    shutil.unpack_archive(sc_dir.with_suffix(".tar.gz"), sc_dir.parent)
-
-    for file in sc_dir.parent.rglob("*"):
-        if file.is_file():
-            file.touch()
-
-    zip_dir = str(sc_dir.with_suffix(""))
-    shutil.make_archive(zip_dir, "zip", zip_dir)
+    sc_dir.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory() as build_dir:
+        subprocess.run(["poetry", "build", f"--output={build_dir}", "--format=sdist"], check=True)
+        shutil.unpack_archive(Path(build_dir) / sc_dir.with_suffix(".tar.gz").name, build_dir)
+        write_zip(Path(build_dir) / sc_dir.stem, sc_dir)
 
 
 if __name__ == "__main__":
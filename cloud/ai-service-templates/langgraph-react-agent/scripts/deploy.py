@@ -1,106 +1,230 @@
+"""
+Builds the package extension and deploys the AI service on IBM Cloud.
+
+The deployment is a pipeline of steps: the build and the upload of the package extension, the software
+specification, the AI service and its deployment. Every step is skipped when its inputs (the package's sources,
+`ai_service.py` and the schemas, the deployment parameters, the target space) and the ones of the steps it depends
+on have not changed since its last run, as recorded in `dist/deploy_manifest.json`, and the asset it created
+still exists in the space. The steps which do not depend on each other run concurrently.
+
+With `--dry-run` the steps run against a local stand-in of the `APIClient` answering every call after `--latency`
+seconds (the package is not built and the manifest is not updated). The script reports which steps would run and
+how long each of them took.
+
+Usage (from the template's root directory):
+    python scripts/deploy.py [--dry-run] [--force]
+"""
+import argparse
 import json
 import logging
+import time
 from pathlib import Path
-import json
+from typing import Callable
 
 import ibm_watsonx_ai
+from ibm_watsonx_ai.wml_client_error import ApiRequestFailure
 
 from ai_service import deployable_ai_service
-from scripts.build_package import build_zip_sc, get_package_name_and_version
+from scripts._dry_run_client import DryRunAPIClient
+from scripts.build_package import build_zip_sc, get_package_name_and_version, hash_files
+from scripts.pipeline import Manifest, Step, StepReport, run_pipeline
 from utils import load_config
 
 logging.basicConfig()
 logger = logging.getLogger(__name__)
 
-config = load_config()
-dep_config = config["deployment"]
-
-client = ibm_watsonx_ai.APIClient(
-    credentials=ibm_watsonx_ai.Credentials(url=dep_config["watsonx_url"], api_key=dep_config["watsonx_apikey"]),
-    space_id=dep_config["space_id"])
-
 root_dir = Path(__file__).parents[1]
-pyproject_path = root_dir / "pyproject.toml"
-pkg_name, pkg_version = get_package_name_and_version(str(pyproject_path))
-
-# Create package extension
-pkg_ext_metadata = {
-    client.package_extensions.ConfigurationMetaNames.NAME: pkg_name,
-    client.package_extensions.ConfigurationMetaNames.TYPE: "pip_zip"
-}
-
-pkg_ext_sc = root_dir / "dist" / f"{pkg_name.replace('-', '_')}-{pkg_version}.zip"
-
-if not pkg_ext_sc.exists():
-    build_zip_sc(pkg_ext_sc)
-else:
-    logger.warning(
-        f"package extension was not built as path: '{pkg_ext_sc}' is not empty. Using the already existing path for deployment. "
-        "In case of any problems you might want to delete it and rerun the `deploy.py` script")
-
-pkg_ext_asset_details = client.package_extensions.store(
-    meta_props=pkg_ext_metadata,
-    file_path=str(pkg_ext_sc)
-)
-pkg_ext_asset_id = client.package_extensions.get_id(pkg_ext_asset_details)
-
-# Select base software specification to extend
-base_sw_spec_id = client.software_specifications.get_id_by_name("runtime-24.1-py3.11")
-
-# Define new software specification based on base one and custom library
-template_sw_spec_name = f"{pkg_name}-sw-spec"
-
-sw_spec_metadata = {
-    client.software_specifications.ConfigurationMetaNames.NAME:
-        template_sw_spec_name,
-    client.software_specifications.ConfigurationMetaNames.BASE_SOFTWARE_SPECIFICATION:
-        {"guid": base_sw_spec_id},
-    client.software_specifications.ConfigurationMetaNames.PACKAGE_EXTENSIONS:
-        [{"guid": pkg_ext_asset_id}]
-}
-
-# Delete if sw_spec already exists
-try:
-    sw_spec_id = client.software_specifications.get_id_by_name(template_sw_spec_name)
-    logger.warning(f"Deleting previously created sw_spec: {template_sw_spec_name}")
-    client.software_specifications.delete(sw_spec_id)
-except ibm_watsonx_ai.wml_client_error.ResourceIdByNameNotFound:
-    pass
-
-# Store the software spec
-sw_spec_asset_details = client.software_specifications.store(meta_props=sw_spec_metadata)
-
-# Get the id of the new asset
-asset_id = client.software_specifications.get_id(sw_spec_asset_details)
-
-sw_spec_asset_details = client.software_specifications.get_details(asset_id)
-
-
-with (root_dir / "schema" / "request.json").open("r", encoding="utf-8") as file:
-    request_schema = json.load(file)
-
-with (root_dir / "schema" / "response.json").open("r", encoding="utf-8") as file:
-    response_schema = json.load(file)
-
-meta_props = {
-    client.repository.AIServiceMetaNames.SOFTWARE_SPEC_ID: asset_id,
-    client.repository.AIServiceMetaNames.NAME: "online ai_service",
-    client.repository.AIServiceMetaNames.REQUEST_DOCUMENTATION: request_schema,
-    client.repository.AIServiceMetaNames.RESPONSE_DOCUMENTATION: response_schema
-}
-
-stored_ai_service_details = client.repository.store_ai_service(deployable_ai_service, meta_props)
-ai_service_id = stored_ai_service_details["metadata"].get("id")
-
-meta_props = {
-    client.deployments.ConfigurationMetaNames.NAME:
-        f"online ai_service test",
-    client.deployments.ConfigurationMetaNames.ONLINE: {},
-    client.deployments.ConfigurationMetaNames.CUSTOM: {
-        "space_id": client.default_space_id,
-        "url": client.credentials.url,
-        **dep_config["custom"],
-    },
-}
-
-deployment_details = client.deployments.create(ai_service_id, meta_props)
+
+# Base software specification extended with the package
+BASE_SOFTWARE_SPECIFICATION = "runtime-24.1-py3.11"
+
+
+def asset_exists(get_details: Callable[[str], dict]) -> Callable[[str], bool]:
+    """
+    Check of an asset id recorded in the manifest, the step creating the asset is run again if it has been deleted.
+
+    :param get_details: Client method returning the details of the asset
+    :type get_details: Callable[[str], dict]
+    """
+
+    def exists(asset_id: str) -> bool:
+        try:
+            get_details(asset_id)
+        except ApiRequestFailure as error:
+            if error.response.status_code == 404:
+                logger.warning(f"Asset {asset_id} recorded in the manifest no longer exists")
+                return False
+            raise
+        return True
+
+    return exists
+
+
+def get_steps(client, dep_config: dict, dist_dir: Path = root_dir / "dist", build: bool = True) -> list[Step]:
+    """
+    Steps of the deployment pipeline.
+
+    :param client: Client of the target deployment space
+    :type client: ibm_watsonx_ai.APIClient
+
+    :param dep_config: `deployment` section of `config.toml`
+    :type dep_config: dict
+
+    :param dist_dir: Directory of the built package extension
+    :type dist_dir: Path
+
+    :param build: Build the package extension, otherwise only its path is returned (dry run)
+    :type build: bool
+    """
+    pkg_name, pkg_version = get_package_name_and_version(str(root_dir / "pyproject.toml"))
+    pkg_ext_sc = dist_dir / f"{pkg_name.replace('-', '_')}-{pkg_version}.zip"
+    template_sw_spec_name = f"{pkg_name}-sw-spec"
+    schema_dir = root_dir / "src" / "langgraph_react_agent" / "schema"
+    # The assets are created again when deploying to another space
+    target = {"url": client.credentials.url, "space_id": client.default_space_id}
+    custom = {"space_id": client.default_space_id, "url": client.credentials.url, **dep_config["custom"]}
+
+    def build_package(_: dict) -> str:
+        if build:
+            build_zip_sc(pkg_ext_sc)
+        return str(pkg_ext_sc)
+
+    def store_package_extension(outputs: dict) -> str:
+        pkg_ext_metadata = {
+            client.package_extensions.ConfigurationMetaNames.NAME: pkg_name,
+            client.package_extensions.ConfigurationMetaNames.TYPE: "pip_zip",
+        }
+        pkg_ext_asset_details = client.package_extensions.store(meta_props=pkg_ext_metadata, file_path=outputs["build"])
+        return client.package_extensions.get_id(pkg_ext_asset_details)
+
+    def get_base_software_specification(_: dict) -> str:
+        return client.software_specifications.get_id_by_name(BASE_SOFTWARE_SPECIFICATION)
+
+    def store_software_specification(outputs: dict) -> str:
+        # Define new software specification based on base one and custom library
+        sw_spec_metadata = {
+            client.software_specifications.ConfigurationMetaNames.NAME: template_sw_spec_name,
+            client.software_specifications.ConfigurationMetaNames.BASE_SOFTWARE_SPECIFICATION: {
+                "guid": outputs["base_software_specification"]
+            },
+            client.software_specifications.ConfigurationMetaNames.PACKAGE_EXTENSIONS: [
+                {"guid": outputs["package_extension"]}
+            ],
+        }
+
+        # Delete if sw_spec already exists
+        try:
+            sw_spec_id = client.software_specifications.get_id_by_name(template_sw_spec_name)
+            logger.warning(f"Deleting previously created sw_spec: {template_sw_spec_name}")
+            client.software_specifications.delete(sw_spec_id)
+        except ibm_watsonx_ai.wml_client_error.ResourceIdByNameNotFound:
+            pass
+
+        sw_spec_asset_details = client.software_specifications.store(meta_props=sw_spec_metadata)
+        return client.software_specifications.get_id(sw_spec_asset_details)
+
+    def store_ai_service(outputs: dict) -> str:
+        with (schema_dir / "request.json").open("r", encoding="utf-8") as file:
+            request_schema = json.load(file)
+
+        with (schema_dir / "response.json").open("r", encoding="utf-8") as file:
+            response_schema = json.load(file)
+
+        meta_props = {
+            client.repository.AIServiceMetaNames.SOFTWARE_SPEC_ID: outputs["software_specification"],
+            client.repository.AIServiceMetaNames.NAME: "online ai_service",
+            client.repository.AIServiceMetaNames.REQUEST_DOCUMENTATION: request_schema,
+            client.repository.AIServiceMetaNames.RESPONSE_DOCUMENTATION: response_schema,
+        }
+
+        stored_ai_service_details = client.repository.store_ai_service(deployable_ai_service, meta_props)
+        return stored_ai_service_details["metadata"].get("id")
+
+    def create_deployment(outputs: dict) -> str:
+        meta_props = {
+            client.deployments.ConfigurationMetaNames.NAME: "online ai_service test",
+            client.deployments.ConfigurationMetaNames.ONLINE: {},
+            client.deployments.ConfigurationMetaNames.CUSTOM: custom,
+        }
+
+        deployment_details = client.deployments.create(outputs["ai_service"], meta_props)
+        return client.deployments.get_id(deployment_details)
+
+    return [
+        Step(
+            "build",
+            build_package,
+            inputs=hash_files(root_dir, ["pyproject.toml", "README.md", "src"]),
+            is_valid=lambda path: Path(path).exists(),
+        ),
+        Step(
+            "base_software_specification",
+            get_base_software_specification,
+            inputs=[BASE_SOFTWARE_SPECIFICATION, target],
+            is_valid=asset_exists(client.software_specifications.get_details),
+        ),
+        Step(
+            "package_extension",
+            store_package_extension,
+            inputs=target,
+            deps=("build",),
+            is_valid=asset_exists(client.package_extensions.get_details),
+        ),
+        Step(
+            "software_specification",
+            store_software_specification,
+            inputs=template_sw_spec_name,
+            deps=("package_extension", "base_software_specification"),
+            is_valid=asset_exists(client.software_specifications.get_details),
+        ),
+        Step(
+            "ai_service",
+            store_ai_service,
+            inputs=hash_files(root_dir, ["ai_service.py", "src/langgraph_react_agent/schema"]),
+            deps=("software_specification",),
+            is_valid=asset_exists(client.repository.get_ai_service_details),
+        ),
+        Step(
+            "deployment",
+            create_deployment,
+            inputs=custom,
+            deps=("ai_service",),
+            is_valid=asset_exists(client.deployments.get_details),
+        ),
+    ]
+
+
+def print_reports(reports: list[StepReport], duration: float) -> None:
+    print(f"{'step':<28} | {'status':<9} | {'time [s]':>8}")
+    for report in reports:
+        print(f"{report.name:<28} | {report.status:<9} | {report.duration:>8.2f}")
+    print(f"{'total':<28} | {'':<9} | {duration:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="run the steps against a local stand-in client")
+    parser.add_argument("--latency", type=float, default=0.5, help="time (in seconds) of every stand-in client call")
+    parser.add_argument("--force", action="store_true", help="run every step, ignoring the manifest")
+    args = parser.parse_args()
+
+    dep_config = load_config("deployment")
+    if args.dry_run:
+        client = DryRunAPIClient(latency=args.latency, space_id=dep_config["space_id"], url=dep_config["watsonx_url"])
+    else:
+        client = ibm_watsonx_ai.APIClient(
+            credentials=ibm_watsonx_ai.Credentials(url=dep_config["watsonx_url"], api_key=dep_config["watsonx_apikey"]),
+            space_id=dep_config["space_id"],
+        )
+
+    dist_dir = root_dir / "dist"
+    manifest = Manifest(dist_dir / "deploy_manifest.json", read_only=args.dry_run)
+    start = time.perf_counter()
+    reports = run_pipeline(
+        get_steps(client, dep_config, dist_dir, build=not args.dry_run),
+        manifest,
+        force=args.force,
+        dry_run=args.dry_run,
+    )
+    print_reports(reports, time.perf_counter() - start)
+    print(f"deployment_id: {reports[-1].output}")
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+
+@dataclass
+class Step:
+    """
+    One step of the deployment pipeline.
+
+    :param name: Unique name of the step, its output is passed to the dependent steps under this name
+    :type name: str
+
+    :param run: Function called with the outputs of the dependencies (a dict keyed by their names), returning
+        the JSON-serialisable output of the step
+    :type run: Callable[[dict], Any]
+
+    :param inputs: JSON-serialisable value (e.g. a hash of files) determining the output together with the
+        dependencies, the step is skipped when neither has changed since its last run
+    :type inputs: Any
+
+    :param deps: Names of the steps whose outputs are needed, the steps without a dependency between them
+        run concurrently
+    :type deps: tuple[str, ...]
+
+    :param is_valid: Check of an output recorded in the manifest (e.g. that a built file still exists),
+        the step is run again if it fails
+    :type is_valid: Callable[[Any], bool] | None
+    """
+
+    name: str
+    run: Callable[[dict], Any]
+    inputs: Any = None
+    deps: tuple[str, ...] = ()
+    is_valid: Callable[[Any], bool] | None = None
+
+
+@dataclass
+class StepReport:
+    name: str
+    status: str  # "ran", "would run" (dry run) or "skipped"
+    duration: float
+    output: Any
+
+
+class Manifest:
+    """
+    Fingerprints of the inputs and the outputs of the last run of every step, stored as JSON.
+
+    :param path: File storing the manifest, `None` keeps it in memory
+    :type path: Path | None
+
+    :param read_only: Do not store the runs (dry run)
+    :type read_only: bool
+    """
+
+    def __init__(self, path: Path | None, read_only: bool = False) -> None:
+        self.path = path
+        self.read_only = read_only
+        self.steps: dict[str, dict] = {}
+        if path is not None and path.exists():
+            self.steps = json.loads(path.read_text())["steps"]
+        self._lock = threading.Lock()
+
+    def lookup(self, name: str, fingerprint: str, dependencies: dict) -> dict | None:
+        with self._lock:
+            entry = self.steps.get(name)
+        if entry is None or entry["fingerprint"] != fingerprint:
+            return None
+        # A dependency created again (e.g. a deleted asset) has a new output, which the step has not used yet
+        return entry if entry.get("dependencies") == dependencies else None
+
+    def record(self, name: str, fingerprint: str, output: Any, dependencies: dict) -> None:
+        if self.read_only:
+            return
+        with self._lock:
+            self.steps[name] = {"fingerprint": fingerprint, "output": output, "dependencies": dependencies}
+            if self.path is not None:
+                # Stored after every step, so a failed pipeline resumes from the last completed step
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self.path.write_text(json.dumps({"steps": self.steps}, indent=2, sort_keys=True))
+
+
+def fingerprints(steps: list[Step]) -> dict[str, str]:
+    """Fingerprint of every step: a hash of its inputs and of the fingerprints of its dependencies"""
+    by_name = {step.name: step for step in steps}
+    result: dict[str, str] = {}
+
+    def visit(step: Step, path: tuple[str, ...]) -> str:
+        if step.name in path:
+            raise ValueError(f"Circular dependency between the steps: {' -> '.join(path + (step.name,))}.")
+        if step.name not in result:
+            parts = [step.inputs, [visit(by_name[dep], path + (step.name,)) for dep in step.deps]]
+            result[step.name] = hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+        return result[step.name]
+
+    for step in steps:
+        unknown = [dep for dep in step.deps if dep not in by_name]
+        if unknown:
+            raise ValueError(f"Step `{step.name}` depends on unknown steps {unknown}.")
+        visit(step, ())
+    return result
+
+
+def run_pipeline(
+    steps: list[Step], manifest: Manifest, force: bool = False, dry_run: bool = False, max_workers: int = 4
+) -> list[StepReport]:
+    """
+    Run the steps in the order of their dependencies, concurrently when they do not depend on each other.
+
+    A step is skipped, and the output of its last run is reused, if its fingerprint and the outputs of its
+    dependencies match the ones recorded in the manifest and its output is still valid (unless `force` is set). The manifest is updated after every step which ran.
+    With `dry_run` the steps are run as usual (against stand-ins), but reported as "would run".
+
+    :return: Reports of the steps, in the order of `steps`
+    """
+    step_fingerprints = fingerprints(steps)
+
+    def execute(step: Step, outputs: dict) -> StepReport:
+        fingerprint = step_fingerprints[step.name]
+        entry = None if force else manifest.lookup(step.name, fingerprint, outputs)
+        if entry is not None and (step.is_valid is None or step.is_valid(entry["output"])):
+            return StepReport(step.name, "skipped", 0.0, entry["output"])
+
+        start = time.perf_counter()
+        output = step.run(outputs)
+        duration = time.perf_counter() - start
+        manifest.record(step.name, fingerprint, output, outputs)
+        return StepReport(step.name, "would run" if dry_run else "ran", duration, output)
+
+    reports: dict[str, StepReport] = {}
+    pending = list(steps)
+    running: dict[Future, Step] = {}
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="step") as executor:
+        while pending or running:
+            for step in [step for step in pending if all(dep in reports for dep in step.deps)]:
+                pending.remove(step)
+                outputs = {dep: reports[dep].output for dep in step.deps}
+                running[executor.submit(execute, step, outputs)] = step
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step = running.pop(future)
+                reports[step.name] = future.result()
+    return [reports[step.name] for step in steps]
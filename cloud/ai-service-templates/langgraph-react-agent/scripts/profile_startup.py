@@ -0,0 +1,97 @@
+"""
+Profiles the cold start of the AI service: the import time of every top-level package and the time from the start
+of a fresh Python process to the first response of `generate`, with and without the warm-up pass.
+
+Each cold start runs in a new interpreter with `-X importtime`. The service is created with stand-ins for the
+`APIClient` and `ChatWatsonx` (the scripted chat model of the benchmarks), so no connection to the IBM Cloud is
+required, while the imports, the graph compilation and the tools run exactly as in a deployment.
+
+Usage (from the template's root directory):
+    python scripts/profile_startup.py --top 15
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+
+def cold_start(warm_up: bool) -> dict:
+    """Run in the profiled process: create the service and send the first request"""
+    start = time.perf_counter()
+    from unittest import mock
+
+    import numpy as np
+
+    from tests.fake_chat_model import ScriptedChatModel
+    from tests.stubs import StubAPIClient, StubRuntimeContext, make_payload
+
+    import ai_service
+
+    imported = time.perf_counter()
+    chat_model = ScriptedChatModel()
+    with (
+        mock.patch("ibm_watsonx_ai.APIClient", StubAPIClient),
+        mock.patch("langchain_ibm.ChatWatsonx", lambda **kwargs: chat_model),
+    ):
+        generate, _ = ai_service.deployable_ai_service(
+            StubRuntimeContext(), model_id="scripted", thread_id="thread-1", warm_up=warm_up
+        )
+        ready = time.perf_counter()
+        generate(StubRuntimeContext(make_payload(np.random.default_rng(0), 25)))
+        first_response = time.perf_counter()
+
+    return {
+        "imports_s": imported - start,
+        "service_creation_s": ready - imported,
+        "first_request_s": first_response - ready,
+        "time_to_first_response_s": first_response - start,
+    }
+
+
+def parse_importtime(stderr: str) -> dict[str, float]:
+    """Cumulative import time (in seconds) of every top-level package imported directly by the profiled code"""
+    packages: dict[str, float] = defaultdict(float)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented, only the imports made by the profiled code itself are counted
+        if name.startswith(" ") and not name.startswith("  "):
+            packages[name.strip().split(".")[0]] += int(cumulative) / 1e6
+    return dict(packages)
+
+
+def profile(warm_up: bool) -> tuple[dict, dict[str, float], float]:
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", __file__, "--child", "--warm-up" if warm_up else "--no-warm-up"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    wall_time = time.perf_counter() - start
+    return json.loads(process.stdout.splitlines()[-1]), parse_importtime(process.stderr), wall_time
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=15, help="number of the slowest packages to list")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--warm-up", action=argparse.BooleanOptionalAction, default=True, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(cold_start(args.warm_up)))
+        sys.exit()
+
+    for warm_up in (True, False):
+        timings, packages, wall_time = profile(warm_up)
+        print(f"warm_up = {str(warm_up).lower()}")
+        print(f"  {'process start to first response':<34} {wall_time:>8.3f} s")
+        for name, seconds in timings.items():
+            print(f"  {name:<34} {seconds:>8.3f} s")
+        print(f"  {'slowest imports':<34}")
+        for name, seconds in sorted(packages.items(), key=lambda item: -item[1])[: args.top]:
+            print(f"    {name:<32} {seconds:>8.3f} s")
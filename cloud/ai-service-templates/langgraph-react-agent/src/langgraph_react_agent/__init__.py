@@ -4,6 +4,7 @@ from .tools import (
     check_residuals_normality,
     data_independence_test,
     homoscedasticity_tests,
+    regression_diagnostics,
 )
 
 TOOLS = [
@@ -12,4 +13,5 @@ TOOLS = [
     check_residuals_normality,
     data_independence_test,
     homoscedasticity_tests,
+    regression_diagnostics,
 ]
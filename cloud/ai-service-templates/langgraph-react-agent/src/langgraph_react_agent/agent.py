@@ -1,32 +1,113 @@
+import threading
+from collections import OrderedDict
 from typing import Callable
 
 from ibm_watsonx_ai import APIClient
-from langchain_ibm import ChatWatsonx
+from langchain_core.messages import BaseMessage, SystemMessage
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph.graph import CompiledGraph
 from langgraph.prebuilt import create_react_agent
 from langgraph.checkpoint.memory import MemorySaver
 
 from langgraph_react_agent import TOOLS
+from langgraph_react_agent.compaction import HistoryCompactor
+from langgraph_react_agent.tool_node import ParallelToolNode
 
 
-def get_graph_closure(client: APIClient, model_id: str) -> Callable:
-    """Graph generator closure."""
+def get_graph_closure(
+    client: APIClient,
+    model_id: str,
+    graph_cache_size: int = 8,
+    checkpointer: BaseCheckpointSaver | None = None,
+    tool_workers: int = 4,
+    tool_timeout: float | dict[str, float] | None = 30.0,
+    tool_max_pending: int | None = None,
+    compactor: HistoryCompactor | None = None,
+) -> Callable:
+    """Graph generator closure.
 
-    # Initialise ChatWatsonx
-    chat = ChatWatsonx(model_id=model_id, watsonx_client=client)
+    Compiled graphs are kept in a bounded LRU cache keyed by the system prompt text. All of them
+    share the same `ChatWatsonx` instance, checkpointer and tool node, so the tool calls of all the
+    graphs run on a single pool of `tool_workers` threads, with at most `tool_max_pending` calls queued
+    or running.
+
+    If a `compactor` is provided, the conversation history is compacted by it before every call
+    of the model.
+
+    `ChatWatsonx` (and `langchain_ibm`, which takes a while to import) is only created when the
+    first graph is compiled.
+    """
+
+    chat = None
 
     # Define system prompt
     default_system_prompt = "You are a helpful AI assistant, please respond to the user's query to the best of your ability!"
 
-    # Initialise memory saver
-    memory = MemorySaver()
+    # Initialise memory saver, unless a checkpointer is provided
+    memory = checkpointer if checkpointer is not None else MemorySaver()
+
+    # Tool calls requested in one agent step run concurrently
+    tool_node = ParallelToolNode(
+        TOOLS, max_workers=tool_workers, timeout=tool_timeout, max_pending=tool_max_pending
+    )
+
+    # Compiled graphs cache (system prompt -> compiled graph)
+    graphs: OrderedDict[str, CompiledGraph] = OrderedDict()
+    lock = threading.Lock()
+
+    def get_chat():
+        """Initialise ChatWatsonx on first use"""
+        nonlocal chat
+
+        with lock:
+            if chat is None:
+                from langchain_ibm import ChatWatsonx
+
+                chat = ChatWatsonx(model_id=model_id, watsonx_client=client)
+            return chat
 
-    def get_graph(system_prompt=default_system_prompt) -> CompiledGraph:
+    def get_graph(
+        system_prompt: str | SystemMessage = default_system_prompt,
+    ) -> CompiledGraph:
         """Get compiled graph with overwritten system prompt, if provided"""
 
+        key = (
+            system_prompt.content
+            if isinstance(system_prompt, SystemMessage)
+            else system_prompt
+        )
+
+        with lock:
+            if (graph := graphs.get(key)) is not None:
+                graphs.move_to_end(key)
+                return graph
+
         # Create instance of compiled graph
-        return create_react_agent(
-            chat, tools=TOOLS, checkpointer=memory, state_modifier=system_prompt
+        graph = create_react_agent(
+            get_chat(),
+            tools=tool_node,
+            checkpointer=memory,
+            state_modifier=(
+                compactor.state_modifier(system_prompt)
+                if compactor is not None
+                else system_prompt
+            ),
         )
 
+        with lock:
+            graph = graphs.setdefault(key, graph)
+            graphs.move_to_end(key)
+            while len(graphs) > graph_cache_size:
+                graphs.popitem(last=False)
+        return graph
+
     return get_graph
+
+
+def get_message_watermark(state_messages: list[BaseMessage], message_id: str) -> int:
+    """Return the index following the message with `message_id`, scanning from the end of the thread"""
+
+    for i in range(len(state_messages) - 1, -1, -1):
+        if state_messages[i].id == message_id:
+            return i + 1
+    return 0
@@ -0,0 +1,146 @@
+import asyncio
+import contextvars
+import statistics
+import time
+import uuid
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable
+
+from langgraph_react_agent.validation import RequestValidationError
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class BatchRunner:
+    """
+    Runs the conversations of a batch request concurrently on a bounded thread pool.
+
+    Every conversation is handled as a separate request in its own conversation thread: conversations
+    without a `thread_id` get a new one (reported with their result), a `thread_id` repeated within the
+    batch is rejected, so no two conversations of a batch write to the same thread. A failing conversation
+    is reported with its error and does not affect the other ones.
+
+    The pool is shared by all the batch requests, so at most `max_workers` conversations are run at the same
+    time by the service, whatever the number and the size of the batches.
+
+    :param max_workers: Maximum number of conversations running at the same time
+    :type max_workers: int
+    """
+
+    def __init__(self, max_workers: int = 4) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be a positive integer.")
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch")
+        # One semaphore per event loop bounds the conversations run by the asynchronous handlers
+        self._semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def isolate(conversations: list[dict]) -> list[tuple[dict, bool, Exception | None]]:
+        """
+        Conversations with their thread ids, whether the thread id was generated and the error rejecting
+        the conversation (if any).
+        """
+        batch_id = uuid.uuid4().hex[:12]
+        seen = set()
+        items = []
+        for i, conversation in enumerate(conversations):
+            error = None
+            if not isinstance(conversation, dict):
+                items.append((conversation, False, RequestValidationError(f"$.conversations[{i}]", "expected object")))
+                continue
+            if "conversations" in conversation or "metrics" in conversation:
+                error = RequestValidationError(f"$.conversations[{i}]", "batches cannot be nested")
+            elif (thread_id := conversation.get("thread_id")) in seen:
+                error = RequestValidationError(
+                    f"$.conversations[{i}].thread_id", f"thread {thread_id!r} is used by another conversation"
+                )
+            generated = not conversation.get("thread_id")
+            conversation = conversation | {"thread_id": conversation.get("thread_id") or f"batch-{batch_id}-{i}"}
+            seen.add(conversation["thread_id"])
+            items.append((conversation, generated, error))
+        return items
+
+    @staticmethod
+    def _result(index: int, conversation, start: float, body: dict | None, error: Exception | None) -> dict:
+        result = {"index": index}
+        if isinstance(conversation, dict):
+            result["thread_id"] = conversation["thread_id"]
+        if error is None:
+            result["choices"] = body["choices"]
+            if "usage" in body:
+                result["usage"] = body["usage"]
+        else:
+            result["error"] = {"type": type(error).__name__, "message": str(error)}
+        result["duration"] = time.perf_counter() - start
+        return result
+
+    def _run_one(self, index: int, item: tuple, handle: Callable[[int, dict, bool], dict]) -> dict:
+        conversation, generated, error = item
+        start = time.perf_counter()
+        body = None
+        if error is None:
+            try:
+                body = handle(index, conversation, generated)
+            except Exception as e:
+                error = e
+        return self._result(index, conversation, start, body, error)
+
+    def run(self, conversations: list[dict], handle: Callable[[int, dict, bool], dict]) -> dict:
+        """
+        Run `handle(index, conversation, generated_thread_id)` for every conversation, returning the response body
+        of its request, and return the body of the batch response.
+        """
+        start = time.perf_counter()
+        futures = [
+            # Run in a copy of the current context, so the callbacks (tracing) are propagated to the workers
+            self._executor.submit(contextvars.copy_context().run, self._run_one, i, item, handle)
+            for i, item in enumerate(self.isolate(conversations))
+        ]
+        return self.summarise([future.result() for future in futures], time.perf_counter() - start)
+
+    async def arun(self, conversations: list[dict], handle: Callable[[int, dict, bool], Awaitable[dict]]) -> dict:
+        """Asynchronous counterpart of `run`, the conversations are run as tasks of the event loop"""
+        loop = asyncio.get_running_loop()
+        if (semaphore := self._semaphores.get(loop)) is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_workers)
+
+        async def run_one(index: int, item: tuple) -> dict:
+            conversation, generated, error = item
+            async with semaphore:
+                start = time.perf_counter()
+                body = None
+                if error is None:
+                    try:
+                        body = await handle(index, conversation, generated)
+                    except Exception as e:
+                        error = e
+                return self._result(index, conversation, start, body, error)
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(run_one(i, item) for i, item in enumerate(self.isolate(conversations))))
+        return self.summarise(list(results), time.perf_counter() - start)
+
+    def summarise(self, results: list[dict], duration: float) -> dict:
+        """Body of the batch response: the results of the conversations and the aggregate timing of the batch"""
+        durations = sorted(result["duration"] for result in results)
+        failed = sum("error" in result for result in results)
+        timing = {
+            "conversations": len(results),
+            "succeeded": len(results) - failed,
+            "failed": failed,
+            "workers": self.max_workers,
+            "duration": duration,
+        }
+        if durations:
+            timing["conversation_duration"] = {
+                "sum": sum(durations),
+                "mean": statistics.fmean(durations),
+                "p50": _percentile(durations, 0.5),
+                "p95": _percentile(durations, 0.95),
+                "max": durations[-1],
+            }
+        return {"choices": [], "conversations": results, "batch": timing}
@@ -0,0 +1,689 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+
+@dataclass
+class _ThreadUsage:
+    last_access: float
+    bytes: int = 0
+    # (checkpoint_ns, checkpoint_id) -> channel versions referenced by the checkpoint
+    versions: dict[tuple[str, str], ChannelVersions] = field(default_factory=dict)
+    # keys of the thread's entries in `MemorySaver.blobs` and `MemorySaver.writes`
+    blob_keys: set[tuple] = field(default_factory=set)
+    write_keys: set[tuple] = field(default_factory=set)
+
+
+class BoundedMemorySaver(MemorySaver):
+    """
+    In-memory checkpointer with a bounded footprint.
+
+    Only the latest `max_checkpoints_per_thread` checkpoints of every thread are kept. Threads are
+    evicted in least-recently-used order when there are more than `max_threads` of them or when
+    the total size of the stored (serialized) checkpoints exceeds `max_bytes`. Threads idle for
+    longer than `ttl` seconds are evicted as well.
+
+    The size of every thread is updated with the entries added and pruned by each write, without
+    rescanning the thread. Writes for a thread evicted while its request was still running are
+    dropped and counted in `dropped_writes`.
+
+    :param max_threads: Maximum number of conversation threads kept in memory
+    :type max_threads: int
+
+    :param max_checkpoints_per_thread: Number of latest checkpoints kept for each thread
+    :type max_checkpoints_per_thread: int
+
+    :param max_bytes: Upper bound on the total size of stored checkpoints, unbounded if None
+    :type max_bytes: int | None
+
+    :param ttl: Time (in seconds) after which an idle thread is evicted, never if None
+    :type ttl: float | None
+    """
+
+    def __init__(
+        self,
+        *,
+        max_threads: int = 1000,
+        max_checkpoints_per_thread: int = 10,
+        max_bytes: int | None = None,
+        ttl: float | None = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        if max_threads < 1 or max_checkpoints_per_thread < 1:
+            raise ValueError(
+                "max_threads and max_checkpoints_per_thread must be positive integers."
+            )
+        self.max_threads = max_threads
+        self.max_checkpoints_per_thread = max_checkpoints_per_thread
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.evicted_threads = 0
+        self.dropped_writes = 0
+        self._threads: OrderedDict[str, _ThreadUsage] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            # Do not let the underlying defaultdicts create entries for unknown threads
+            if thread_id not in self._threads:
+                return None
+            self._touch(thread_id)
+            return super().get_tuple(config)
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        with self._lock:
+            if config is not None:
+                if (thread_id := config["configurable"]["thread_id"]) not in self._threads:
+                    return
+                self._touch(thread_id)
+            checkpoints = list(
+                super().list(config, filter=filter, before=before, limit=limit)
+            )
+        yield from checkpoints
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        blob_keys = [(thread_id, checkpoint_ns, k, v) for k, v in new_versions.items()]
+        with self._lock:
+            stored_bytes = self._checkpoint_bytes(thread_id, checkpoint_ns, checkpoint["id"])
+            stored_bytes += sum(self._blob_bytes(k) for k in blob_keys)
+            next_config = super().put(config, checkpoint, metadata, new_versions)
+
+            usage = self._threads.setdefault(thread_id, _ThreadUsage(time.monotonic()))
+            usage.blob_keys.update(blob_keys)
+            usage.versions[(checkpoint_ns, checkpoint["id"])] = dict(
+                checkpoint["channel_versions"]
+            )
+            # Entries stored again under the same keys replace the previous ones
+            usage.bytes += self._checkpoint_bytes(thread_id, checkpoint_ns, checkpoint["id"])
+            usage.bytes += sum(self._blob_bytes(k) for k in blob_keys) - stored_bytes
+            self._prune(thread_id, checkpoint_ns)
+            self._touch(thread_id)
+            self._evict(keep=thread_id)
+        return next_config
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        key = (
+            thread_id,
+            config["configurable"].get("checkpoint_ns", ""),
+            config["configurable"]["checkpoint_id"],
+        )
+        with self._lock:
+            if (usage := self._threads.get(thread_id)) is None:
+                # The thread has been evicted in the meantime
+                self.dropped_writes += len(writes)
+                return
+            stored_bytes = self._writes_bytes(key)
+            super().put_writes(config, writes, task_id, task_path)
+            usage.write_keys.add(key)
+            usage.bytes += self._writes_bytes(key) - stored_bytes
+            self._touch(thread_id)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            if (usage := self._threads.pop(thread_id, None)) is None:
+                return
+            self.storage.pop(thread_id, None)
+            for key in usage.write_keys:
+                self.writes.pop(key, None)
+            for checkpoint_ns, checkpoint_id in usage.versions:
+                self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+            for key in usage.blob_keys:
+                self.blobs.pop(key, None)
+
+    def footprint(self) -> dict:
+        """Return the number of stored threads and checkpoints and their serialized size in bytes."""
+        with self._lock:
+            return {
+                "threads": len(self._threads),
+                "checkpoints": sum(len(u.versions) for u in self._threads.values()),
+                "bytes": sum(u.bytes for u in self._threads.values()),
+                "evicted_threads": self.evicted_threads,
+                "dropped_writes": self.dropped_writes,
+            }
+
+    def _touch(self, thread_id: str) -> None:
+        self._threads[thread_id].last_access = time.monotonic()
+        self._threads.move_to_end(thread_id)
+
+    def _prune(self, thread_id: str, checkpoint_ns: str) -> None:
+        """Drop the oldest checkpoints of the thread together with their writes and unreferenced blobs."""
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        if len(checkpoints) <= self.max_checkpoints_per_thread:
+            return
+
+        usage = self._threads[thread_id]
+        # Checkpoint ids are monotonically increasing
+        for checkpoint_id in sorted(checkpoints)[: -self.max_checkpoints_per_thread]:
+            usage.bytes -= self._checkpoint_bytes(thread_id, checkpoint_ns, checkpoint_id)
+            usage.bytes -= self._writes_bytes((thread_id, checkpoint_ns, checkpoint_id))
+            del checkpoints[checkpoint_id]
+            self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+            usage.write_keys.discard((thread_id, checkpoint_ns, checkpoint_id))
+            usage.versions.pop((checkpoint_ns, checkpoint_id), None)
+
+        referenced = {
+            (channel, version)
+            for (ns, _), versions in usage.versions.items()
+            if ns == checkpoint_ns
+            for channel, version in versions.items()
+        }
+        for key in [
+            k for k in usage.blob_keys if k[1] == checkpoint_ns and (k[2], k[3]) not in referenced
+        ]:
+            usage.bytes -= self._blob_bytes(key)
+            self.blobs.pop(key, None)
+            usage.blob_keys.discard(key)
+
+    def _checkpoint_bytes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> int:
+        # Look the entry up without letting the underlying defaultdicts create it
+        entry = self.storage.get(thread_id, {}).get(checkpoint_ns, {}).get(checkpoint_id)
+        if entry is None:
+            return 0
+        checkpoint, metadata, _ = entry
+        return len(checkpoint[1]) + len(metadata[1])
+
+    def _blob_bytes(self, key: tuple) -> int:
+        return len(self.blobs[key][1]) if key in self.blobs else 0
+
+    def _writes_bytes(self, key: tuple) -> int:
+        return sum(len(write[2][1]) for write in self.writes.get(key, {}).values())
+
+    def _evict(self, keep: str) -> None:
+        """Evict expired and least recently used threads, except for `keep`."""
+
+        total_bytes = sum(u.bytes for u in self._threads.values())
+        now = time.monotonic()
+        for thread_id, usage in list(self._threads.items()):
+            if thread_id == keep:
+                continue
+            expired = self.ttl is not None and now - usage.last_access > self.ttl
+            over_limit = len(self._threads) > self.max_threads or (
+                self.max_bytes is not None and total_bytes > self.max_bytes
+            )
+            if not expired and not over_limit:
+                # Threads are ordered from the least recently used one
+                break
+            total_bytes -= usage.bytes
+            self.delete_thread(thread_id)
+            self.evicted_threads += 1
+
+
+@dataclass
+class _ChannelHead:
+    """Latest stored version of a list-valued channel, used to store the next version as a delta."""
+
+    version: str
+    value: list
+    depth: int  # number of deltas since the last full snapshot
+
+
+class SqliteCheckpointer(BaseCheckpointSaver[int]):
+    """
+    Durable checkpointer backed by a local SQLite database.
+
+    The database runs in WAL mode and commits once per graph step: the writes of a step's tasks are buffered
+    per thread and stored in the transaction of the thread's next checkpoint (`put`), special writes
+    (errors, interrupts) are committed right away. The connection is shared by all the requests, so every
+    transaction only carries the rows of its own thread and a request never commits or rolls back the writes
+    of another one. The metadata is stored as JSON, so that `list` filters it, like the
+    checkpoint ids and the limit, in the query. List-valued channels (like `messages`)
+    which only grew since their previous version are stored as a delta: the appended items and a
+    reference to the base version. A full snapshot is stored every `snapshot_every` versions to bound
+    the cost of reconstructing a value.
+
+    :param path: Path to the SQLite database file, ":memory:" for a transient database
+    :type path: str
+
+    :param snapshot_every: Maximum number of consecutive deltas stored for a channel
+    :type snapshot_every: int
+
+    :param max_cached_heads: Number of channels for which the latest value is kept in memory to compute deltas
+    :type max_cached_heads: int
+
+    :param max_buffered_writes: Number of buffered writes above which all of them are committed at once
+    :type max_buffered_writes: int
+    """
+
+    def __init__(
+        self,
+        path: str = "checkpoints.sqlite",
+        *,
+        snapshot_every: int = 50,
+        max_cached_heads: int = 1024,
+        max_buffered_writes: int = 4096,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        self.path = path
+        self.snapshot_every = snapshot_every
+        self.max_cached_heads = max_cached_heads
+        self.max_buffered_writes = max_buffered_writes
+        self._heads: OrderedDict[tuple[str, str, str], _ChannelHead] = OrderedDict()
+        # thread_id -> (checkpoint_ns, checkpoint_id, task_id, idx) -> (replace, row) of the writes not committed yet
+        self._pending_writes: dict[str, dict[tuple, tuple[bool, tuple]]] = {}
+        self._metadata_serde = JsonPlusSerializer()
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                parent_checkpoint_id TEXT,
+                type TEXT,
+                checkpoint BLOB,
+                metadata_type TEXT,
+                metadata BLOB,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+            );
+            CREATE TABLE IF NOT EXISTS blobs (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                channel TEXT NOT NULL,
+                version TEXT NOT NULL,
+                type TEXT NOT NULL,
+                blob BLOB,
+                base_version TEXT,
+                PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+            );
+            CREATE TABLE IF NOT EXISTS writes (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                channel TEXT NOT NULL,
+                type TEXT,
+                value BLOB,
+                task_path TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            );
+            """
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            with self._transaction():
+                self._flush_writes(list(self._pending_writes))
+            self.conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run the statements in a transaction of their own, committed on exit and rolled back on errors."""
+        with self._lock:
+            self.conn.execute("BEGIN")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                # The cached heads may refer to versions which have not been stored
+                self._heads.clear()
+                raise
+            self.conn.execute("COMMIT")
+
+    def _flush_writes(self, thread_ids: list[str]) -> None:
+        """Store the buffered writes of the threads, in the current transaction."""
+        for thread_id in thread_ids:
+            for replace, row in self._pending_writes.get(thread_id, {}).values():
+                verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+                self.conn.execute(f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        query = (
+            "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+            "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        params: tuple = (thread_id, checkpoint_ns)
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            params += (checkpoint_id,)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+
+        with self._lock:
+            row = self.conn.execute(query, params).fetchone()
+            if row is None:
+                return None
+            return self._to_tuple(thread_id, checkpoint_ns, *row)
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+            "metadata_type, metadata FROM checkpoints"
+        )
+        clauses, params = [], []
+        if config is not None:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before is not None and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        for key, value in (filter or {}).items():
+            # Objects and arrays are extracted as minified JSON, scalars as SQL values
+            clauses.append("json_extract(CAST(metadata AS TEXT), ?) IS ?")
+            params.append(f'$."{key}"')
+            params.append(json.dumps(value, separators=(",", ":")) if isinstance(value, (dict, list)) else value)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self.conn.execute(query, params).fetchall()
+
+        for thread_id, checkpoint_ns, *row in rows:
+            with self._lock:
+                yield self._to_tuple(thread_id, checkpoint_ns, *row)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        c = checkpoint.copy()
+        values: dict[str, Any] = c.pop("channel_values")  # type: ignore[misc]
+
+        with self._lock:
+            with self._transaction() as conn:
+                # The writes of the step which produced the checkpoint are committed with it
+                self._flush_writes([thread_id])
+                for channel, version in new_versions.items():
+                    self._put_blob(thread_id, checkpoint_ns, channel, str(version), values)
+                conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        thread_id,
+                        checkpoint_ns,
+                        checkpoint["id"],
+                        config["configurable"].get("checkpoint_id"),
+                        *self.serde.dumps_typed(c),
+                        "json",
+                        self._metadata_serde.dumps(get_checkpoint_metadata(config, metadata)),
+                    ),
+                )
+            self._pending_writes.pop(thread_id, None)
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # Special writes (errors, interrupts) replace the previous ones, regular writes are idempotent
+        replace = all(c in WRITES_IDX_MAP for c, _ in writes)
+        with self._lock:
+            pending = self._pending_writes.setdefault(thread_id, {})
+            for idx, (channel, value) in enumerate(writes):
+                idx = WRITES_IDX_MAP.get(channel, idx)
+                key = (checkpoint_ns, checkpoint_id, task_id, idx)
+                if replace or key not in pending:
+                    row = (
+                        thread_id,
+                        checkpoint_ns,
+                        checkpoint_id,
+                        task_id,
+                        idx,
+                        channel,
+                        *self.serde.dumps_typed(value),
+                        task_path,
+                    )
+                    pending[key] = (replace, row)
+            if replace or sum(map(len, self._pending_writes.values())) > self.max_buffered_writes:
+                # The special writes may end the run, no checkpoint follows them
+                thread_ids = [thread_id] if replace else list(self._pending_writes)
+                with self._transaction():
+                    self._flush_writes(thread_ids)
+                for flushed in thread_ids:
+                    del self._pending_writes[flushed]
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._transaction() as conn:
+            for table in ("checkpoints", "blobs", "writes"):
+                conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            for key in [k for k in self._heads if k[0] == thread_id]:
+                del self._heads[key]
+            self._pending_writes.pop(thread_id, None)
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        checkpoints = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint in checkpoints:
+            yield checkpoint
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def _put_blob(
+        self, thread_id: str, checkpoint_ns: str, channel: str, version: str, values: dict
+    ) -> None:
+        key = (thread_id, checkpoint_ns, channel)
+        if channel not in values:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, 'empty', NULL, NULL)",
+                (thread_id, checkpoint_ns, channel, version),
+            )
+            return
+
+        value = values[channel]
+        head = self._heads.pop(key, None)
+        if (
+            isinstance(value, list)
+            and head is not None
+            and head.depth < self.snapshot_every
+            and len(value) >= len(head.value)
+            and all(a is b or a == b for a, b in zip(head.value, value))
+        ):
+            # The list only grew since its previous version, store the appended items only
+            blob_type, blob = self.serde.dumps_typed(value[len(head.value):])
+            base_version, depth = head.version, head.depth + 1
+        else:
+            blob_type, blob = self.serde.dumps_typed(value)
+            base_version, depth = None, 0
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (thread_id, checkpoint_ns, channel, version, blob_type, blob, base_version),
+        )
+        if isinstance(value, list):
+            self._heads[key] = _ChannelHead(version, list(value), depth)
+            while len(self._heads) > self.max_cached_heads:
+                self._heads.popitem(last=False)
+
+    def _load_blob(
+        self, thread_id: str, checkpoint_ns: str, channel: str, version: str
+    ) -> tuple[bool, Any]:
+        """Reconstruct the channel's value from the chain of deltas ending with a full snapshot."""
+        chain = self.conn.execute(
+            """
+            WITH RECURSIVE chain(type, blob, base_version, depth) AS (
+                SELECT type, blob, base_version, 0 FROM blobs
+                WHERE thread_id = ?1 AND checkpoint_ns = ?2 AND channel = ?3 AND version = ?4
+                UNION ALL
+                SELECT b.type, b.blob, b.base_version, c.depth + 1 FROM blobs b JOIN chain c
+                ON b.thread_id = ?1 AND b.checkpoint_ns = ?2 AND b.channel = ?3 AND b.version = c.base_version
+            )
+            SELECT type, blob FROM chain ORDER BY depth
+            """,
+            (thread_id, checkpoint_ns, channel, version),
+        ).fetchall()
+        if not chain or chain[0][0] == "empty":
+            return False, None
+
+        parts = [self.serde.loads_typed(part) for part in reversed(chain)]
+        if len(parts) == 1:
+            value = parts[0]
+        else:
+            value = [item for part in parts for item in part]
+
+        key = (thread_id, checkpoint_ns, channel)
+        if isinstance(value, list) and key not in self._heads:
+            # Let the next version of the channel be stored as a delta, e.g. after a restart
+            self._heads[key] = _ChannelHead(version, list(value), len(parts) - 1)
+            while len(self._heads) > self.max_cached_heads:
+                self._heads.popitem(last=False)
+        return True, value
+
+    def _to_tuple(
+        self,
+        thread_id: str,
+        checkpoint_ns: str,
+        checkpoint_id: str,
+        parent_checkpoint_id: str | None,
+        checkpoint_type: str,
+        checkpoint_blob: bytes,
+        metadata_type: str,
+        metadata_blob: bytes,
+    ) -> CheckpointTuple:
+        checkpoint: Checkpoint = self.serde.loads_typed((checkpoint_type, checkpoint_blob))
+        channel_values = {}
+        for channel, version in checkpoint["channel_versions"].items():
+            found, value = self._load_blob(thread_id, checkpoint_ns, channel, str(version))
+            if found:
+                channel_values[channel] = value
+        writes = {
+            (task_id, idx): (channel, value_type, value)
+            for task_id, idx, channel, value_type, value in self.conn.execute(
+                "SELECT task_id, idx, channel, type, value FROM writes "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            )
+        }
+        for (ns, cid, task_id, idx), (replace, row) in self._pending_writes.get(thread_id, {}).items():
+            if ns == checkpoint_ns and cid == checkpoint_id and (replace or (task_id, idx) not in writes):
+                writes[task_id, idx] = row[5:8]
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={**checkpoint, "channel_values": channel_values},
+            metadata=self._metadata_serde.loads(metadata_blob),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((value_type, value)))
+                for (task_id, _), (channel, value_type, value) in sorted(writes.items())
+            ],
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+        )
@@ -0,0 +1,126 @@
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+from langchain_core.messages import BaseMessage, SystemMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+
+def split_turns(messages: list[BaseMessage]) -> list[list[BaseMessage]]:
+    """Split the conversation into turns, each starting with a user message"""
+    turns: list[list[BaseMessage]] = []
+    for message in messages:
+        if message.type == "human" or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def digest_tool_message(message: ToolMessage, max_chars: int) -> ToolMessage:
+    """Copy of the tool message with its content cut to `max_chars` characters, if that makes it shorter"""
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    digest = (
+        f"{content[:max_chars].rstrip()} ... [{len(content) - max_chars} characters of the"
+        f" `{message.name}` output from an earlier turn omitted]"
+    )
+    if len(digest) >= len(content):
+        return message
+    return message.model_copy(update={"content": digest})
+
+
+class HistoryCompactor:
+    """
+    Compaction stage run on the conversation history before every call of the chat model.
+
+    The last `keep_turns` turns (a user message and everything the agent generated in reply) are
+    sent unchanged. In the older turns, tool outputs longer than `digest_chars` characters are cut
+    to a short digest and, while the prompt exceeds `token_budget` tokens, the oldest turns are
+    dropped. The checkpointed history is never modified, only the prompt sent to the model.
+
+    The prompt-token counts before and after compaction of every model call are kept per request,
+    under the `request_id` of the graph's configurable, until collected with `pop_reports`. Concurrent
+    requests of a thread never collect each other's reports.
+
+    :param token_budget: Maximum number of prompt tokens, `None` only digests the old tool outputs
+    :type token_budget: int | None
+
+    :param keep_turns: Number of latest turns sent unchanged, even if they exceed the budget
+    :type keep_turns: int
+
+    :param digest_chars: Number of characters kept from the old tool outputs
+    :type digest_chars: int
+
+    :param token_counter: Function counting the tokens of a list of messages
+    :type token_counter: Callable[[list[BaseMessage]], int]
+
+    :param max_requests: Maximum number of requests whose reports are kept
+    :type max_requests: int
+    """
+
+    def __init__(
+        self,
+        token_budget: int | None = None,
+        keep_turns: int = 2,
+        digest_chars: int = 300,
+        token_counter: Callable[[list[BaseMessage]], int] = count_tokens_approximately,
+        max_requests: int = 1000,
+    ) -> None:
+        if keep_turns < 1:
+            raise ValueError("keep_turns must be a positive integer.")
+        self.token_budget = token_budget
+        self.keep_turns = keep_turns
+        self.digest_chars = digest_chars
+        self.token_counter = token_counter
+        self.max_requests = max_requests
+        self._reports: OrderedDict[str, list[dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compact(self, system_message: SystemMessage, messages: list[BaseMessage]) -> tuple[list[BaseMessage], dict]:
+        """Return the compacted prompt and its token counts before and after compaction"""
+        before = self.token_counter([system_message, *messages])
+
+        turns = split_turns(messages)
+        old_turns, recent_turns = turns[: -self.keep_turns], turns[-self.keep_turns :]
+        old_turns = [
+            [
+                digest_tool_message(message, self.digest_chars) if isinstance(message, ToolMessage) else message
+                for message in turn
+            ]
+            for turn in old_turns
+        ]
+
+        recent = [message for turn in recent_turns for message in turn]
+        after = self.token_counter([system_message, *(m for turn in old_turns for m in turn), *recent])
+        if self.token_budget is not None:
+            # Whole turns are dropped, so that every tool message keeps the AI message requesting it
+            while old_turns and after > self.token_budget:
+                after -= self.token_counter(old_turns.pop(0))
+
+        prompt = [system_message, *(m for turn in old_turns for m in turn), *recent]
+        return prompt, {"before": before, "after": self.token_counter(prompt)}
+
+    def state_modifier(self, system_prompt: str | SystemMessage) -> Callable:
+        """`state_modifier` of `create_react_agent` prepending the system prompt to the compacted history"""
+        system_message = (
+            system_prompt if isinstance(system_prompt, SystemMessage) else SystemMessage(content=system_prompt)
+        )
+
+        def modify_state(state, config) -> list[BaseMessage]:
+            prompt, report = self.compact(system_message, state["messages"])
+            self._record(config.get("configurable", {}).get("request_id"), report)
+            return prompt
+
+        return modify_state
+
+    def _record(self, request_id: str | None, report: dict) -> None:
+        with self._lock:
+            self._reports.setdefault(request_id, []).append(report)
+            self._reports.move_to_end(request_id)
+            # Reports of requests which failed before collecting them
+            while len(self._reports) > self.max_requests:
+                self._reports.popitem(last=False)
+
+    def pop_reports(self, request_id: str | None) -> list[dict]:
+        """Token counts of the model calls made for the request"""
+        with self._lock:
+            return self._reports.pop(request_id, [])
@@ -0,0 +1,111 @@
+import asyncio
+import contextvars
+from collections.abc import AsyncIterator, Iterator
+from contextlib import contextmanager
+
+import httpx
+from ibm_watsonx_ai import APIClient
+from ibm_watsonx_ai.utils.utils import HttpClientConfig
+
+# Token of the request being served in the current context
+REQUEST_TOKEN: contextvars.ContextVar[str | None] = contextvars.ContextVar("request_token", default=None)
+
+
+@contextmanager
+def request_token(token: str | None) -> Iterator[None]:
+    """Authenticate the calls made by the scoped clients within the block with the given token."""
+    reset_token = REQUEST_TOKEN.set(token)
+    try:
+        yield
+    finally:
+        REQUEST_TOKEN.reset(reset_token)
+
+
+def iterate_with_token(iterator: Iterator, token: str | None) -> Iterator:
+    """
+    Advance the iterator in a private copy of the current context with the given request token.
+
+    Unlike `request_token`, the token is not left in the caller's context between the items, so
+    a thread consuming several streams at once never mixes their credentials.
+    """
+    context = contextvars.copy_context()
+    context.run(REQUEST_TOKEN.set, token)
+    while True:
+        try:
+            item = context.run(next, iterator)
+        except StopIteration:
+            return
+        yield item
+
+
+async def aiterate_with_token(iterator: AsyncIterator, token: str | None) -> AsyncIterator:
+    """
+    Asynchronous counterpart of `iterate_with_token`, every item is awaited in a task running in the private context.
+
+    The iterator is closed in that context too, when the iteration ends or is abandoned.
+    """
+    context = contextvars.copy_context()
+    context.run(REQUEST_TOKEN.set, token)
+
+    # The awaitables of an async generator are not coroutines, the tasks await them
+    async def advance():
+        return await anext(iterator)
+
+    async def close():
+        await iterator.aclose()
+
+    try:
+        while True:
+            try:
+                item = await asyncio.create_task(advance(), context=context)
+            except StopAsyncIteration:
+                return
+            yield item
+    finally:
+        if hasattr(iterator, "aclose"):
+            await asyncio.create_task(close(), context=context)
+
+
+class RequestScopedAuth:
+    """
+    Authentication method of an `APIClient` returning the token of the request being served.
+
+    Outside a request (no token set with `request_token`) the wrapped authentication method is used.
+
+    :param auth_method: Authentication method of the client
+    :type auth_method: ibm_watsonx_ai.utils.auth.base_auth.BaseAuth
+    """
+
+    def __init__(self, auth_method) -> None:
+        self.auth_method = auth_method
+
+    def get_token(self) -> str:
+        return REQUEST_TOKEN.get() or self.auth_method.get_token()
+
+    async def aget_token(self) -> str:
+        return REQUEST_TOKEN.get() or await self.auth_method.aget_token()
+
+    def set_token(self, token: str) -> None:
+        self.auth_method.set_token(token)
+
+    def __getattr__(self, name: str):
+        return getattr(self.auth_method, name)
+
+
+def scope_credentials(client: APIClient) -> APIClient:
+    """
+    Make the client authenticate every call with the token of the request being served.
+
+    The client, together with its pooled HTTP sessions, can then be shared by concurrent requests
+    instead of being re-authenticated with `set_token` by each of them.
+    """
+    if not isinstance(client._auth_method, RequestScopedAuth):
+        client._auth_method = RequestScopedAuth(client._auth_method)
+    return client
+
+
+def http_client_config(pool_size: int) -> HttpClientConfig:
+    """Configuration of a pooled HTTP session keeping up to `pool_size` connections alive."""
+    return HttpClientConfig(
+        limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+    )
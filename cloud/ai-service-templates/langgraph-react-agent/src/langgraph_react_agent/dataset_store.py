@@ -0,0 +1,283 @@
+import hashlib
+import json
+import re
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+
+from langgraph_react_agent.datasets import DATASETS, array_digest
+
+# Name of a stored dataset, it does not start with a `.`: `.` and `..` are not datasets, hidden directories are staging
+_NAME = r"[\w-][\w.-]*"
+# Reference to a window of a stored dataset: `<name>/<part>[<start>:<stop>]`, where the part is `exog`, `endog`
+# or comma-separated column names, e.g. `cancer/exog[0:25]` or `statecrime/poverty,single[10:60]`
+_REFERENCE = re.compile(rf"^(?P<name>{_NAME})/(?P<part>[\w.,-]+)(?:\[(?P<start>-?\d*):(?P<stop>-?\d*)\])?$")
+_PARTS = ("exog", "endog")
+
+
+class StoredDataset:
+    """
+    Dataset of a `DatasetStore`, its files are memory-mapped when first accessed.
+
+    The explanatory variables are stored as one column-major (Fortran order) matrix, so every column is contiguous
+    on disk: a window of rows, or of rows and a range of columns, is a view of the mapped file and only the pages
+    it spans are read. Selecting scattered columns copies the window only.
+    """
+
+    def __init__(self, path: Path, meta: dict) -> None:
+        self.path = path
+        self.name: str = meta["name"]
+        self.exog_names: list[str] = meta["exog_names"]
+        self.endog_name: str = meta["endog_name"]
+        self.nobs: int = meta["nobs"]
+        self.digest: str = meta["digest"]
+        self._arrays: dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def _array(self, part: str) -> np.ndarray:
+        with self._lock:
+            if part not in self._arrays:
+                self._arrays[part] = np.load(self.path / f"{part}.npy", mmap_mode="r")
+            return self._arrays[part]
+
+    def _column_index(self, column: str | int) -> int:
+        if isinstance(column, int):
+            return column
+        try:
+            return self.exog_names.index(column)
+        except ValueError:
+            raise ValueError(
+                f"Unknown column `{column}` of dataset `{self.name}`, its columns are: "
+                f"{', '.join(self.exog_names + [self.endog_name])}."
+            ) from None
+
+    def window(
+        self, part: str = "exog", rows: slice = slice(None), columns: Sequence[str | int] | None = None
+    ) -> np.ndarray:
+        """
+        Read-only window of the dataset, without loading the rest of it.
+
+        :param part: `exog` (a matrix with one row per observation) or `endog` (a vector)
+        :type part: str
+
+        :param rows: Observations of the window
+        :type rows: slice
+
+        :param columns: Names or indices of the explanatory variables of the window, all of them by default
+        :type columns: Sequence[str | int] | None
+        """
+        if part not in _PARTS:
+            raise ValueError(f"Unknown part `{part}` of dataset `{self.name}`, expected one of {list(_PARTS)}.")
+        arr = self._array(part)[rows]
+        if part == "endog" or columns is None:
+            return arr
+
+        indices = [self._column_index(column) for column in columns]
+        if indices and indices == list(range(indices[0], indices[0] + len(indices))):
+            return arr[:, indices[0] : indices[0] + len(indices)]
+        return arr[:, indices]
+
+    def column(self, name: str, rows: slice = slice(None)) -> np.ndarray:
+        """One variable, explanatory or dependent, as a read-only vector"""
+        if name == self.endog_name:
+            return self.window("endog", rows)
+        return self.window("exog", rows)[:, self._column_index(name)]
+
+    def reference(self, part: str = "exog", rows: slice = slice(None)) -> str:
+        """Reference of a window, to be sent instead of its values to an AI service sharing the store"""
+        start, stop, _ = rows.indices(self.nobs)
+        return f"{self.name}/{part}[{start}:{stop}]"
+
+
+class DatasetStore:
+    """
+    Local store of the datasets as memory-mappable columnar `.npy` files.
+
+    Every dataset is converted once, when registered, into a directory `<root>/<name>` holding `exog.npy`,
+    `endog.npy` and `meta.json` (variable names, number of observations and content digest). Afterwards it is
+    opened lazily and read without copying, see `StoredDataset.window`.
+
+    :param root: Directory of the store, created if needed
+    :type root: Path | str
+
+    :param max_open: Maximum number of datasets kept open (mapped), least recently used ones are closed first
+    :type max_open: int
+    """
+
+    def __init__(self, root: Path | str, max_open: int = 32) -> None:
+        self.root = Path(root)
+        self.max_open = max_open
+        self._open: OrderedDict[str, StoredDataset] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, name: str) -> bool:
+        return (self._path(name) / "meta.json").exists()
+
+    def _path(self, name: str) -> Path:
+        """Directory of a dataset, the names of files outside of the store are rejected."""
+        path = (self.root / name).resolve()
+        if not re.fullmatch(_NAME, name) or path.parent != self.root.resolve():
+            raise ValueError(
+                f"Invalid dataset name `{name}`, only letters, digits, `_`, `.` and `-` are allowed"
+                " and it cannot start with `.`."
+            )
+        return path
+
+    def names(self) -> list[str]:
+        if not self.root.exists():
+            return []
+        # Datasets being written are staged in hidden directories
+        return sorted(path.parent.name for path in self.root.glob("*/meta.json") if not path.parent.name.startswith("."))
+
+    def register(
+        self,
+        name: str,
+        exog,
+        endog,
+        exog_names: Sequence[str] | None = None,
+        endog_name: str | None = None,
+        overwrite: bool = False,
+    ) -> StoredDataset:
+        """
+        Convert a dataset into the store's files, unless a dataset with that name is already stored.
+
+        :param exog: Explanatory variables, a vector or a matrix with one row per observation (e.g. a DataFrame)
+        :param endog: Dependent variable, one value per observation (e.g. a Series)
+        :param exog_names: Names of the explanatory variables, taken from `exog` when it is a DataFrame
+        :param endog_name: Name of the dependent variable, taken from `endog` when it is a Series
+        """
+        path = self._path(name)
+        if name in self and not overwrite:
+            return self.open(name)
+
+        exog_names = list(exog_names if exog_names is not None else getattr(exog, "columns", []))
+        endog_name = endog_name or getattr(endog, "name", None) or "endog"
+        exog = np.asarray(exog, dtype=float)
+        exog = np.asfortranarray(exog.reshape(len(exog), -1))
+        endog = np.ascontiguousarray(endog, dtype=float).reshape(-1)
+        if len(exog) != len(endog):
+            raise ValueError(f"`exog` has {len(exog)} observations but `endog` has {len(endog)}.")
+        exog_names = [str(column) for column in exog_names] or [f"x{i}" for i in range(exog.shape[1])]
+
+        meta = {
+            "name": name,
+            "exog_names": exog_names,
+            "endog_name": str(endog_name),
+            "nobs": len(endog),
+            "digest": array_digest(exog, endog),
+        }
+        # Written next to the store and renamed, readers never see a partial dataset
+        self.root.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=f".{name}-", dir=self.root))
+        np.save(staging / "exog.npy", exog)
+        np.save(staging / "endog.npy", endog)
+        (staging / "meta.json").write_text(json.dumps(meta, indent=2))
+
+        with self._lock:
+            self._open.pop(name, None)
+            if path.exists():
+                shutil.rmtree(path)
+            staging.rename(path)
+        return self.open(name)
+
+    def register_statsmodels(self, module, name: str | None = None) -> StoredDataset:
+        """Convert a statsmodels dataset (e.g. `statsmodels.datasets.cancer`), loaded only if not stored yet"""
+        name = name or module.__name__.rsplit(".", 1)[-1]
+        if name in self:
+            return self.open(name)
+        data = module.load_pandas()
+        return self.register(name, data.exog, data.endog)
+
+    def open(self, name: str) -> StoredDataset:
+        path = self._path(name)
+        with self._lock:
+            if name not in self._open:
+                try:
+                    meta = json.loads((path / "meta.json").read_text())
+                except FileNotFoundError:
+                    raise ValueError(
+                        f"Unknown dataset `{name}`, the stored datasets are: {', '.join(self.names()) or 'none'}."
+                    ) from None
+                self._open[name] = StoredDataset(path, meta)
+            self._open.move_to_end(name)
+            while len(self._open) > self.max_open:
+                self._open.popitem(last=False)
+            return self._open[name]
+
+    def resolve(self, reference: str) -> tuple[np.ndarray, str]:
+        """
+        Window given by a reference, e.g. `cancer/exog[0:25]`, and its digest. The digest is derived from
+        the dataset's digest and the window, so registering the window does not read it.
+        """
+        match = _REFERENCE.match(reference.strip().strip("`"))
+        if match is None:
+            raise ValueError(
+                f"Invalid dataset reference: '{reference}', expected `<name>/<exog|endog|columns>[<start>:<stop>]`."
+            )
+        dataset = self.open(match["name"])
+        rows = slice(
+            int(match["start"]) if match["start"] else None,
+            int(match["stop"]) if match["stop"] else None,
+        )
+        part = match["part"]
+        if part in _PARTS:
+            arr = dataset.window(part, rows)
+        elif "," not in part:
+            arr = dataset.column(part, rows)
+        else:
+            arr = dataset.window("exog", rows, part.split(","))
+
+        start, stop, _ = rows.indices(dataset.nobs)
+        digest = hashlib.blake2b(f"{dataset.digest}/{part}[{start}:{stop}]".encode(), digest_size=16).hexdigest()
+        return arr, digest
+
+
+# Store of the datasets the messages may reference, set by `configure`
+STORE: DatasetStore | None = None
+
+
+def configure(root: Path | str | None = None) -> None:
+    """Set the directory of the process-wide dataset store."""
+    global STORE
+
+    if root is not None:
+        STORE = DatasetStore(root)
+
+
+def _resolve(reference: str) -> tuple[np.ndarray, str]:
+    if STORE is None:
+        raise ValueError(
+            f"Dataset reference '{reference}' cannot be resolved, no dataset store is configured (`dataset_store`)."
+        )
+    return STORE.resolve(reference)
+
+
+def resolve_reference(reference: str) -> np.ndarray:
+    """Window of the process-wide store given by a reference"""
+    return _resolve(reference)[0]
+
+
+def data_digest(value: str | list) -> str:
+    """
+    Digest of the data sent with a message, as registered by `register_data`. A reference to a window of the
+    process-wide store is hashed by the window and the dataset's digest, without reading it.
+    """
+    if isinstance(value, str):
+        return _resolve(value)[1]
+    return array_digest(np.asarray(value, dtype=float))
+
+
+def register_data(value: str | list) -> str:
+    """
+    Register the data sent with a message in `DATASETS` and return its handle. The data is either the values or
+    a reference to a window of the process-wide store, which is registered without being copied.
+    """
+    if isinstance(value, str):
+        arr, digest = _resolve(value)
+        return DATASETS.register(arr, digest=digest)
+    return DATASETS.register(value)
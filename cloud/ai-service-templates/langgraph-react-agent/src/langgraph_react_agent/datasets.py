@@ -0,0 +1,131 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+HANDLE_PREFIX = "ds-"
+
+
+def array_digest(*arrays: np.ndarray) -> str:
+    """Hash the shapes, dtypes and raw bytes of the arrays."""
+    digest = hashlib.blake2b(digest_size=16)
+    for arr in arrays:
+        arr = np.ascontiguousarray(arr)
+        digest.update(f"{arr.dtype.str}{arr.shape}".encode())
+        digest.update(arr.data)
+    return digest.hexdigest()
+
+
+class DatasetExpiredError(ValueError):
+    """The dataset behind a handle has been dropped from the registry, its data has to be sent again."""
+
+    def __init__(self, handle: str) -> None:
+        super().__init__(
+            f"Dataset `{handle}` has expired, only the most recently used datasets are kept. "
+            "Ask the user to send its data again with the request."
+        )
+        self.handle = handle
+
+
+class DatasetRegistry:
+    """
+    Server-side store of the data sent with the requests.
+
+    Every array is stored once under a short content-addressed handle, e.g. `ds-3f2a9c1b0d4e`. The
+    handle (together with a compact description of the data) is what the LLM sees and passes to the
+    tools, instead of the values themselves.
+
+    Handles stay in the checkpointed history of the conversations after their arrays are dropped, the
+    handles of the latest dropped arrays are remembered to tell an expired dataset (`DatasetExpiredError`)
+    from a handle the registry never issued, e.g. before a restart of the service.
+
+    :param maxsize: Maximum number of arrays kept, least recently used ones are dropped first
+    :type maxsize: int
+    """
+
+    def __init__(self, maxsize: int = 256) -> None:
+        self.maxsize = maxsize
+        self._arrays: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._expired: OrderedDict[str, None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, values: list | np.ndarray, digest: str | None = None) -> str:
+        """
+        Store the values and return their handle. A `digest` identifying the values (e.g. a memory-mapped
+        window of a stored dataset) saves hashing them.
+        """
+        # Memory-mapped float arrays are kept as views of the mapped file, they are not copied. The registry stores
+        # a read-only view, the caller's array stays writable
+        arr = np.asarray(values, dtype=float)
+        handle = HANDLE_PREFIX + (digest or array_digest(arr))[:12]
+        with self._lock:
+            if handle not in self._arrays:
+                view = arr.view()
+                view.setflags(write=False)
+                self._arrays[handle] = view
+                self._expired.pop(handle, None)
+            self._arrays.move_to_end(handle)
+            while len(self._arrays) > self.maxsize:
+                expired, _ = self._arrays.popitem(last=False)
+                # Handles are short strings, many more of them than of arrays are remembered
+                self._expired[expired] = None
+                while len(self._expired) > 16 * self.maxsize:
+                    self._expired.popitem(last=False)
+        return handle
+
+    def get(self, handle: str) -> np.ndarray:
+        with self._lock:
+            try:
+                arr = self._arrays[handle]
+            except KeyError:
+                if handle in self._expired:
+                    raise DatasetExpiredError(handle) from None
+                raise ValueError(
+                    f"Unknown dataset handle: '{handle}'. The dataset may have expired or the service restarted, "
+                    "the data has to be sent again with the request."
+                ) from None
+            self._arrays.move_to_end(handle)
+            return arr
+
+    def describe(self, handle: str) -> str:
+        """Compact, LLM-readable description of the stored data: its handle, shape and summary statistics."""
+        arr = self.get(handle)
+        if arr.size == 0:
+            return f"dataset `{handle}` (empty)"
+        stats = ", ".join(
+            f"{name} {func(arr, axis=0).round(4).tolist()}"
+            for name, func in (
+                ("mean", np.nanmean),
+                ("std", np.nanstd),
+                ("min", np.nanmin),
+                ("max", np.nanmax),
+            )
+        )
+        return f"dataset `{handle}` (shape {arr.shape}, {stats})"
+
+    def __contains__(self, handle: str) -> bool:
+        return handle in self._arrays
+
+    def __len__(self) -> int:
+        return len(self._arrays)
+
+
+# Process-wide registry shared by the AI service and the tools
+DATASETS = DatasetRegistry()
+
+
+def resolve_array(value: str | list | np.ndarray) -> np.ndarray:
+    """
+    Return the array behind a dataset handle or a reference to a window of the dataset store
+    (e.g. `cancer/exog[0:25]`), or convert the given values to an array.
+    """
+    if isinstance(value, str):
+        value = value.strip().strip("`")
+        if not value.startswith(HANDLE_PREFIX) and "/" in value:
+            # The store builds on this module, it is imported when a reference is first resolved
+            from langgraph_react_agent.dataset_store import resolve_reference
+
+            return resolve_reference(value)
+        return DATASETS.get(value)
+    return np.asarray(value, dtype=float)
@@ -0,0 +1,134 @@
+import numpy as np
+
+# Shapiro-Wilk's p-value approximation is only accurate up to 5000 observations, larger samples use the
+# D'Agostino-Pearson test computed from the sample moments
+SHAPIRO_MAX_NOBS = 5_000
+# The skewness test of D'Agostino-Pearson is undefined for fewer observations, Shapiro-Wilk is used instead
+DAGOSTINO_MIN_NOBS = 8
+# Number of observations processed at once when computing the sample moments
+MOMENTS_CHUNK_SIZE = 65_536
+
+NORMALITY_TESTS = ("auto", "shapiro-wilk", "dagostino-pearson", "jarque-bera")
+
+
+def sample_moments(values: np.ndarray) -> tuple[int, float, float, float]:
+    """
+    Number of observations and the 2nd, 3rd and 4th central moments of the values.
+
+    The powers of the deviations are summed chunk by chunk, so the temporaries stay in the cache and their size does
+    not depend on the number of observations.
+    """
+    values = np.asarray(values, dtype=float).reshape(-1)
+    n = len(values)
+    mean = values.mean()
+    s2 = s3 = s4 = 0.0
+    for start in range(0, n, MOMENTS_CHUNK_SIZE):
+        d = values[start: start + MOMENTS_CHUNK_SIZE] - mean
+        d2 = d * d
+        s2 += d2.sum()
+        s3 += d2 @ d
+        s4 += d2 @ d2
+    return n, s2 / n, s3 / n, s4 / n
+
+
+def jarque_bera_from_moments(n: int, m2: float, m3: float, m4: float) -> tuple[float, float]:
+    """Jarque-Bera statistic and its p-value from the central moments of the sample."""
+    from scipy.stats import chi2
+
+    skew, kurtosis = m3 / m2**1.5, m4 / m2**2
+    jb = n / 6 * (skew**2 + (kurtosis - 3) ** 2 / 4)
+    return float(jb), float(chi2.sf(jb, 2))
+
+
+def dagostino_pearson_from_moments(n: int, m2: float, m3: float, m4: float) -> tuple[float, float]:
+    """
+    D'Agostino-Pearson K^2 statistic and its p-value from the central moments of the sample, the sum of the squared
+    z-scores of its skewness and kurtosis (as `scipy.stats.normaltest`, valid from 20 observations).
+    """
+    from scipy.stats import chi2
+
+    # Skewness test
+    b2 = m3 / m2**1.5
+    y = b2 * np.sqrt((n + 1) * (n + 3) / (6.0 * (n - 2)))
+    beta2 = 3.0 * (n**2 + 27 * n - 70) * (n + 1) * (n + 3) / ((n - 2.0) * (n + 5) * (n + 7) * (n + 9))
+    w2 = -1 + np.sqrt(2 * (beta2 - 1))
+    delta = 1 / np.sqrt(0.5 * np.log(w2))
+    alpha = np.sqrt(2.0 / (w2 - 1))
+    y = 1.0 if y == 0 else y
+    z_skew = delta * np.log(y / alpha + np.sqrt((y / alpha) ** 2 + 1))
+
+    # Kurtosis test
+    b2 = m4 / m2**2
+    expected = 3.0 * (n - 1) / (n + 1)
+    variance = 24.0 * n * (n - 2) * (n - 3) / ((n + 1) * (n + 1.0) * (n + 3) * (n + 5))
+    x = (b2 - expected) / np.sqrt(variance)
+    sqrt_beta1 = (
+        6.0 * (n * n - 5 * n + 2) / ((n + 7) * (n + 9)) * np.sqrt(6.0 * (n + 3) * (n + 5) / (n * (n - 2.0) * (n - 3)))
+    )
+    a = 6.0 + 8.0 / sqrt_beta1 * (2.0 / sqrt_beta1 + np.sqrt(1 + 4.0 / sqrt_beta1**2))
+    denom = 1 + x * np.sqrt(2 / (a - 4.0))
+    term = np.nan if denom == 0 else np.sign(denom) * ((1 - 2.0 / a) / abs(denom)) ** (1 / 3.0)
+    z_kurtosis = (1 - 2 / (9.0 * a) - term) / np.sqrt(2 / (9.0 * a))
+
+    k2 = z_skew**2 + z_kurtosis**2
+    return float(k2), float(chi2.sf(k2, 2))
+
+
+def select_normality_test(nobs: int, method: str = "auto") -> str:
+    """
+    Name of the normality test used for a sample of `nobs` observations. The D'Agostino-Pearson test falls back
+    to Shapiro-Wilk below `DAGOSTINO_MIN_NOBS` observations.
+    """
+    if method not in NORMALITY_TESTS:
+        raise ValueError(f"Unknown normality test `{method}`, expected one of {list(NORMALITY_TESTS)}.")
+    if method == "dagostino-pearson" and nobs < DAGOSTINO_MIN_NOBS:
+        return "shapiro-wilk"
+    if method != "auto":
+        return method
+    return "shapiro-wilk" if nobs <= SHAPIRO_MAX_NOBS else "dagostino-pearson"
+
+
+def normality_test(values: np.ndarray, method: str = "auto") -> tuple[float, float]:
+    """
+    Normality test statistic of the values and its p-value.
+
+    With `auto` the test is chosen by the sample size: Shapiro-Wilk up to `SHAPIRO_MAX_NOBS` observations and
+    the D'Agostino-Pearson test, computed from the sample moments in one pass, above. The test actually used is
+    given by `select_normality_test`.
+    """
+    method = select_normality_test(len(values), method)
+    if method == "shapiro-wilk":
+        from scipy.stats import shapiro
+
+        stat, p_value = shapiro(values)
+        return float(stat), float(p_value)
+    if method == "dagostino-pearson":
+        return dagostino_pearson_from_moments(*sample_moments(values))
+    return jarque_bera_from_moments(*sample_moments(values))
+
+
+def breusch_pagan_from_moments(
+    nobs: int, xtx_inv: np.ndarray, xtu2: np.ndarray, u2_sum: float, u4_sum: float
+) -> tuple[float, float]:
+    """
+    Breusch-Pagan (Koenker's studentized) Lagrange multiplier statistic and its p-value from the sufficient
+    statistics of the auxiliary regression of the squared residuals e^2 on the design matrix X: inv(X'X),
+    X'e^2, sum(e^2) and sum(e^4). The auxiliary regression itself is never fitted.
+    """
+    from scipy.stats import chi2
+
+    gamma = xtx_inv @ xtu2
+    ssr_aux = u4_sum - gamma @ xtu2
+    tss_aux = u4_sum - u2_sum**2 / nobs
+    lm = nobs * (1.0 - ssr_aux / tss_aux)
+    # The design matrix includes the constant term
+    return float(lm), float(chi2.sf(lm, len(xtu2) - 1))
+
+
+def subsample(values: np.ndarray, size: int, seed: int = 0) -> np.ndarray:
+    """Reproducible random subsample of the values, in their original order."""
+    if len(values) <= size:
+        return values
+    indices = np.random.default_rng(seed).choice(len(values), size=size, replace=False)
+    indices.sort()
+    return values[indices]
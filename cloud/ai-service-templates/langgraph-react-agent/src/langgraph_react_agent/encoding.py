@@ -0,0 +1,18 @@
+import json
+from typing import Any, Callable
+
+try:
+    import orjson
+except ImportError:  # the standard library encoder is used instead
+    orjson = None
+
+
+def dumps(obj: Any, sort_keys: bool = False, default: Callable[[Any], Any] | None = None) -> bytes:
+    """
+    Compact JSON encoding of `obj`, with orjson when it is installed and the standard library otherwise.
+    `default` converts the objects that are not JSON serializable.
+    """
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, default=default, option=option)
+    return json.dumps(obj, sort_keys=sort_keys, default=default, separators=(",", ":"), ensure_ascii=False).encode()
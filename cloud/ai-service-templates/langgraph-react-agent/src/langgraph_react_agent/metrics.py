@@ -0,0 +1,374 @@
+import bisect
+import threading
+import time
+from collections.abc import AsyncIterator, Iterator, Sequence
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver, ChannelVersions, Checkpoint, CheckpointMetadata
+
+from langgraph_react_agent.encoding import dumps
+
+# Upper bounds (in seconds) of the histogram buckets
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_NULL_SPAN = nullcontext()
+
+
+class _Histogram:
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, index: int, value: float) -> None:
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    """
+    In-process registry of the request timings, dumped as JSON or in the Prometheus text format.
+
+    Every span name (e.g. `node.agent`, `tool.pearson_correlation` or `checkpoint.put`) gets a histogram
+    of its durations. Histograms of other quantities (e.g. the model's tokens per second) are registered with
+    their own buckets. Gauges are read from the registered functions when the registry is dumped.
+
+    :param buckets: Upper bounds of the histogram buckets in seconds
+    :type buckets: Sequence[float]
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._histograms: dict[str, _Histogram] = {}
+        self._gauges: dict[str, tuple[Callable[[], float], str]] = {}
+        self._values: dict[str, tuple[tuple[float, ...], _Histogram, str]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float) -> None:
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            if (histogram := self._histograms.get(name)) is None:
+                histogram = self._histograms[name] = _Histogram(self.buckets)
+            histogram.observe(index, seconds)
+
+    def register_histogram(self, name: str, buckets: Sequence[float], description: str = "") -> None:
+        """Histogram of the values observed with `observe_value`, kept when it is already registered"""
+        buckets = tuple(sorted(buckets))
+        with self._lock:
+            if name not in self._values:
+                self._values[name] = (buckets, _Histogram(buckets), description)
+
+    def observe_value(self, name: str, value: float) -> None:
+        with self._lock:
+            buckets, histogram, _ = self._values[name]
+            histogram.observe(bisect.bisect_left(buckets, value), value)
+
+    def register_gauge(self, name: str, func: Callable[[], float], description: str = "") -> None:
+        with self._lock:
+            self._gauges[name] = (func, description)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            for name, (buckets, _, description) in self._values.items():
+                self._values[name] = (buckets, _Histogram(buckets), description)
+
+    def snapshot(self) -> dict:
+        """Histograms (with cumulative bucket counts) and current values of the gauges"""
+        with self._lock:
+            spans = {
+                name: _dump(self.buckets, histogram) for name, histogram in sorted(self._histograms.items())
+            }
+            histograms = {
+                name: _dump(buckets, histogram) for name, (buckets, histogram, _) in sorted(self._values.items())
+            }
+            gauges = dict(self._gauges)
+        return {
+            "spans": spans,
+            "histograms": histograms,
+            "gauges": {name: float(func()) for name, (func, _) in sorted(gauges.items())},
+        }
+
+    def to_json(self) -> str:
+        return dumps(self.snapshot()).decode()
+
+    def to_prometheus(self, prefix: str = "ai_service") -> str:
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_span_seconds Time spent in the instrumented parts of the requests.",
+            f"# TYPE {prefix}_span_seconds histogram",
+        ]
+        for name, histogram in snapshot["spans"].items():
+            for le, count in histogram["buckets"].items():
+                lines.append(f'{prefix}_span_seconds_bucket{{span="{name}",le="{le}"}} {count}')
+            lines.append(f'{prefix}_span_seconds_sum{{span="{name}"}} {histogram["sum"]}')
+            lines.append(f'{prefix}_span_seconds_count{{span="{name}"}} {histogram["count"]}')
+        for name, histogram in snapshot["histograms"].items():
+            if description := self._values[name][2]:
+                lines.append(f"# HELP {prefix}_{name} {description}")
+            lines.append(f"# TYPE {prefix}_{name} histogram")
+            for le, count in histogram["buckets"].items():
+                lines.append(f'{prefix}_{name}_bucket{{le="{le}"}} {count}')
+            lines.append(f"{prefix}_{name}_sum {histogram['sum']}")
+            lines.append(f"{prefix}_{name}_count {histogram['count']}")
+        for name, value in snapshot["gauges"].items():
+            if description := self._gauges[name][1]:
+                lines.append(f"# HELP {prefix}_{name} {description}")
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _dump(buckets: Sequence[float], histogram: _Histogram) -> dict:
+    return {
+        "count": histogram.count,
+        "sum": histogram.sum,
+        "buckets": dict(zip([str(b) for b in buckets] + ["+Inf"], _cumulative(histogram.counts))),
+    }
+
+
+def _cumulative(counts: list[int]) -> list[int]:
+    total, cumulative = 0, []
+    for count in counts:
+        total += count
+        cumulative.append(total)
+    return cumulative
+
+
+# Process-wide registry shared by all the requests
+METRICS = MetricsRegistry()
+
+
+class RequestTimings:
+    """
+    Timing breakdown of one request, every recorded span is also observed by the registry.
+
+    Without a registry the timings are disabled: spans are no-ops and nothing is recorded.
+
+    :param registry: Registry observing the spans, `None` disables the timings
+    :type registry: MetricsRegistry | None
+    """
+
+    def __init__(self, registry: MetricsRegistry | None = METRICS) -> None:
+        self.registry = registry
+        self.start = time.perf_counter()
+        self.spans: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.registry is not None
+
+    def record(self, name: str, seconds: float) -> None:
+        if self.registry is None:
+            return
+        with self._lock:
+            self.spans[name] = self.spans.get(name, 0.0) + seconds
+        self.registry.observe(name, seconds)
+
+    def span(self, name: str):
+        """Context manager recording the time spent in the block"""
+        if self.registry is None:
+            return _NULL_SPAN
+        return self._span(name)
+
+    @contextmanager
+    def _span(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def callbacks(self) -> list[BaseCallbackHandler]:
+        """Callback handlers recording the graph's nodes, model calls and tool calls"""
+        return [TimingCallbackHandler(self)] if self.registry is not None else []
+
+    def server_timing(self) -> str:
+        """Value of the `Server-Timing` response header, durations in milliseconds"""
+        with self._lock:
+            spans = dict(self.spans)
+        spans["total"] = time.perf_counter() - self.start
+        return ", ".join(f"{name};dur={seconds * 1e3:.2f}" for name, seconds in spans.items())
+
+
+def iterate_with_timings(iterator: Iterator, timings: RequestTimings) -> Iterator:
+    """Yield the items of the iterator, recording the time from the start of the request to the first one."""
+    first = True
+    for item in iterator:
+        if first:
+            timings.record("time_to_first_chunk", time.perf_counter() - timings.start)
+            first = False
+        yield item
+
+
+async def aiterate_with_timings(iterator: AsyncIterator, timings: RequestTimings) -> AsyncIterator:
+    """Asynchronous counterpart of `iterate_with_timings`"""
+    first = True
+    async for item in iterator:
+        if first:
+            timings.record("time_to_first_chunk", time.perf_counter() - timings.start)
+            first = False
+        yield item
+
+
+class TimingCallbackHandler(BaseCallbackHandler):
+    """Callback handler recording the duration of the graph's nodes, model calls and tool calls"""
+
+    run_inline = True
+
+    def __init__(self, timings: RequestTimings) -> None:
+        self.timings = timings
+        self._runs: dict[UUID, tuple[str, float]] = {}
+
+    def _start(self, run_id: UUID, name: str) -> None:
+        self._runs[run_id] = (name, time.perf_counter())
+
+    def _end(self, run_id: UUID) -> None:
+        if (run := self._runs.pop(run_id, None)) is not None:
+            self.timings.record(run[0], time.perf_counter() - run[1])
+
+    def on_chain_start(
+        self, serialized: dict[str, Any], inputs: Any, *, run_id: UUID, metadata: dict | None = None, **kwargs: Any
+    ) -> None:
+        # The runnable of a graph node is named after the node
+        if (name := kwargs.get("name")) is not None and (metadata or {}).get("langgraph_node") == name:
+            self._start(run_id, f"node.{name}")
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_chat_model_start(self, serialized: dict[str, Any], messages: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, "llm")
+
+    def on_llm_start(self, serialized: dict[str, Any], prompts: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, "llm")
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_tool_start(self, serialized: dict[str, Any], input_str: str, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, f"tool.{kwargs.get('name') or serialized.get('name')}")
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+
+def _record(config: RunnableConfig | None, name: str, start: float) -> None:
+    """Record the span in the timings of the request whose callbacks are set in the configuration"""
+    callbacks = (config or {}).get("callbacks")
+    for handler in getattr(callbacks, "handlers", callbacks) or []:
+        if isinstance(handler, TimingCallbackHandler):
+            handler.timings.record(name, time.perf_counter() - start)
+            return
+
+
+class InstrumentedCheckpointer(BaseCheckpointSaver):
+    """
+    Checkpointer recording the duration of the reads and writes of the wrapped one in the timings
+    of the request they are made for, found among the callbacks of the graph's configuration.
+    Other attributes are delegated.
+
+    :param checkpointer: Wrapped checkpointer
+    :type checkpointer: BaseCheckpointSaver
+    """
+
+    def __init__(self, checkpointer: BaseCheckpointSaver) -> None:
+        super().__init__(serde=checkpointer.serde)
+        self.checkpointer = checkpointer
+
+    def get_tuple(self, config: RunnableConfig):
+        start = time.perf_counter()
+        try:
+            return self.checkpointer.get_tuple(config)
+        finally:
+            _record(config, "checkpoint.get", start)
+
+    def list(self, config: RunnableConfig | None, **kwargs: Any):
+        start = time.perf_counter()
+        try:
+            yield from self.checkpointer.list(config, **kwargs)
+        finally:
+            _record(config, "checkpoint.list", start)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        start = time.perf_counter()
+        try:
+            return self.checkpointer.put(config, checkpoint, metadata, new_versions)
+        finally:
+            _record(config, "checkpoint.put", start)
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str, *args: Any) -> None:
+        start = time.perf_counter()
+        try:
+            return self.checkpointer.put_writes(config, writes, task_id, *args)
+        finally:
+            _record(config, "checkpoint.put_writes", start)
+
+    async def aget_tuple(self, config: RunnableConfig):
+        start = time.perf_counter()
+        try:
+            return await self.checkpointer.aget_tuple(config)
+        finally:
+            _record(config, "checkpoint.get", start)
+
+    async def alist(self, config: RunnableConfig | None, **kwargs: Any):
+        start = time.perf_counter()
+        try:
+            async for item in self.checkpointer.alist(config, **kwargs):
+                yield item
+        finally:
+            _record(config, "checkpoint.list", start)
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        start = time.perf_counter()
+        try:
+            return await self.checkpointer.aput(config, checkpoint, metadata, new_versions)
+        finally:
+            _record(config, "checkpoint.put", start)
+
+    async def aput_writes(
+        self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str, *args: Any
+    ) -> None:
+        start = time.perf_counter()
+        try:
+            return await self.checkpointer.aput_writes(config, writes, task_id, *args)
+        finally:
+            _record(config, "checkpoint.put_writes", start)
+
+    def get_next_version(self, current, channel):
+        return self.checkpointer.get_next_version(current, channel)
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.checkpointer.delete_thread(thread_id)
+
+    def __getattr__(self, name: str):
+        if name == "checkpointer":
+            raise AttributeError(name)
+        return getattr(self.checkpointer, name)
@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+
+from langgraph_react_agent import regression
+from langgraph_react_agent.datasets import DATASETS
+from langgraph_react_agent.metrics import MetricsRegistry
+
+
+@dataclass
+class _Job:
+    future: Future | None = None
+    key: str | None = None  # key of the data in `OLS_FIT_CACHE`, known once the job has started
+    start: float | None = None
+    end: float | None = None
+
+
+class Precomputer:
+    """
+    Speculative computation of the regression tools' results, started as soon as a message brings data.
+
+    The OLS fit, the correlations and the assumption tests of the data are computed on a small thread pool
+    while the model generates its first tool call. They are stored in the shared `OLS_FIT_CACHE` (the tests
+    in the fit's memo), so the tools use the finished results or wait for the ones in progress instead of
+    computing them again, and the tools' latency overlaps the model's one.
+
+    The jobs are reported (see `stats`) by:
+
+    - the wasted work ratio: the share of the computation time spent on data no tool has used (yet),
+    - the overlap ratio: the share of the computation time of the used data done before the first tool
+      used it, i.e. hidden behind the model's latency.
+
+    :param max_workers: Maximum number of datasets processed at the same time
+    :type max_workers: int
+
+    :param max_jobs: Number of latest jobs kept for the report, and to skip data already being processed
+    :type max_jobs: int
+
+    :param metrics: Registry observing the duration of the jobs (`precompute` span)
+    :type metrics: MetricsRegistry | None
+    """
+
+    def __init__(self, max_workers: int = 2, max_jobs: int = 256, metrics: MetricsRegistry | None = None) -> None:
+        self.max_jobs = max_jobs
+        self.metrics = metrics
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="precompute")
+        self._jobs: OrderedDict[tuple[str, str], _Job] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, exog_handle: str, endog_handle: str) -> Future:
+        """Start computing the results of the registered data, unless they are already being computed."""
+        handles = (exog_handle, endog_handle)
+        with self._lock:
+            job = self._jobs.get(handles)
+            if job is None or (job.future.done() and job.future.exception() is not None):
+                job = self._jobs[handles] = _Job()
+                job.future = self._executor.submit(self._run, job, exog_handle, endog_handle)
+            self._jobs.move_to_end(handles)
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+        return job.future
+
+    def _run(self, job: _Job, exog_handle: str, endog_handle: str) -> None:
+        job.start = time.perf_counter()
+        try:
+            # The lookups are not uses of the results, the tools' ones are
+            with regression.speculative():
+                exog, endog = DATASETS.get(exog_handle), DATASETS.get(endog_handle)
+                job.key = regression.OLS_FIT_CACHE.key(exog, endog)
+                fit = regression.OLS_FIT_CACHE.get(exog, endog, key=job.key)
+                regression.OLS_FIT_CACHE.correlations(exog, endog, key=job.key)
+                # statsmodels computes the results' statistics lazily, once
+                for name in ("params", "bse", "pvalues", "rsquared", "fvalue", "f_pvalue"):
+                    getattr(fit, name)
+                fit.normality_test()
+                fit.durbin_watson()
+                fit.breusch_pagan()
+        finally:
+            job.end = time.perf_counter()
+            if self.metrics is not None:
+                self.metrics.observe("precompute", job.end - job.start)
+
+    def stats(self) -> dict:
+        with self._lock:
+            jobs = list(self._jobs.values())
+
+        finished = [job for job in jobs if job.future is not None and job.future.done() and job.end is not None]
+        seconds = wasted = used_seconds = overlap = 0.0
+        used = failed = 0
+        for job in finished:
+            duration = job.end - job.start
+            seconds += duration
+            if job.future.exception() is not None:
+                failed += 1
+                wasted += duration
+            elif (first_use := regression.OLS_FIT_CACHE.first_use(job.key)) is None:
+                wasted += duration
+            else:
+                used += 1
+                used_seconds += duration
+                overlap += min(max(first_use - job.start, 0.0), duration)
+        return {
+            "jobs": len(jobs),
+            "pending": len(jobs) - len(finished),
+            "used": used,
+            "failed": failed,
+            "seconds": seconds,
+            "wasted_seconds": wasted,
+            "wasted_ratio": wasted / seconds if seconds else 0.0,
+            "overlap_ratio": overlap / used_seconds if used_seconds else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
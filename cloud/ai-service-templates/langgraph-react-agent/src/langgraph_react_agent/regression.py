@@ -0,0 +1,505 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Hashable, Iterator
+
+import numpy as np
+
+from langgraph_react_agent.datasets import array_digest
+from langgraph_react_agent.diagnostics import (
+    breusch_pagan_from_moments,
+    jarque_bera_from_moments,
+    normality_test,
+    select_normality_test,
+    subsample,
+)
+
+# statsmodels and scipy take seconds to import, they are imported by the first fit instead of at start-up
+if TYPE_CHECKING:
+    from statsmodels.regression.linear_model import RegressionResultsWrapper
+
+# Above this number of observations the model is fitted with the one-pass `IncrementalOLS` engine
+STREAMING_THRESHOLD = 100_000
+# Number of rows processed at once by the `IncrementalOLS` engine
+CHUNK_SIZE = 65_536
+# Upper bound on the number of elements of the per-chunk products of the `IncrementalOLS` engine (32 MB),
+# chunks of data with many variables are split further
+CHUNK_ELEMENTS = 4_194_304
+# The `IncrementalOLS` engine stores (k + 2)^4 fourth moments, data with more explanatory variables is fitted
+# in memory whatever its size
+STREAMING_MAX_VARIABLES = 20
+# Normality test of the residuals, "auto" chooses it by sample size (see `diagnostics.normality_test`)
+NORMALITY_TEST = "auto"
+# Residuals of larger samples are tested on a reproducible random subsample of this size, `None` tests all of them
+DIAGNOSTICS_SAMPLE_SIZE: int | None = None
+DIAGNOSTICS_SEED = 0
+
+
+def configure(
+    streaming_threshold: int | None = None,
+    chunk_size: int | None = None,
+    normality_test: str | None = None,
+    diagnostics_sample_size: int | None = None,
+    diagnostics_seed: int | None = None,
+) -> None:
+    """
+    Override the size threshold above which the streaming engine is used and its chunk size, the normality test
+    and the size and seed of the residuals' subsample it is run on.
+    """
+    global STREAMING_THRESHOLD, CHUNK_SIZE, NORMALITY_TEST, DIAGNOSTICS_SAMPLE_SIZE, DIAGNOSTICS_SEED
+
+    if streaming_threshold is not None:
+        STREAMING_THRESHOLD = streaming_threshold
+    if chunk_size is not None:
+        CHUNK_SIZE = chunk_size
+    if normality_test is not None:
+        select_normality_test(0, normality_test)
+        NORMALITY_TEST = normality_test
+    if diagnostics_sample_size is not None:
+        DIAGNOSTICS_SAMPLE_SIZE = diagnostics_sample_size
+    if diagnostics_seed is not None:
+        DIAGNOSTICS_SEED = diagnostics_seed
+
+
+# Set in the threads computing results speculatively, their cache lookups are not uses of the results
+_speculative = threading.local()
+
+
+@contextmanager
+def speculative() -> Iterator[None]:
+    """Mark the cache lookups of the current thread as speculative (see `OLSFitCache.first_use`)."""
+    _speculative.active = True
+    try:
+        yield
+    finally:
+        _speculative.active = False
+
+
+class _Memo:
+    """
+    Results computed once per key. The callers of an in-flight computation wait for it instead of computing
+    the result again, a failed computation is retried by the next caller.
+    """
+
+    def __init__(self) -> None:
+        self._futures: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, func: Callable[[], Any]) -> tuple[Any, bool]:
+        """Return the result and whether it was computed by this call"""
+        with self._lock:
+            future = self._futures.get(key)
+            computing = future is None
+            if computing:
+                future = self._futures[key] = Future()
+        if computing:
+            try:
+                future.set_result(func())
+            except BaseException as error:
+                with self._lock:
+                    del self._futures[key]
+                future.set_exception(error)
+        return future.result(), computing
+
+
+@dataclass(frozen=True)
+class OLSFit:
+    """Fitted OLS model shared between the regression tools, every diagnostic is computed once."""
+
+    results: "RegressionResultsWrapper"
+    exog: np.ndarray  # design matrix, including the constant column
+    endog: np.ndarray
+    memo: _Memo = field(default_factory=_Memo, repr=False, compare=False)
+
+    @property
+    def nobs(self) -> int:
+        return int(self.results.nobs)
+
+    @property
+    def params(self) -> np.ndarray:
+        return np.asarray(self.results.params)
+
+    @property
+    def bse(self) -> np.ndarray:
+        return np.asarray(self.results.bse)
+
+    @property
+    def rsquared(self) -> float:
+        return float(self.results.rsquared)
+
+    @property
+    def pvalues(self) -> np.ndarray:
+        return np.asarray(self.results.pvalues)
+
+    @property
+    def fvalue(self) -> float:
+        return float(self.results.fvalue)
+
+    @property
+    def f_pvalue(self) -> float:
+        return float(self.results.f_pvalue)
+
+    @property
+    def resid(self) -> np.ndarray:
+        return self.results.resid
+
+    def summary(self) -> str:
+        return self.results.summary().as_text()
+
+    def durbin_watson(self) -> float:
+        from statsmodels.stats.stattools import durbin_watson
+
+        return self.memo.get("durbin_watson", lambda: float(durbin_watson(self.resid)))[0]
+
+    def breusch_pagan(self) -> tuple[float, float]:
+        """
+        Breusch-Pagan (Koenker's studentized) Lagrange multiplier statistic and its p-value. The auxiliary
+        regression reuses inv(X'X) of the fit, only X'e^2 is computed from the data.
+        """
+
+        def compute() -> tuple[float, float]:
+            u2 = np.square(self.resid)
+            return breusch_pagan_from_moments(
+                self.nobs, np.asarray(self.results.normalized_cov_params), self.exog.T @ u2, u2.sum(), u2 @ u2
+            )
+
+        return self.memo.get("breusch_pagan", compute)[0]
+
+    def _normality_sample(self) -> np.ndarray:
+        resid = np.asarray(self.resid)
+        if DIAGNOSTICS_SAMPLE_SIZE is None:
+            return resid
+        return subsample(resid, DIAGNOSTICS_SAMPLE_SIZE, DIAGNOSTICS_SEED)
+
+    @property
+    def normality_method(self) -> str:
+        return select_normality_test(len(self._normality_sample()), NORMALITY_TEST)
+
+    def normality_test(self) -> tuple[float, float]:
+        """Normality test statistic of the residuals (of their subsample, if configured) and its p-value."""
+        key = ("normality_test", NORMALITY_TEST, DIAGNOSTICS_SAMPLE_SIZE, DIAGNOSTICS_SEED)
+        return self.memo.get(key, lambda: normality_test(self._normality_sample(), NORMALITY_TEST))[0]
+
+
+def correlations(exog: np.ndarray, endog: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Pearson correlation coefficient of every explanatory variable with the response and its two-sided p-value."""
+    from scipy.stats import t as student_t
+
+    exog = np.asarray(exog, dtype=float)
+    exog = exog.reshape(len(exog), -1)
+    endog = np.asarray(endog, dtype=float)
+
+    x = exog - exog.mean(axis=0)
+    y = endog - endog.mean()
+    r = np.clip((x.T @ y) / np.sqrt(np.einsum("ij,ij->j", x, x) * (y @ y)), -1.0, 1.0)
+
+    df = len(endog) - 2
+    with np.errstate(divide="ignore"):
+        t_stat = np.abs(r) * np.sqrt(df / (1.0 - r**2))
+    return r, 2 * student_t.sf(t_stat, df)
+
+
+class IncrementalOLS:
+    """
+    One-pass least squares engine with bounded memory.
+
+    The data is consumed in chunks. For z = (1, x_1, ..., x_k, y) the engine accumulates the raw
+    moments sum(z z'), sum(z z z) and sum(z z z z) and the second moment of consecutive differences
+    sum(dz dz'). The residuals are linear in z, e = z'w with w = (-beta, 1), so the residual sum of
+    squares, the Durbin-Watson statistic, the Breusch-Pagan auxiliary regression and the residuals'
+    skewness and kurtosis are all contractions of these moments with w. Memory usage depends only on
+    the number of regressors, never on the number of observations.
+
+    The data is shifted by the mean of the first chunk before accumulating, which keeps the raw
+    moments well conditioned. None of the statistics depend on that shift.
+
+    The moments take O(k^4) memory, so `k` is limited to `STREAMING_MAX_VARIABLES`, and the chunks are
+    split so that their products have at most `CHUNK_ELEMENTS` elements.
+
+    :param k: Number of explanatory variables (without the constant term)
+    :type k: int
+    """
+
+    def __init__(self, k: int) -> None:
+        if k > STREAMING_MAX_VARIABLES:
+            raise ValueError(
+                f"The streaming engine fits at most {STREAMING_MAX_VARIABLES} explanatory variables, got {k}."
+            )
+        p = k + 2
+        self.k = k
+        self.nobs = 0
+        self._shift: np.ndarray | None = None
+        self._m2 = np.zeros((p, p))
+        self._m3 = np.zeros((p, p, p))
+        self._m4 = np.zeros((p, p, p, p))
+        self._d2 = np.zeros((p, p))
+        self._last: np.ndarray | None = None
+        self._w: np.ndarray | None = None
+
+    @classmethod
+    def from_arrays(
+        cls, exog: np.ndarray, endog: np.ndarray, chunk_size: int | None = None
+    ) -> "IncrementalOLS":
+        exog = np.asarray(exog, dtype=float)
+        exog = exog.reshape(len(exog), -1)
+        engine = cls(exog.shape[1])
+        chunk_size = chunk_size or CHUNK_SIZE
+        for start in range(0, len(exog), chunk_size):
+            engine.update(exog[start: start + chunk_size], endog[start: start + chunk_size])
+        return engine
+
+    def update(self, exog: np.ndarray, endog: np.ndarray) -> None:
+        """Accumulate the moments of another chunk of observations."""
+        exog = np.asarray(exog, dtype=float).reshape(len(exog), -1)
+        endog = np.asarray(endog, dtype=float)
+        if len(exog) == 0:
+            return
+        # Every row takes p^2 elements of the chunk's outer products
+        rows = max(1, CHUNK_ELEMENTS // (self.k + 2) ** 2)
+        if len(exog) > rows:
+            for start in range(0, len(exog), rows):
+                self.update(exog[start: start + rows], endog[start: start + rows])
+            return
+
+        xy = np.column_stack([exog, endog])
+        if self._shift is None:
+            self._shift = xy.mean(axis=0)
+        z = np.column_stack([np.ones(len(xy)), xy - self._shift])
+
+        p = z.shape[1]
+        zz = (z[:, :, None] * z[:, None, :]).reshape(len(z), p * p)
+        self._m2 += z.T @ z
+        self._m3 += (zz.T @ z).reshape(p, p, p)
+        self._m4 += (zz.T @ zz).reshape(p, p, p, p)
+
+        dz = np.diff(z if self._last is None else np.vstack([self._last, z]), axis=0)
+        self._d2 += dz.T @ dz
+        self._last = z[-1:]
+
+        self.nobs += len(z)
+        self._w = None
+
+    @property
+    def _coef(self) -> np.ndarray:
+        """Coefficients on the shifted data, the last element of w = (-beta, 1)."""
+        if self._w is None:
+            xtx, xty = self._m2[:-1, :-1], self._m2[:-1, -1]
+            self._w = np.append(-np.linalg.pinv(xtx) @ xty, 1.0)
+        return self._w
+
+    @property
+    def params(self) -> np.ndarray:
+        """Coefficients (constant first) on the original scale of the data."""
+        beta = -self._coef[:-1].copy()
+        beta[0] += self._shift[-1] - beta[1:] @ self._shift[:-1]
+        return beta
+
+    @property
+    def ssr(self) -> float:
+        w = self._coef
+        return float(w @ self._m2 @ w)
+
+    @property
+    def df_resid(self) -> int:
+        return self.nobs - self.k - 1
+
+    @property
+    def bse(self) -> np.ndarray:
+        cov = np.linalg.pinv(self._m2[:-1, :-1]) * self.ssr / self.df_resid
+        # Undo the shift, the intercept on the original scale is const - shift_x' beta
+        a = np.eye(self.k + 1)
+        a[0, 1:] = -self._shift[:-1]
+        return np.sqrt(np.diag(a @ cov @ a.T))
+
+    @property
+    def rsquared(self) -> float:
+        y_sum, y2_sum = self._m2[0, -1], self._m2[-1, -1]
+        return 1.0 - self.ssr / (y2_sum - y_sum**2 / self.nobs)
+
+    @property
+    def pvalues(self) -> np.ndarray:
+        """Two-sided p-values of the coefficients' t statistics."""
+        from scipy.stats import t as student_t
+
+        return 2 * student_t.sf(np.abs(self.params / self.bse), self.df_resid)
+
+    @property
+    def fvalue(self) -> float:
+        return self.rsquared / self.k / ((1.0 - self.rsquared) / self.df_resid)
+
+    @property
+    def f_pvalue(self) -> float:
+        from scipy.stats import f as f_dist
+
+        return float(f_dist.sf(self.fvalue, self.k, self.df_resid))
+
+    def _resid_moment(self, order: int) -> float:
+        """Sum of the residuals raised to the given power (1 to 4)."""
+        w = self._coef
+        moment = {1: self._m2[0], 2: self._m2, 3: self._m3, 4: self._m4}[order]
+        for _ in range(order):
+            moment = moment @ w
+        return float(moment)
+
+    def durbin_watson(self) -> float:
+        w = self._coef
+        return float(w @ self._d2 @ w) / self.ssr
+
+    def breusch_pagan(self) -> tuple[float, float]:
+        """Breusch-Pagan (Koenker's studentized) Lagrange multiplier statistic and its p-value."""
+        w = self._coef
+        xtu2 = (self._m3[:-1] @ w) @ w  # sum(x * e^2)
+        return breusch_pagan_from_moments(
+            self.nobs, np.linalg.pinv(self._m2[:-1, :-1]), xtu2, self.ssr, self._resid_moment(4)
+        )
+
+    # The residuals are not kept, the test only needs their moments
+    normality_method = "jarque-bera"
+
+    def normality_test(self) -> tuple[float, float]:
+        """Jarque-Bera statistic of the residuals and its p-value."""
+        n = self.nobs
+        s1, s2, s3, s4 = (self._resid_moment(order) / n for order in range(1, 5))
+        m2 = s2 - s1**2
+        m3 = s3 - 3 * s1 * s2 + 2 * s1**3
+        m4 = s4 - 4 * s1 * s3 + 6 * s1**2 * s2 - 3 * s1**4
+        return jarque_bera_from_moments(n, m2, m3, m4)
+
+    def summary(self) -> str:
+        """Plain text summary of the fit, in the spirit of the statsmodels' one."""
+        names = ["const"] + [f"x{i}" for i in range(1, self.k + 1)]
+        rows = "\n".join(
+            f"{name:<10}{coef:>14.4f}{se:>14.4f}"
+            for name, coef, se in zip(names, self.params, self.bse)
+        )
+        return (
+            "OLS Regression Results (streaming engine)\n"
+            f"No. Observations: {self.nobs}    R-squared: {self.rsquared:.4f}    "
+            f"Durbin-Watson: {self.durbin_watson():.4f}\n"
+            f"{'':<10}{'coef':>14}{'std err':>14}\n{rows}"
+        )
+
+
+class _CacheEntry:
+    def __init__(self) -> None:
+        self.memo = _Memo()
+        self.first_use: float | None = None
+
+
+class OLSFitCache:
+    """
+    Content-addressed, size-bounded LRU cache of OLS fits.
+
+    Entries are keyed by a hash of the (exog, endog) arrays, so every tool called with the same
+    data within one agent turn reuses a single fit instead of refitting the model. A fit in progress
+    (e.g. started in the background when the data arrived) is waited for instead of being computed again.
+
+    :param maxsize: Maximum number of fits kept in memory
+    :type maxsize: int
+    """
+
+    def __init__(self, maxsize: int = 32) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be a positive integer.")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._fits: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(exog: np.ndarray, endog: np.ndarray) -> str:
+        return array_digest(exog, endog)
+
+    def _entry(self, key: str) -> _CacheEntry:
+        with self._lock:
+            if (entry := self._fits.get(key)) is None:
+                entry = self._fits[key] = _CacheEntry()
+            self._fits.move_to_end(key)
+            while len(self._fits) > self.maxsize:
+                self._fits.popitem(last=False)
+            if entry.first_use is None and not getattr(_speculative, "active", False):
+                entry.first_use = time.perf_counter()
+            return entry
+
+    def get(
+        self, exog: list | np.ndarray, endog: list | np.ndarray, key: str | None = None
+    ) -> OLSFit | IncrementalOLS:
+        """
+        Return the cached fit for the given data, fitting the model on a miss.
+
+        Datasets larger than `STREAMING_THRESHOLD` observations and with at most `STREAMING_MAX_VARIABLES`
+        explanatory variables are fitted with the `IncrementalOLS` engine.
+        """
+        exog = np.asarray(exog, dtype=float)
+        endog = np.asarray(endog, dtype=float)
+        fit, fitted = self._entry(key or self.key(exog, endog)).memo.get("fit", lambda: self._fit(exog, endog))
+        with self._lock:
+            if fitted:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return fit
+
+    def correlations(
+        self, exog: list | np.ndarray, endog: list | np.ndarray, key: str | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Cached `correlations` of the given data, they are not counted in the fits' hits and misses."""
+        exog = np.asarray(exog, dtype=float)
+        endog = np.asarray(endog, dtype=float)
+        entry = self._entry(key or self.key(exog, endog))
+        return entry.memo.get("correlations", lambda: correlations(exog, endog))[0]
+
+    def first_use(self, key: str) -> float | None:
+        """
+        Time (`time.perf_counter`) of the first lookup of the data's results which was not speculative,
+        `None` if they were not looked up (or have been evicted).
+        """
+        with self._lock:
+            entry = self._fits.get(key)
+            return entry.first_use if entry is not None else None
+
+    @staticmethod
+    def _fit(exog: np.ndarray, endog: np.ndarray) -> OLSFit | IncrementalOLS:
+        if len(endog) > STREAMING_THRESHOLD and exog.size <= len(endog) * STREAMING_MAX_VARIABLES:
+            return IncrementalOLS.from_arrays(exog, endog)
+
+        import statsmodels.api as sm
+
+        design = sm.add_constant(exog)
+        return OLSFit(results=sm.OLS(endog, design).fit(), exog=design, endog=endog)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._fits.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._fits),
+                "maxsize": self.maxsize,
+            }
+
+    def __len__(self) -> int:
+        return len(self._fits)
+
+
+# Process-wide cache shared by all the tools
+OLS_FIT_CACHE = OLSFitCache()
+
+
+def fit_ols(exog: list | np.ndarray, endog: list | np.ndarray) -> OLSFit | IncrementalOLS:
+    """Fit (or fetch from the shared cache) an OLS model with an added constant term."""
+    return OLS_FIT_CACHE.get(exog, endog)
+
+
+def cached_correlations(exog: list | np.ndarray, endog: list | np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Compute (or fetch from the shared cache) the correlations of every explanatory variable with the response."""
+    return OLS_FIT_CACHE.correlations(exog, endog)
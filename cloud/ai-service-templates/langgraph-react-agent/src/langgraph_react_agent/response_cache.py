@@ -0,0 +1,106 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from langchain_core.messages import BaseMessage
+
+from langgraph_react_agent.dataset_store import data_digest
+from langgraph_react_agent.encoding import dumps
+
+
+def normalise_messages(messages: list[BaseMessage]) -> list:
+    """Role, stripped content and tool calls of the messages, the parts an answer depends on."""
+    return [
+        (
+            message.type,
+            message.content.strip() if isinstance(message.content, str) else message.content,
+            [(call["name"], call["args"]) for call in getattr(message, "tool_calls", [])],
+        )
+        for message in messages
+    ]
+
+
+def normalise_request(raw_messages: list[dict]) -> list:
+    """
+    Role and stripped content of the request's messages, with their `data` replaced by its hash. The references
+    to windows of the dataset store are hashed by the window they resolve to.
+    """
+    normalised = []
+    for message in raw_messages:
+        data = message.get("data") or {}
+        digests = (data_digest(data.get("exog", [])), data_digest(data.get("endog", []))) if data else None
+        normalised.append((message["role"], message.get("content", "").strip(), digests))
+    return normalised
+
+
+class ResponseCache:
+    """
+    Size-bounded LRU cache of the messages generated by the agent, with an optional time to live.
+
+    Entries are keyed by a hash of everything the answer depends on: the system prompt and messages
+    of the request (with a hash of their data), the conversation history of the thread and the
+    model id. Repeated question and dataset pairs are then answered without calling the model and
+    the tools.
+
+    :param maxsize: Maximum number of responses kept in memory
+    :type maxsize: int
+
+    :param ttl: Time (in seconds) after which a cached response expires, `None` keeps responses until evicted
+    :type ttl: float | None
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float | None = None) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be a positive integer.")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._responses: OrderedDict[str, tuple[float, list[BaseMessage]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(*parts) -> str:
+        serialized = dumps(parts, sort_keys=True, default=str)
+        return hashlib.blake2b(serialized, digest_size=16).hexdigest()
+
+    def get(self, key: str) -> list[BaseMessage] | None:
+        with self._lock:
+            entry = self._responses.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._responses[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._responses.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, messages: list[BaseMessage]) -> None:
+        with self._lock:
+            self._responses[key] = (time.monotonic(), list(messages))
+            self._responses.move_to_end(key)
+            while len(self._responses) > self.maxsize:
+                self._responses.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._responses.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._responses),
+                "maxsize": self.maxsize,
+            }
+
+    def __len__(self) -> int:
+        return len(self._responses)
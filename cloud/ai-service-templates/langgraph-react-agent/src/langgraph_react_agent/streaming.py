@@ -0,0 +1,198 @@
+import asyncio
+import queue
+import threading
+import time
+from collections.abc import AsyncIterator, Iterator
+
+# Marks the end of the producer's stream
+_END = object()
+
+
+class _Failure:
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+def get_delta(chunk: dict) -> str | None:
+    """Text delta of an assistant's response chunk, `None` for the other chunks"""
+    if not chunk["choices"]:
+        return None
+    message = chunk["choices"][0]["message"]
+    if message.get("role") == "assistant" and isinstance(message.get("delta"), str):
+        return message["delta"]
+    return None
+
+
+def delta_chunk(delta: str) -> dict:
+    return {"choices": [{"index": 0, "message": {"role": "assistant", "delta": delta}}]}
+
+
+class _Coalescer:
+    """
+    Buffer of the text deltas waiting to be sent as one chunk.
+
+    The first delta of the stream is sent right away, so coalescing does not delay the first token.
+    The following ones are buffered until they reach `max_bytes` or the oldest of them has waited
+    `max_delay` seconds. Any other chunk (tool calls, tool results) flushes the buffer first.
+    """
+
+    def __init__(self, max_bytes: int, max_delay: float) -> None:
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self.deltas: list[str] = []
+        self.size = 0
+        self.deadline: float | None = None
+        self.first = True
+
+    def timeout(self) -> float | None:
+        """Time left until the buffer must be flushed, `None` if it is empty"""
+        return None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+
+    def flush(self) -> list[dict]:
+        if not self.deltas:
+            return []
+        chunk = delta_chunk("".join(self.deltas))
+        self.deltas, self.size, self.deadline = [], 0, None
+        return [chunk]
+
+    def add(self, chunk: dict) -> list[dict]:
+        """Chunks ready to be sent after receiving the given one"""
+        if (delta := get_delta(chunk)) is None:
+            return self.flush() + [chunk]
+        if self.first:
+            self.first = False
+            return [chunk]
+
+        self.deltas.append(delta)
+        self.size += len(delta.encode())
+        if self.deadline is None:
+            self.deadline = time.monotonic() + self.max_delay
+        if self.size >= self.max_bytes or self.timeout() == 0.0:
+            return self.flush()
+        return []
+
+
+def coalesce_chunks(
+    chunks: Iterator[dict], max_bytes: int = 64, max_delay: float = 0.02, buffer_size: int = 256
+) -> Iterator[dict]:
+    """
+    Merge consecutive assistant deltas of the stream into chunks of up to `max_bytes` bytes or
+    `max_delay` seconds of waiting.
+
+    The stream is consumed by a producer thread into a queue of at most `buffer_size` chunks. The
+    buffered deltas are then flushed on time even if the model pauses, and a slow consumer holds back
+    the producer (and the graph) once the queue is full instead of letting the chunks pile up.
+    With `max_bytes` and `max_delay` both set to 0 the stream is passed through unchanged.
+    """
+    if max_bytes <= 0 and max_delay <= 0:
+        yield from chunks
+        return
+
+    items: queue.Queue = queue.Queue(maxsize=buffer_size)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for chunk in chunks:
+                if not put(chunk):
+                    break
+        except BaseException as error:
+            put(_Failure(error))
+        finally:
+            put(_END)
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+
+    threading.Thread(target=produce, name="stream-producer", daemon=True).start()
+    coalescer = _Coalescer(max_bytes, max_delay)
+    try:
+        while True:
+            try:
+                item = items.get(timeout=coalescer.timeout())
+            except queue.Empty:
+                yield from coalescer.flush()
+                continue
+            if item is _END:
+                break
+            if isinstance(item, _Failure):
+                yield from coalescer.flush()
+                raise item.error
+            yield from coalescer.add(item)
+        yield from coalescer.flush()
+    finally:
+        stop.set()
+
+
+async def acoalesce_chunks(
+    chunks: AsyncIterator[dict], max_bytes: int = 64, max_delay: float = 0.02, buffer_size: int = 256
+) -> AsyncIterator[dict]:
+    """
+    Asynchronous counterpart of `coalesce_chunks`, the stream is consumed by a producer task.
+
+    The stream is closed once the producer is done, also when the consumer stops early or is cancelled.
+    """
+    if max_bytes <= 0 and max_delay <= 0:
+        try:
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await _aclose(chunks)
+        return
+
+    items: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+
+    async def produce() -> None:
+        try:
+            async for chunk in chunks:
+                await items.put(chunk)
+        except Exception as error:
+            await items.put(_Failure(error))
+        await items.put(_END)
+
+    producer = asyncio.ensure_future(produce())
+    coalescer = _Coalescer(max_bytes, max_delay)
+    # Waiting for the next item times out to flush the buffer, the pending get is kept so no item is lost
+    get: asyncio.Future | None = None
+    try:
+        while True:
+            if get is None:
+                get = asyncio.ensure_future(items.get())
+            done, _ = await asyncio.wait({get}, timeout=coalescer.timeout())
+            if not done:
+                for chunk in coalescer.flush():
+                    yield chunk
+                continue
+            item, get = get.result(), None
+            if item is _END:
+                break
+            if isinstance(item, _Failure):
+                for chunk in coalescer.flush():
+                    yield chunk
+                raise item.error
+            for chunk in coalescer.add(item):
+                yield chunk
+        for chunk in coalescer.flush():
+            yield chunk
+    finally:
+        if get is not None:
+            get.cancel()
+        producer.cancel()
+        # The stream cannot be closed while the producer is advancing it
+        await asyncio.wait({producer})
+        await _aclose(chunks)
+
+
+async def _aclose(chunks: AsyncIterator) -> None:
+    aclose = getattr(chunks, "aclose", None)
+    if aclose is not None:
+        await aclose()
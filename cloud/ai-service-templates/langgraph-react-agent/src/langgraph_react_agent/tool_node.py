@@ -0,0 +1,224 @@
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from typing import Any, Callable, Literal, Sequence
+
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import get_config_list
+from langchain_core.tools import BaseTool
+from langgraph.prebuilt import ToolNode
+from langgraph.store.base import BaseStore
+from langgraph.types import Command
+
+
+class ParallelToolNode(ToolNode):
+    """
+    Tool node running all the tool calls of one agent step concurrently on a bounded thread pool.
+
+    The regression tools spend most of their time in NumPy/SciPy code which releases the GIL, so
+    threads are enough to run them in parallel, and they share the process-wide OLS fit cache. Every
+    call is given its own timeout, counted from the moment the call starts running, and the whole step
+    (the time its calls spend queued included) ends at the latest when the largest timeout of its calls
+    has elapsed since the step started. A call which does not finish in time is answered with an error
+    `ToolMessage`: a queued call is cancelled, a running thread cannot be interrupted, it finishes in the
+    background and its result is discarded. The abandoned calls keep their worker until they finish, so
+    at most `max_pending` calls are queued or running at once and the calls beyond are rejected with an
+    error `ToolMessage` instead of waiting behind hung tools.
+
+    The wall-clock time of every call and of the whole step is recorded in the `response_metadata`
+    of the returned messages under the `duration` and `step_duration` keys (in seconds).
+
+    :param tools: Tools available to the agent
+    :type tools: Sequence[BaseTool | Callable]
+
+    :param max_workers: Maximum number of tool calls running at the same time
+    :type max_workers: int
+
+    :param timeout: Timeout of a single tool call in seconds, either one for all the tools or a mapping
+        of tool names to timeouts (tools which are not listed are not timed out). `None` disables timeouts.
+    :type timeout: float | dict[str, float] | None
+
+    :param max_pending: Maximum number of tool calls queued or running at the same time (abandoned ones
+        included), 4 times `max_workers` by default
+    :type max_pending: int | None
+    """
+
+    def __init__(
+        self,
+        tools: Sequence[BaseTool | Callable],
+        *,
+        max_workers: int = 4,
+        timeout: float | dict[str, float] | None = 30.0,
+        max_pending: int | None = None,
+        **kwargs: Any,
+    ) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be a positive integer.")
+        if max_pending is not None and max_pending < max_workers:
+            raise ValueError("max_pending must be at least max_workers.")
+        super().__init__(tools, **kwargs)
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_pending = max_pending or 4 * max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+
+    def get_timeout(self, tool_name: str) -> float | None:
+        if isinstance(self.timeout, dict):
+            return self.timeout.get(tool_name)
+        return self.timeout
+
+    def get_deadline(self, start: float, tool_calls: list[dict]) -> float | None:
+        """End of the step started at `start`, `None` if none of its calls is timed out."""
+        timeouts = [t for t in (self.get_timeout(call["name"]) for call in tool_calls) if t is not None]
+        return start + max(timeouts) if timeouts else None
+
+    def _release(self, _: Future) -> None:
+        with self._pending_lock:
+            self._pending -= 1
+
+    def _submit(
+        self,
+        call: dict,
+        input_type: Literal["list", "dict", "tool_calls"],
+        config: RunnableConfig,
+    ) -> tuple[Future, Future] | None:
+        """
+        Submit the call to the pool, return futures of its start time and of its output, or `None` if
+        `max_pending` calls are already queued or running.
+        """
+        with self._pending_lock:
+            if self._pending >= self.max_pending:
+                return None
+            self._pending += 1
+        started = Future()
+
+        def run() -> ToolMessage | Command:
+            start = time.perf_counter()
+            # The waiting for the start may have been given up (and its future cancelled) meanwhile
+            if started.set_running_or_notify_cancel():
+                started.set_result(start)
+            output = self._run_one(call, input_type, config)
+            if isinstance(output, ToolMessage):
+                output.response_metadata["duration"] = time.perf_counter() - start
+            return output
+
+        # Run in a copy of the current context, so the callbacks (tracing) are propagated to the tools
+        future = self._executor.submit(contextvars.copy_context().run, run)
+        # Called once the call finishes, also when it is cancelled while queued
+        future.add_done_callback(self._release)
+        return started, future
+
+    def _rejected(self, call: dict) -> ToolMessage:
+        return ToolMessage(
+            content=f"Error: the `{call['name']}` tool was not run, too many tool calls are in progress.",
+            name=call["name"],
+            tool_call_id=call["id"],
+            status="error",
+            response_metadata={"duration": 0.0},
+        )
+
+    def _timed_out(self, call: dict) -> ToolMessage:
+        timeout = self.get_timeout(call["name"])
+        return ToolMessage(
+            content=f"Error: the `{call['name']}` tool did not finish within {timeout} s.",
+            name=call["name"],
+            tool_call_id=call["id"],
+            status="error",
+            response_metadata={"duration": timeout},
+        )
+
+    def _combine(
+        self,
+        outputs: list[ToolMessage | Command],
+        input_type: Literal["list", "dict", "tool_calls"],
+        step_duration: float,
+    ) -> Any:
+        for output in outputs:
+            if isinstance(output, ToolMessage):
+                output.response_metadata["step_duration"] = step_duration
+
+        # Same output format as the `ToolNode`
+        if not any(isinstance(output, Command) for output in outputs):
+            return outputs if input_type == "list" else {self.messages_key: outputs}
+        combined_outputs = []
+        for output in outputs:
+            if isinstance(output, Command):
+                combined_outputs.append(output)
+            else:
+                combined_outputs.append([output] if input_type == "list" else {self.messages_key: [output]})
+        return combined_outputs
+
+    def _func(
+        self,
+        input: list | dict | Any,
+        config: RunnableConfig,
+        *,
+        store: BaseStore | None,
+    ) -> Any:
+        start = time.perf_counter()
+        tool_calls, input_type = self._parse_input(input, store)
+        futures = [
+            self._submit(call, input_type, call_config)
+            for call, call_config in zip(tool_calls, get_config_list(config, len(tool_calls)))
+        ]
+
+        deadline = self.get_deadline(start, tool_calls)
+
+        outputs = []
+        for call, submitted in zip(tool_calls, futures):
+            if submitted is None:
+                outputs.append(self._rejected(call))
+                continue
+            started, future = submitted
+            timeout = self.get_timeout(call["name"])
+            try:
+                if timeout is not None:
+                    call_start = started.result(timeout=max(0.0, deadline - time.perf_counter()))
+                    timeout = max(0.0, min(call_start + timeout, deadline) - time.perf_counter())
+                outputs.append(future.result(timeout=timeout))
+            except TimeoutError:
+                started.cancel()
+                future.cancel()
+                outputs.append(self._timed_out(call))
+
+        return self._combine(outputs, input_type, time.perf_counter() - start)
+
+    async def _afunc(
+        self,
+        input: list | dict | Any,
+        config: RunnableConfig,
+        *,
+        store: BaseStore | None,
+    ) -> Any:
+        start = time.perf_counter()
+        tool_calls, input_type = self._parse_input(input, store)
+        futures = [
+            self._submit(call, input_type, call_config)
+            for call, call_config in zip(tool_calls, get_config_list(config, len(tool_calls)))
+        ]
+
+        deadline = self.get_deadline(start, tool_calls)
+
+        async def wait(call: dict, submitted: tuple[Future, Future] | None) -> ToolMessage | Command:
+            if submitted is None:
+                return self._rejected(call)
+            started, future = submitted
+            timeout = self.get_timeout(call["name"])
+            try:
+                if timeout is not None:
+                    call_start = await asyncio.wait_for(
+                        asyncio.wrap_future(started), max(0.0, deadline - time.perf_counter())
+                    )
+                    timeout = max(0.0, min(call_start + timeout, deadline) - time.perf_counter())
+                return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+            except asyncio.TimeoutError:
+                future.cancel()
+                return self._timed_out(call)
+
+        outputs = await asyncio.gather(*(wait(call, submitted) for call, submitted in zip(tool_calls, futures)))
+        return self._combine(list(outputs), input_type, time.perf_counter() - start)
@@ -1,106 +1,191 @@
+from collections.abc import Sequence
+
 import numpy as np
-import statsmodels.api as sm
-from langchain_core.tools import tool
-from scipy.stats import shapiro, pearsonr
-from statsmodels.stats.diagnostic import het_breuschpagan
-from statsmodels.stats.stattools import durbin_watson
+from langchain_core.tools import BaseTool, tool
+
+from langgraph_react_agent import regression
+from langgraph_react_agent.datasets import resolve_array
+from langgraph_react_agent.regression import cached_correlations, fit_ols
+
+
+def _round(value: float) -> float:
+    return float(f"{value:.4g}")
 
 
 @tool(parse_docstring=True)
-def ordinary_least_squared_regression(exog: list, endog: list) -> str:
+def ordinary_least_squared_regression(exog: list | str, endog: list | str, full_summary: bool = False) -> dict | str:
     """
     Fits an Ordinary Least Squares Linear Regression model to the provided data.
 
     Args:
-        exog: List of explanatory variables.
-        endog: List of dependent (response) variables.
+        exog: List of explanatory variables or a dataset handle.
+        endog: List of dependent (response) variables or a dataset handle.
+        full_summary: Return the full text summary of the regression instead of the compact result. Only set it if the user asks for the full summary.
 
     Returns:
-        Summary of the OLS regression if all assumptions are satisfied.
+        The coefficients with their standard errors and p-values, the R-squared and the F-statistic of the OLS regression.
     """
-    # Add a constant to exogenous variables
-    exog = sm.add_constant(exog)
-
-    # Fit the OLS model
-    model = sm.OLS(endog, exog).fit()
-    return model.summary().as_text()
+    # Fit the OLS model (a constant is added to exogenous variables)
+    fit = fit_ols(resolve_array(exog), resolve_array(endog))
+    if full_summary:
+        # Rendering the text summary is slow and its tables are long, it is only done on request
+        return fit.summary()
+
+    names = ["const"] + [f"x{i}" for i in range(1, len(fit.params))]
+    return {
+        "nobs": fit.nobs,
+        "rsquared": _round(fit.rsquared),
+        "fvalue": _round(fit.fvalue),
+        "f_pvalue": _round(fit.f_pvalue),
+        "coefficients": [
+            {"name": name, "coefficient": _round(coef), "std_error": _round(se), "p_value": _round(p_value)}
+            for name, coef, se, p_value in zip(names, fit.params, fit.bse, fit.pvalues)
+        ],
+    }
 
 
 @tool(parse_docstring=True)
-def pearson_correlation(exog: list, endog: list) -> dict:
+def pearson_correlation(exog: list | str, endog: list | str) -> dict:
     """
     Computes the Pearson correlation coefficient to check for linearity.
 
     Args:
-        exog: List of explanatory variables.
-        endog: List of dependent (response) variables.
+        exog: List of explanatory variables or a dataset handle.
+        endog: List of dependent (response) variables or a dataset handle.
 
     Returns:
-        A dictionary containing the correlation coefficient and p-value.
+        A dictionary containing the correlation coefficient and p-value (lists of them, one per column, for a matrix
+        of explanatory variables).
     """
-    exog = np.array(exog)
-    endog = np.array(endog)
-    correlation, p_value = pearsonr(exog, endog)
-    return {"correlation_coefficient": correlation, "p_value": p_value}
+    exog = resolve_array(exog)
+    correlation, p_value = cached_correlations(exog, resolve_array(endog))
+    if exog.ndim == 1:
+        return {"correlation_coefficient": float(correlation[0]), "p_value": float(p_value[0])}
+    return {"correlation_coefficient": correlation.tolist(), "p_value": p_value.tolist()}
 
 
 @tool(parse_docstring=True)
-def check_residuals_normality(exog: list, endog: list) -> bool:
+def check_residuals_normality(exog: list | str, endog: list | str) -> bool:
     """
-    Checks if the residuals of a regression model follow a normal distribution using the Shapiro-Wilk test.
+    Checks if the residuals of a regression model follow a normal distribution using the Shapiro-Wilk test
+    (the D'Agostino-Pearson test above 5000 observations, the Jarque-Bera test for the largest datasets).
 
     Args:
-        exog: List of explanatory variables.
-        endog: List of dependent variable values.
+        exog: List of explanatory variables or a dataset handle.
+        endog: List of dependent variable values or a dataset handle.
 
     Returns:
         True if residuals are normally distributed (p-value > 0.05), False otherwise.
     """
-    exog = sm.add_constant(exog)
-    model = sm.OLS(endog, exog).fit()
-    residuals = model.resid
-    stat, p_value = shapiro(residuals)
+    stat, p_value = fit_ols(resolve_array(exog), resolve_array(endog)).normality_test()
     return p_value > 0.05
 
 
 @tool(parse_docstring=True)
-def data_independence_test(exog: list, endog: list) -> bool:
+def data_independence_test(exog: list | str, endog: list | str) -> bool:
     """
     Checks if the data points are independent using the Durbin-Watson test.
 
     Args:
-        exog: List of explanatory variables.
-        endog: List of dependent (response) variables.
+        exog: List of explanatory variables or a dataset handle.
+        endog: List of dependent (response) variables or a dataset handle.
 
     Returns:
       True if data points are independent (Durbin-Watson statistic between 1.5 and 2.5),
       False otherwise.
     """
     # Perform Durbin-Watson test on the residuals of the model
-    exog = sm.add_constant(exog)
-    model = sm.OLS(endog, exog).fit()
-    dw_stat = durbin_watson(model.resid)
+    dw_stat = fit_ols(resolve_array(exog), resolve_array(endog)).durbin_watson()
 
     # A Durbin-Watson statistic between 1.5 and 2.5 suggests no autocorrelation
     return 1.5 <= dw_stat <= 2.5
 
 
 @tool(parse_docstring=True)
-def homoscedasticity_tests(exog: list, endog: list) -> bool:
+def homoscedasticity_tests(exog: list | str, endog: list | str) -> bool:
     """
     Performs a Breusch-Pagan test for homoscedasticity (equal variance).
 
     Args:
-        exog: List of explanatory variables.
-        endog: List of dependent (response) variables.
+        exog: List of explanatory variables or a dataset handle.
+        endog: List of dependent (response) variables or a dataset handle.
 
     Returns:
         True if homoscedasticity is satisfied (p-value > 0.05), False otherwise.
     """
     # Perform Breusch-Pagan test for heteroscedasticity
-    exog = sm.add_constant(exog)
-    model = sm.OLS(endog, exog).fit()
-    bp_test_stat, bp_p_value, _, _ = het_breuschpagan(model.resid, model.model.exog)
+    bp_test_stat, bp_p_value = fit_ols(resolve_array(exog), resolve_array(endog)).breusch_pagan()
 
     # If the p-value is greater than 0.05, we do not reject the null hypothesis of homoscedasticity
     return bp_p_value > 0.05
+
+
+@tool(parse_docstring=True)
+def regression_diagnostics(exog: list | str, endog: list | str) -> dict:
+    """
+    Runs the whole linear regression analysis in a single call: the Pearson correlation of every explanatory
+    variable with the response, a multivariate OLS fit, and the residuals normality, data independence and
+    homoscedasticity tests. Prefer it over the individual tools when several explanatory variables are given.
+
+    Args:
+        exog: Matrix of explanatory variables (one row per observation, one column per variable), a list of a single explanatory variable, or a dataset handle.
+        endog: List of dependent (response) variables or a dataset handle.
+
+    Returns:
+        A dictionary with the correlations and fitted coefficients of every variable, the R-squared and the results of the assumption tests.
+    """
+    exog = resolve_array(exog)
+    endog = resolve_array(endog)
+    fit = fit_ols(exog, endog)
+    correlation, correlation_p_value = cached_correlations(exog, endog)
+    normality_stat, normality_p_value = fit.normality_test()
+    dw_stat = fit.durbin_watson()
+    bp_stat, bp_p_value = fit.breusch_pagan()
+
+    params, bse = fit.params, fit.bse
+    return {
+        "nobs": fit.nobs,
+        "rsquared": _round(fit.rsquared),
+        "intercept": {"coefficient": _round(params[0]), "std_error": _round(bse[0])},
+        "variables": [
+            {
+                "name": f"x{i + 1}",
+                "correlation": _round(correlation[i]),
+                "correlation_p_value": _round(correlation_p_value[i]),
+                "coefficient": _round(params[i + 1]),
+                "std_error": _round(bse[i + 1]),
+            }
+            for i in range(len(correlation))
+        ],
+        "residuals_normality": {
+            "test": fit.normality_method,
+            "statistic": _round(normality_stat),
+            "p_value": _round(normality_p_value),
+            "satisfied": normality_p_value > 0.05,
+        },
+        "data_independence": {"durbin_watson": _round(dw_stat), "satisfied": 1.5 <= dw_stat <= 2.5},
+        "homoscedasticity": {
+            "breusch_pagan": _round(bp_stat),
+            "p_value": _round(bp_p_value),
+            "satisfied": bp_p_value > 0.05,
+        },
+    }
+
+
+def warm_up_tools(tools: Sequence[BaseTool]) -> None:
+    """
+    Call every tool once on a small synthetic dataset, so that the lazy imports of statsmodels and scipy
+    and the first-call setup of the tools are done before the first request.
+
+    The synthetic dataset is fitted in a throwaway cache, the entries and the hits and misses of `OLS_FIT_CACHE`
+    (reported by the metrics) only come from the requests.
+    """
+    rng = np.random.default_rng(0)
+    exog = rng.normal(size=20)
+    payload = {"exog": exog.tolist(), "endog": (1.0 + 2.0 * exog + rng.normal(size=20)).tolist()}
+    shared_cache, regression.OLS_FIT_CACHE = regression.OLS_FIT_CACHE, regression.OLSFitCache(maxsize=1)
+    try:
+        for t in tools:
+            t.invoke(payload)
+    finally:
+        regression.OLS_FIT_CACHE = shared_cache
@@ -0,0 +1,155 @@
+import threading
+import time
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import LLMResult
+
+from langgraph_react_agent.metrics import MetricsRegistry
+
+# Upper bounds of the buckets of the model's tokens per second histogram
+TOKEN_RATE_BUCKETS = (1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0, 2500.0)
+
+THREAD_TOTALS = ("prompt_tokens", "completion_tokens", "total_tokens", "model_calls")
+
+
+def get_token_usage(response: LLMResult) -> tuple[int, int] | None:
+    """
+    Prompt and completion tokens reported by the chat model for one call, `None` if it reports none.
+
+    The standard `usage_metadata` of the message is read first, then the provider's `token_usage`
+    (OpenAI names or watsonx.ai ones) from the message's response metadata or the result's output.
+    """
+    generation = response.generations[0][0] if response.generations and response.generations[0] else None
+    message = getattr(generation, "message", None)
+    if message is not None and (usage := getattr(message, "usage_metadata", None)):
+        return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+
+    for metadata in (getattr(message, "response_metadata", None), response.llm_output):
+        if token_usage := (metadata or {}).get("token_usage"):
+            return (
+                token_usage.get("prompt_tokens", token_usage.get("input_token_count", 0)),
+                token_usage.get("completion_tokens", token_usage.get("generated_token_count", 0)),
+            )
+    return None
+
+
+def _tool_outputs(messages: list[BaseMessage]) -> list[tuple[str, int]]:
+    """Names and lengths of the tool outputs sent since the model's last message"""
+    outputs = []
+    for message in reversed(messages):
+        if message.type != "tool":
+            break
+        outputs.append((message.name or "tool", len(str(message.content))))
+    return outputs[::-1]
+
+
+class UsageTracker(BaseCallbackHandler):
+    """
+    Callback handler accounting for the tokens and the throughput of the model calls made for one request.
+
+    Every call records its prompt and completion tokens (as reported by the model), its duration, the time
+    to its first token when it is streamed and its tokens per second: the completion tokens over the time
+    spent generating them, i.e. after the first token when it is streamed. The prompt tokens a call adds
+    to the previous call's prompt and completion are the ones of the tool outputs sent since then, they are
+    split between the tools by the length of their outputs.
+
+    The running totals of the conversation thread are kept in `thread`, which is set in the metadata of
+    the graph's configuration so every checkpoint carries them.
+
+    :param thread: Totals of the thread before the request, read from its latest checkpoint
+    :type thread: dict | None
+
+    :param metrics: Registry observing the time to the first token (`model.time_to_first_token` span)
+        and the tokens per second (`model_tokens_per_second` histogram) of every call
+    :type metrics: MetricsRegistry | None
+    """
+
+    run_inline = True
+
+    def __init__(self, thread: dict | None = None, metrics: MetricsRegistry | None = None) -> None:
+        self.thread = {key: (thread or {}).get(key, 0) for key in THREAD_TOTALS}
+        self.metrics = metrics
+        self.calls: list[dict] = []
+        self._runs: dict[UUID, dict] = {}
+        self._lock = threading.Lock()
+        if metrics is not None:
+            metrics.register_histogram(
+                "model_tokens_per_second", TOKEN_RATE_BUCKETS, "Completion tokens generated per second by the model."
+            )
+
+    def on_chat_model_start(
+        self, serialized: dict[str, Any], messages: list[list[BaseMessage]], *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._runs[run_id] = {
+            "start": time.perf_counter(),
+            "first_token": None,
+            "tool_outputs": _tool_outputs(messages[0]) if messages else [],
+        }
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        if (run := self._runs.get(run_id)) is not None and run["first_token"] is None:
+            run["first_token"] = time.perf_counter()
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._runs.pop(run_id, None)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        if (run := self._runs.pop(run_id, None)) is None:
+            return
+        end = time.perf_counter()
+        prompt_tokens, completion_tokens = get_token_usage(response) or (0, 0)
+        time_to_first_token = run["first_token"] - run["start"] if run["first_token"] is not None else None
+        generation_time = end - (run["first_token"] or run["start"])
+        call = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "duration": end - run["start"],
+            "time_to_first_token": time_to_first_token,
+            "tokens_per_second": completion_tokens / generation_time if completion_tokens and generation_time else None,
+        }
+
+        with self._lock:
+            if self.calls and run["tool_outputs"]:
+                previous = self.calls[-1]
+                added = prompt_tokens - previous["prompt_tokens"] - previous["completion_tokens"]
+                chars = sum(length for _, length in run["tool_outputs"]) or 1
+                call["tool_output_tokens"] = {}
+                for name, length in run["tool_outputs"]:
+                    call["tool_output_tokens"][name] = call["tool_output_tokens"].get(name, 0) + round(
+                        added * length / chars
+                    )
+            self.calls.append(call)
+            self.thread["prompt_tokens"] += prompt_tokens
+            self.thread["completion_tokens"] += completion_tokens
+            self.thread["total_tokens"] += prompt_tokens + completion_tokens
+            self.thread["model_calls"] += 1
+
+        if self.metrics is not None:
+            if time_to_first_token is not None:
+                self.metrics.observe("model.time_to_first_token", time_to_first_token)
+            if call["tokens_per_second"] is not None:
+                self.metrics.observe_value("model_tokens_per_second", call["tokens_per_second"])
+
+    def summary(self) -> dict:
+        """Usage block of the response: the request's totals, its model calls and the thread's totals"""
+        with self._lock:
+            calls = [dict(call) for call in self.calls]
+            thread = dict(self.thread)
+        prompt_tokens = sum(call["prompt_tokens"] for call in calls)
+        completion_tokens = sum(call["completion_tokens"] for call in calls)
+        generation_time = sum(
+            call["completion_tokens"] / call["tokens_per_second"] for call in calls if call["tokens_per_second"]
+        )
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "model_calls": len(calls),
+            "time_to_first_token": calls[0]["time_to_first_token"] if calls else None,
+            "tokens_per_second": completion_tokens / generation_time if generation_time else None,
+            "calls": calls,
+            "thread": thread,
+        }
@@ -0,0 +1,300 @@
+import json
+from importlib.resources import files
+from itertools import chain
+from typing import Any, Callable
+
+# Checks a value found at the given path of the request body
+_Check = Callable[[Any, str], None]
+
+_KEYWORDS = {"type", "properties", "required", "items", "enum", "const", "anyOf", "minItems", "maxItems"}
+# Keywords documenting the schema, they are not validated
+_ANNOTATIONS = {"$schema", "title", "description", "default", "examples"}
+
+_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "null": type(None),
+}
+_JSON_TYPES = {dict: "object", list: "array", str: "string", int: "integer", float: "number", bool: "boolean"}
+
+
+class RequestValidationError(ValueError):
+    """Request body not matching the request schema, `path` locates the offending value (e.g. `$.messages[0].role`)."""
+
+    def __init__(self, path: str, message: str) -> None:
+        super().__init__(f"Invalid request at `{path}`: {message}.")
+        self.path = path
+
+
+def _json_type(value: Any) -> str:
+    return _JSON_TYPES.get(type(value), "null" if value is None else type(value).__name__)
+
+
+def _is_type(name: str) -> Callable[[Any], bool]:
+    types = _TYPES[name]
+    if name in ("integer", "number"):
+        # `bool` is a subclass of `int`, but not a JSON number
+        return lambda value: isinstance(value, types) and not isinstance(value, bool)
+    return lambda value: isinstance(value, types)
+
+
+def _number_types(schema: dict) -> set[type] | None:
+    """Python types of the values matching a schema with only a numeric `type`, `None` for the other schemas"""
+    if schema.keys() - _ANNOTATIONS != {"type"} or schema["type"] not in ("integer", "number"):
+        return None
+    return {int} if schema["type"] == "integer" else {int, float}
+
+
+def _bulk_check(schema: dict) -> Callable[[list], bool] | None:
+    """
+    Check of all the items of an array at once, for items that are numbers or rows of numbers (the data).
+    It returns `False` if the items have to be checked one by one, to locate the invalid one. `None` is returned
+    for the other schemas.
+    """
+    keywords = schema.keys() - _ANNOTATIONS
+    if (number_types := _number_types(schema)) is not None:
+        return lambda values: set(map(type, values)) <= number_types
+
+    if keywords == {"anyOf"}:
+        branches = [_bulk_check(subschema) for subschema in schema["anyOf"]]
+        if None in branches:
+            return None
+        return lambda values: any(branch(values) for branch in branches)
+
+    if (
+        schema.get("type") == "array"
+        and keywords <= {"type", "items", "minItems", "maxItems"}
+        and (number_types := _number_types(schema.get("items", {}))) is not None
+    ):
+        min_items, max_items = schema.get("minItems", 0), schema.get("maxItems")
+
+        def check_rows(values: list) -> bool:
+            if not set(map(type, values)) <= {list}:
+                return False
+            lengths = set(map(len, values))
+            if lengths and (min(lengths) < min_items or (max_items is not None and max(lengths) > max_items)):
+                return False
+            return set(map(type, chain.from_iterable(values))) <= number_types
+
+        return check_rows
+
+    return None
+
+
+def _compile(schema: dict) -> _Check:
+    if unsupported := schema.keys() - _KEYWORDS - _ANNOTATIONS:
+        raise ValueError(f"Unsupported schema keywords: {sorted(unsupported)}.")
+
+    checks: list[_Check] = []
+
+    if "type" in schema:
+        type_name, is_type = schema["type"], _is_type(schema["type"])
+
+        def check_type(value, path):
+            if not is_type(value):
+                raise RequestValidationError(path, f"expected {type_name}, got {_json_type(value)}")
+
+        checks.append(check_type)
+
+    if "enum" in schema or "const" in schema:
+        allowed = schema["enum"] if "enum" in schema else [schema["const"]]
+
+        def check_enum(value, path):
+            if value not in allowed:
+                raise RequestValidationError(path, f"expected one of {allowed}, got {value!r}")
+
+        checks.append(check_enum)
+
+    if required := schema.get("required"):
+
+        def check_required(value, path):
+            if isinstance(value, dict) and (missing := [key for key in required if key not in value]):
+                raise RequestValidationError(path, f"missing required properties {missing}")
+
+        checks.append(check_required)
+
+    if properties := {key: _compile(subschema) for key, subschema in schema.get("properties", {}).items()}:
+
+        def check_properties(value, path):
+            if isinstance(value, dict):
+                for key, check in properties.items():
+                    if key in value:
+                        check(value[key], f"{path}.{key}")
+
+        checks.append(check_properties)
+
+    if "minItems" in schema or "maxItems" in schema:
+        min_items, max_items = schema.get("minItems", 0), schema.get("maxItems")
+
+        def check_size(value, path):
+            if isinstance(value, list) and (
+                len(value) < min_items or (max_items is not None and len(value) > max_items)
+            ):
+                raise RequestValidationError(
+                    path, f"expected between {min_items} and {max_items} items, got {len(value)}"
+                )
+
+        checks.append(check_size)
+
+    if "items" in schema:
+        check_item = _compile(schema["items"])
+        # Long arrays of numbers (the data) are checked at once, items are only checked one by one
+        # to locate an invalid value
+        bulk_check = _bulk_check(schema["items"])
+
+        def check_items(value, path):
+            if not isinstance(value, list):
+                return
+            if bulk_check is not None and bulk_check(value):
+                return
+            for i, item in enumerate(value):
+                check_item(item, f"{path}[{i}]")
+
+        checks.append(check_items)
+
+    if "anyOf" in schema:
+        # Branches whose type does not match the value are skipped without running their checks
+        branches = [
+            (_is_type(subschema["type"]) if "type" in subschema else None, _compile(subschema))
+            for subschema in schema["anyOf"]
+        ]
+
+        def check_any(value, path):
+            errors = []
+            for is_type, check in branches:
+                if is_type is not None and not is_type(value):
+                    continue
+                try:
+                    check(value, path)
+                    return
+                except RequestValidationError as error:
+                    errors.append(error)
+            if len(errors) == 1:
+                raise errors[0]
+            raise RequestValidationError(path, f"{_json_type(value)} does not match any of the allowed schemas")
+
+        checks.append(check_any)
+
+    if len(checks) == 1:
+        return checks[0]
+
+    def check_all(value, path):
+        for check in checks:
+            check(value, path)
+
+    return check_all
+
+
+def compile_schema(schema: dict) -> Callable[..., None]:
+    """
+    Compile a JSON schema into a validator raising `RequestValidationError` for the first invalid value.
+
+    The schema is walked once and turned into nested checks, so validating a request does not interpret
+    the schema again. Only the subset of draft-07 used by the request schema is supported (`type`, `properties`,
+    `required`, `items`, `enum`, `const`, `anyOf`, `minItems` and `maxItems`), other keywords raise `ValueError`.
+    """
+    check = _compile(schema)
+
+    def validate(value: Any, path: str = "$") -> None:
+        check(value, path)
+
+    return validate
+
+
+def _row_width(row: Any) -> int | None:
+    """Number of variables of a row of `exog`, `None` for a single number"""
+    return len(row) if isinstance(row, list) else None
+
+
+def _describe_row(width: int | None) -> str:
+    return "a number" if width is None else f"a row of {width} variables"
+
+
+def check_data(payload: Any, path: str = "$") -> None:
+    """
+    Check the `data` of the request's messages beyond what the request schema expresses: every observation of
+    `exog` is a number or a row of the same number of variables, and `exog` and `endog` have the same number of
+    observations. References to the dataset store are checked when they are resolved.
+    """
+    messages = payload.get("messages") if isinstance(payload, dict) else None
+    for i, message in enumerate(messages if isinstance(messages, list) else []):
+        data = message.get("data") if isinstance(message, dict) else None
+        if not isinstance(data, dict):
+            continue
+        data_path = f"{path}.messages[{i}].data"
+        exog, endog = data.get("exog"), data.get("endog")
+        if isinstance(exog, list) and exog and len(widths := set(map(_row_width, exog))) > 1:
+            expected = _row_width(exog[0])
+            j, row = next((j, row) for j, row in enumerate(exog) if _row_width(row) != expected)
+            raise RequestValidationError(
+                f"{data_path}.exog[{j}]",
+                f"expected {_describe_row(expected)} like `exog[0]`, got {_describe_row(_row_width(row))}",
+            )
+        if isinstance(exog, list) and isinstance(endog, list) and len(exog) != len(endog):
+            raise RequestValidationError(
+                f"{data_path}.endog", f"expected {len(exog)} observations like `exog`, got {len(endog)}"
+            )
+
+
+def load_request_schema(
+    max_messages: int | None = None,
+    max_observations: int | None = None,
+    max_variables: int | None = None,
+    max_conversations: int | None = None,
+) -> dict:
+    """
+    Request schema of the AI service (`schema/request.json`) with the size limits of the request.
+
+    :param max_messages: Maximum number of messages in one request
+    :type max_messages: int | None
+
+    :param max_observations: Maximum number of observations in the `exog` and `endog` arrays of a message's `data`
+    :type max_observations: int | None
+
+    :param max_variables: Maximum number of explanatory variables in a row of `exog`
+    :type max_variables: int | None
+
+    :param max_conversations: Maximum number of conversations in a batch request
+    :type max_conversations: int | None
+    """
+    schema = json.loads(files("langgraph_react_agent").joinpath("schema", "request.json").read_text())
+    schema = schema["application/json"]
+
+    messages = schema["properties"]["messages"]
+    data = messages["items"]["properties"]["data"]["properties"]
+    if max_messages is not None:
+        messages["maxItems"] = max_messages
+    # The data is an array of values or a reference (a string) to a stored dataset
+    exog, endog = (next(s for s in data[key]["anyOf"] if s["type"] == "array") for key in ("exog", "endog"))
+    if max_observations is not None:
+        exog["maxItems"] = endog["maxItems"] = max_observations
+    if max_variables is not None:
+        for subschema in exog["items"]["anyOf"]:
+            if subschema["type"] == "array":
+                subschema["maxItems"] = max_variables
+    if max_conversations is not None:
+        schema["properties"]["conversations"]["maxItems"] = max_conversations
+    return schema
+
+
+def request_validator(
+    max_messages: int | None = None,
+    max_observations: int | None = None,
+    max_variables: int | None = None,
+    max_conversations: int | None = None,
+) -> Callable[..., None]:
+    """
+    Validator of the request bodies compiled from the request schema with the given size limits, followed by
+    `check_data`. It is called with the request body and, optionally, the path of the body (`$` by default).
+    """
+    check_schema = compile_schema(load_request_schema(max_messages, max_observations, max_variables, max_conversations))
+
+    def validate(payload: Any, path: str = "$") -> None:
+        check_schema(payload, path)
+        check_data(payload, path)
+
+    return validate
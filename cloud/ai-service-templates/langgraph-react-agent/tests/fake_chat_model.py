@@ -0,0 +1,200 @@
+import asyncio
+import json
+import re
+import time
+from collections.abc import AsyncIterator, Iterator
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import Field
+
+from langgraph_react_agent.datasets import HANDLE_PREFIX
+
+
+class FakeChatModel(GenericFakeChatModel):
+    """Deterministic stand-in for `ChatWatsonx` which always answers with the same message."""
+
+    content: str = "This is a scripted answer."
+    messages: Iterator = Field(default_factory=lambda: iter(()))
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.messages = iter([AIMessage(content=self.content)])
+        return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    def bind_tools(self, tools, **kwargs) -> "FakeChatModel":
+        return self
+
+
+# Default transcript: all the assumption tests in one step, then a final answer
+DEFAULT_TRANSCRIPT = [
+    [
+        "pearson_correlation",
+        "check_residuals_normality",
+        "data_independence_test",
+        "homoscedasticity_tests",
+    ],
+    "The data shows a strong linear relationship between the explanatory and the response variable. The residuals "
+    "are normally distributed, the observations are independent and their variance is constant, so all the "
+    "assumptions of the linear regression are met and an ordinary least squares model is a proper choice for "
+    "this data.",
+]
+
+_HANDLE_PATTERN = re.compile(rf"{HANDLE_PREFIX}[0-9a-f]{{12}}")
+
+
+def _count_tokens(message: BaseMessage) -> int:
+    """Number of words of the message's content and tool calls"""
+    text = str(message.content) + "".join(
+        f" {tool_call['name']} {json.dumps(tool_call['args'])}" for tool_call in getattr(message, "tool_calls", [])
+    )
+    return len(text.split())
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Deterministic stand-in for `ChatWatsonx` replaying a scripted tool-calling transcript.
+
+    Every step of the transcript is either the final answer (a string) or a list of names of the tools
+    called in that step. The tools are called with the dataset handles found in the last user message.
+    The position in the transcript is derived from the conversation, so a single instance can serve
+    many concurrent conversations. The answers are produced with a fixed latency before the first
+    token and a fixed token rate, both for the regular and the streaming calls. The token usage
+    is reported as `ChatWatsonx` does, counting the words of the messages and of the tool calls.
+
+    :param transcript: Steps replayed after every user message
+    :type transcript: list[str | list[str]]
+
+    :param latency: Time to the first token in seconds
+    :type latency: float
+
+    :param token_rate: Number of generated tokens (words) per second, `0` generates all of them at once
+    :type token_rate: float
+    """
+
+    transcript: list = Field(default_factory=lambda: list(DEFAULT_TRANSCRIPT))
+    latency: float = 0.0
+    token_rate: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-chat-model"
+
+    def bind_tools(self, tools, **kwargs) -> "ScriptedChatModel":
+        return self
+
+    def _next_step(self, messages: list[BaseMessage]) -> AIMessage:
+        last_user = max(i for i, m in enumerate(messages) if isinstance(m, HumanMessage))
+        step = sum(isinstance(m, AIMessage) for m in messages[last_user:])
+        action = self.transcript[min(step, len(self.transcript) - 1)]
+        if isinstance(action, str):
+            return AIMessage(content=action)
+
+        handles = _HANDLE_PATTERN.findall(str(messages[last_user].content))
+        args = {"exog": handles[0], "endog": handles[1]} if len(handles) >= 2 else {"exog": [], "endog": []}
+        tool_calls = [
+            {"name": name, "args": args, "id": f"call-{step}-{i}", "type": "tool_call"}
+            for i, name in enumerate(action)
+        ]
+        # `ChatWatsonx` reports the tool calls in the additional kwargs as well
+        raw_tool_calls = [
+            {
+                "id": tool_call["id"],
+                "type": "function",
+                "function": {"name": tool_call["name"], "arguments": json.dumps(args)},
+            }
+            for tool_call in tool_calls
+        ]
+        return AIMessage(content="", tool_calls=tool_calls, additional_kwargs={"tool_calls": raw_tool_calls})
+
+    def _usage(self, messages: list[BaseMessage], message: AIMessage) -> dict:
+        input_tokens = sum(_count_tokens(m) for m in messages)
+        output_tokens = _count_tokens(message)
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+
+    def _tokens(self, message: AIMessage) -> list[str]:
+        return re.findall(r"\S+\s*", message.content) if message.content else [""]
+
+    def _delays(self, message: AIMessage) -> Iterator[float]:
+        """Sleep before every token of the message"""
+        for i in range(len(self._tokens(message))):
+            yield (self.latency if i == 0 else 0.0) + (1 / self.token_rate if self.token_rate else 0.0)
+
+    def _chunks(self, message: AIMessage, usage: dict) -> Iterator[AIMessageChunk]:
+        tokens = self._tokens(message)
+        for i, token in enumerate(tokens):
+            if i == len(tokens) - 1:
+                yield AIMessageChunk(
+                    content=token,
+                    tool_call_chunks=[
+                        {"name": c["name"], "args": json.dumps(c["args"]), "id": c["id"], "index": j}
+                        for j, c in enumerate(message.tool_calls)
+                    ],
+                    additional_kwargs=message.additional_kwargs,
+                    response_metadata={"finish_reason": "tool_calls" if message.tool_calls else "stop"},
+                    usage_metadata=usage,
+                )
+            else:
+                yield AIMessageChunk(content=token)
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs,
+    ) -> ChatResult:
+        message = self._next_step(messages)
+        time.sleep(sum(self._delays(message)))
+        message.response_metadata["finish_reason"] = "tool_calls" if message.tool_calls else "stop"
+        message.usage_metadata = self._usage(messages, message)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs,
+    ) -> ChatResult:
+        message = self._next_step(messages)
+        await asyncio.sleep(sum(self._delays(message)))
+        message.response_metadata["finish_reason"] = "tool_calls" if message.tool_calls else "stop"
+        message.usage_metadata = self._usage(messages, message)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs,
+    ) -> Iterator[ChatGenerationChunk]:
+        message = self._next_step(messages)
+        chunks = self._chunks(message, self._usage(messages, message))
+        for delay, chunk in zip(self._delays(message), chunks):
+            time.sleep(delay)
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.content, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        message = self._next_step(messages)
+        chunks = self._chunks(message, self._usage(messages, message))
+        for delay, chunk in zip(self._delays(message), chunks):
+            await asyncio.sleep(delay)
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.content, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
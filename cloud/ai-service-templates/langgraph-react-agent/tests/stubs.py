@@ -0,0 +1,65 @@
+"""Stand-ins for the watsonx.ai runtime, running the AI service offline in the tests and the benchmarks."""
+import uuid
+from unittest import mock
+
+import numpy as np
+from ibm_watsonx_ai.utils.auth import TokenAuth
+
+from tests.fake_chat_model import ScriptedChatModel
+
+import ai_service
+
+
+class StubAPIClient:
+    """Stand-in for `ibm_watsonx_ai.APIClient`, the chat model is replaced so no request is sent"""
+
+    def __init__(self, credentials=None, **kwargs) -> None:
+        self.credentials = credentials
+        self._auth_method = TokenAuth(credentials.token if credentials else "token")
+
+    @property
+    def token(self) -> str:
+        return self._auth_method.get_token()
+
+    def set_token(self, token: str) -> None:
+        self._auth_method.set_token(token)
+
+
+class StubRuntimeContext:
+    """Stand-in for `ibm_watsonx_ai.deployments.RuntimeContext` carrying a single request"""
+
+    def __init__(self, payload: dict | None = None, token: str = "token") -> None:
+        self.payload = payload or {}
+        self.token = token
+
+    def generate_token(self) -> str:
+        return self.token
+
+    def get_token(self) -> str:
+        return self.token
+
+    def get_json(self) -> dict:
+        return self.payload
+
+
+def make_payload(rng: np.random.Generator, observations: int) -> dict:
+    exog = rng.normal(10.0, 2.0, size=observations)
+    endog = 1.5 * exog + rng.normal(size=observations)
+    return {
+        "thread_id": str(uuid.uuid4()),
+        "messages": [
+            {
+                "role": "user",
+                "content": "Is linear regression a proper model for my data?",
+                "data": {"exog": exog.round(4).tolist(), "endog": endog.round(4).tolist()},
+            }
+        ],
+    }
+
+
+def build_ai_service(chat_model: ScriptedChatModel, custom: dict) -> tuple:
+    with (
+        mock.patch("ibm_watsonx_ai.APIClient", StubAPIClient),
+        mock.patch("langchain_ibm.ChatWatsonx", lambda **kwargs: chat_model),
+    ):
+        return ai_service.deployable_ai_service(StubRuntimeContext(), **custom)
@@ -0,0 +1,76 @@
+from unittest import mock
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from langgraph_react_agent.agent import get_graph_closure, get_message_watermark
+from tests.fake_chat_model import ScriptedChatModel
+from tests.stubs import StubAPIClient
+
+
+@pytest.fixture
+def chat_models():
+    created = []
+
+    def chat_watsonx(**kwargs):
+        created.append(ScriptedChatModel())
+        return created[-1]
+
+    with mock.patch("langchain_ibm.ChatWatsonx", chat_watsonx):
+        yield created
+
+
+def test_graphs_are_cached_by_system_prompt(chat_models):
+    get_graph = get_graph_closure(StubAPIClient(), "scripted")
+
+    default = get_graph()
+    assert get_graph() is default
+    # A system message and its text share the graph
+    assert get_graph(SystemMessage(content="Be brief.")) is get_graph("Be brief.")
+    assert get_graph("Be brief.") is not default
+
+
+def test_least_recently_used_graph_is_evicted(chat_models):
+    get_graph = get_graph_closure(StubAPIClient(), "scripted", graph_cache_size=2)
+
+    first, second = get_graph("first"), get_graph("second")
+    assert get_graph("first") is first  # `second` is now the least recently used graph
+    get_graph("third")
+
+    assert get_graph("first") is first
+    assert get_graph("second") is not second
+
+
+def test_graphs_share_the_chat_model(chat_models):
+    get_graph = get_graph_closure(StubAPIClient(), "scripted", graph_cache_size=1)
+
+    for system_prompt in ("first", "second", "first"):
+        get_graph(system_prompt)
+
+    # Three graphs compiled (one of them twice after its eviction), one chat model
+    assert len(chat_models) == 1
+
+
+class TestMessageWatermark:
+    @pytest.fixture
+    def history(self):
+        return [
+            HumanMessage(content="Hello!", id="question-1"),
+            AIMessage(content="Hi!", id="answer-1"),
+        ]
+
+    def test_new_thread(self, history):
+        assert get_message_watermark(history, "question-1") == 1
+
+    def test_thread_with_history(self, history):
+        state_messages = [
+            *history,
+            HumanMessage(content="How are you?", id="question-2"),
+            AIMessage(content="Fine.", id="answer-2"),
+        ]
+        assert state_messages[get_message_watermark(state_messages, "question-2"):] == state_messages[3:]
+
+    def test_without_new_input_messages(self, history):
+        # The request only resumes the thread, none of its messages carries the id
+        assert get_message_watermark(history, "missing") == 0
+        assert get_message_watermark([], "missing") == 0
@@ -0,0 +1,124 @@
+import asyncio
+import os
+import subprocess
+import sys
+import textwrap
+import time
+
+import numpy as np
+import pytest
+
+from langgraph_react_agent.datasets import DATASETS
+from tests.fake_chat_model import ScriptedChatModel
+from tests.stubs import StubRuntimeContext, build_ai_service, make_payload
+
+
+@pytest.fixture(scope="module")
+def ai_service():
+    return build_ai_service(ScriptedChatModel(), {"model_id": "scripted", "thread_id": "thread-1"})
+
+
+@pytest.fixture(scope="module")
+def async_ai_service():
+    return build_ai_service(
+        ScriptedChatModel(latency=0.1), {"model_id": "scripted", "thread_id": "thread-1", "async_handlers": True}
+    )
+
+
+@pytest.fixture
+def payload():
+    return make_payload(np.random.default_rng(0), 25)
+
+
+def test_generate(ai_service, payload):
+    generate, _ = ai_service
+    messages = [c["message"] for c in generate(StubRuntimeContext(payload))["body"]["choices"]]
+
+    tool_calls = messages[0]["tool_calls"]
+    assert len(tool_calls) == 4
+    assert [m["tool_call_id"] for m in messages[1:5]] == [c["id"] for c in tool_calls]
+    assert all(m["duration"] <= m["step_duration"] for m in messages[1:5])
+    assert messages[-1]["content"].startswith("The data shows")
+
+
+def test_generate_stream(ai_service, payload):
+    _, generate_stream = ai_service
+    *chunks, last = generate_stream(StubRuntimeContext(payload))
+    messages = [chunk["choices"][0]["message"] for chunk in chunks]
+
+    assert len(messages[0]["tool_calls"]) == 4
+    assert sum(m["role"] == "tool" for m in messages) == 4
+    assert "".join(m.get("delta", "") for m in messages).startswith("The data shows")
+    # The usage of the request is sent in a last chunk without choices
+    assert last["choices"] == [] and last["usage"]["model_calls"] == 2
+
+
+def test_generate_returns_only_new_messages(ai_service, payload):
+    generate, _ = ai_service
+    for _ in range(2):
+        response = generate(StubRuntimeContext(payload))
+        # tool calls, 4 tool messages and the final answer of this request only
+        assert len(response["body"]["choices"]) == 6
+
+
+def test_generate_resumes_thread_without_new_messages(ai_service, payload):
+    generate, _ = ai_service
+    generate(StubRuntimeContext(payload))
+
+    response = generate(StubRuntimeContext({"thread_id": payload["thread_id"], "messages": []}))
+    # only the answer generated for this request, not the thread's history
+    assert [c["message"]["role"] for c in response["body"]["choices"]] == ["assistant"]
+
+
+def test_agenerate_serves_concurrent_requests(async_ai_service):
+    agenerate, _ = async_ai_service
+    rng = np.random.default_rng(0)
+    payloads = [make_payload(rng, 25) for _ in range(10)]
+
+    async def send_all():
+        return await asyncio.gather(*(agenerate(StubRuntimeContext(p)) for p in payloads))
+
+    start = time.perf_counter()
+    responses = asyncio.run(send_all())
+    elapsed = time.perf_counter() - start
+
+    # 2 model calls of 0.1 s per request, the requests do not wait for each other
+    assert elapsed < 1.0
+    for p, response in zip(payloads, responses):
+        messages = [c["message"] for c in response["body"]["choices"]]
+        assert len(messages) == 6
+        # every request analyses its own data
+        exog_handle = DATASETS.register(p["messages"][0]["data"]["exog"])
+        assert exog_handle in messages[0]["tool_calls"][0]["function"]["arguments"]
+
+
+def test_agenerate_stream(async_ai_service, payload):
+    _, agenerate_stream = async_ai_service
+
+    async def collect():
+        return [chunk async for chunk in agenerate_stream(StubRuntimeContext(payload))]
+
+    *chunks, last = asyncio.run(collect())
+    messages = [chunk["choices"][0]["message"] for chunk in chunks]
+    assert len(messages[0]["tool_calls"]) == 4
+    assert sum(m["role"] == "tool" for m in messages) == 4
+    assert "".join(m.get("delta", "") for m in messages).startswith("The data shows")
+    assert last["choices"] == [] and last["usage"]["model_calls"] == 2
+
+
+@pytest.mark.parametrize("warm_up", [False, True])
+def test_startup_defers_heavy_imports(warm_up):
+    # A fresh interpreter, the modules are already imported in the tests' process
+    script = textwrap.dedent(f"""
+        import sys
+        from tests.fake_chat_model import ScriptedChatModel
+        from tests.stubs import build_ai_service
+
+        build_ai_service(ScriptedChatModel(), {{"model_id": "scripted", "warm_up": {warm_up}}})
+        print(",".join(name for name in ("statsmodels", "scipy.stats") if name in sys.modules))
+    """)
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    process = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True, env=env)
+
+    imported = process.stdout.split()[-1] if process.stdout.strip() else ""
+    assert imported == ("statsmodels,scipy.stats" if warm_up else "")
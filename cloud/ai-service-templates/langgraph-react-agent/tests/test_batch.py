@@ -0,0 +1,127 @@
+import asyncio
+import json
+import threading
+import time
+from importlib.resources import files
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from langgraph_react_agent.batch import BatchRunner
+from langgraph_react_agent.checkpoint import BoundedMemorySaver
+from langgraph_react_agent.validation import RequestValidationError, compile_schema
+from tests.fake_chat_model import ScriptedChatModel
+from tests.stubs import StubRuntimeContext, build_ai_service, make_payload
+
+
+def conversations(n: int, **fields) -> list[dict]:
+    """Conversations without a thread id, unless given in `fields`"""
+    rng = np.random.default_rng(0)
+    return [{"messages": make_payload(rng, 25)["messages"]} | fields for _ in range(n)]
+
+
+class TestBatchRunner:
+    def test_runs_at_most_max_workers_conversations_at_once(self):
+        running, peak, lock = 0, 0, threading.Lock()
+
+        def handle(index, conversation, generated):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+            return {"choices": [index]}
+
+        body = BatchRunner(max_workers=3).run([{"messages": []} for _ in range(10)], handle)
+
+        assert peak == 3
+        assert [result["choices"] for result in body["conversations"]] == [[i] for i in range(10)]
+        assert body["batch"]["succeeded"] == 10
+        assert body["batch"]["duration"] < body["batch"]["conversation_duration"]["sum"]
+
+    def test_errors_are_reported_per_conversation(self):
+        def handle(index, conversation, generated):
+            if index == 1:
+                raise RuntimeError("model failed")
+            return {"choices": []}
+
+        items = [{"messages": []}, {"messages": []}, {"messages": [], "thread_id": "a"}, {"messages": [], "thread_id": "a"}]
+        results = BatchRunner().run(items, handle)["conversations"]
+
+        assert [("error" in result) for result in results] == [False, True, False, True]
+        assert results[1]["error"] == {"type": "RuntimeError", "message": "model failed"}
+        assert "used by another conversation" in results[3]["error"]["message"]
+
+    def test_threads_are_isolated(self):
+        items = BatchRunner.isolate([{"messages": []}, {"messages": []}, {"messages": [], "thread_id": "mine"}])
+
+        thread_ids = [conversation["thread_id"] for conversation, _, _ in items]
+        assert len(set(thread_ids)) == 3 and thread_ids[2] == "mine"
+        assert [generated for _, generated, _ in items] == [True, True, False]
+
+    def test_async_runs_at_most_max_workers_conversations_at_once(self):
+        running, peak = 0, 0
+
+        async def handle(index, conversation, generated):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return {"choices": []}
+
+        body = asyncio.run(BatchRunner(max_workers=2).arun([{"messages": []} for _ in range(6)], handle))
+
+        assert peak == 2
+        assert body["batch"]["conversations"] == 6
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_generate_answers_a_batch(use_async):
+    generate, _ = build_ai_service(
+        ScriptedChatModel(latency=0.05), {"model_id": "scripted", "batch_workers": 4, "async_handlers": use_async}
+    )
+    batch = conversations(4) + [{"messages": [{"role": "robot", "content": "Hello!"}]}]
+    context = StubRuntimeContext({"messages": [], "conversations": batch})
+
+    start = time.perf_counter()
+    body = generate(context) if not use_async else asyncio.run(generate(context))
+    duration = time.perf_counter() - start
+
+    results = body["body"]["conversations"]
+    for result in results[:4]:
+        assert result["choices"][-1]["message"]["content"].startswith("The data shows")
+        assert result["usage"]["model_calls"] == 2
+    assert results[4]["error"]["type"] == "RequestValidationError"
+    assert "$.conversations[4].messages[0].role" in results[4]["error"]["message"]
+    assert len({result["thread_id"] for result in results}) == 5
+    # Every conversation makes two calls of the model, the conversations run concurrently
+    assert duration < 4 * 2 * 0.05
+    assert body["body"]["batch"]["failed"] == 1
+    # Deployments validating the responses against the response schema accept the batch's
+    schema = json.loads(files("langgraph_react_agent").joinpath("schema", "response.json").read_text())
+    for key in ("choices", "conversations", "batch"):
+        compile_schema(schema["application/json"]["properties"][key])(body["body"][key], f"$.{key}")
+
+
+@pytest.mark.parametrize("keep_threads", [False, True])
+def test_batch_threads_are_deleted_unless_kept(keep_threads):
+    generate, _ = build_ai_service(ScriptedChatModel(), {"model_id": "scripted", "batch_keep_threads": keep_threads})
+    batch = conversations(2) + conversations(1, thread_id="mine")
+
+    with mock.patch.object(BoundedMemorySaver, "delete_thread", autospec=True) as delete_thread:
+        results = generate(StubRuntimeContext({"messages": [], "conversations": batch}))["body"]["conversations"]
+
+    deleted = {call.args[1] for call in delete_thread.call_args_list}
+    # Threads named in the request are always kept
+    assert deleted == (set() if keep_threads else {result["thread_id"] for result in results[:2]})
+
+
+def test_streaming_handlers_reject_batches():
+    _, generate_stream = build_ai_service(ScriptedChatModel(), {"model_id": "scripted"})
+
+    with pytest.raises(RequestValidationError, match="only answered by `generate`"):
+        next(generate_stream(StubRuntimeContext({"messages": [], "conversations": conversations(1)})))
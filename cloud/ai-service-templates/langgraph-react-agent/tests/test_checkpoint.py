@@ -0,0 +1,229 @@
+import sqlite3
+import time
+from typing import Annotated, TypedDict
+from unittest import mock
+
+import pytest
+from langgraph.graph import StateGraph
+from langgraph.graph.message import add_messages
+
+from langgraph_react_agent.checkpoint import BoundedMemorySaver, SqliteCheckpointer
+
+
+class State(TypedDict):
+    messages: Annotated[list, add_messages]
+
+
+def echo(state: State) -> dict:
+    return {"messages": [("ai", f"echo: {state['messages'][-1].content}")]}
+
+
+def build_graph(checkpointer):
+    builder = StateGraph(State)
+    builder.add_node("echo", echo)
+    builder.set_entry_point("echo")
+    builder.set_finish_point("echo")
+    return builder.compile(checkpointer=checkpointer)
+
+
+def chat(graph, thread_id: str, content: str = "hello") -> dict:
+    return graph.invoke(
+        {"messages": [("user", content)]}, {"configurable": {"thread_id": thread_id}}
+    )
+
+
+class TestBoundedMemorySaver:
+    def test_keeps_latest_checkpoints_per_thread(self):
+        saver = BoundedMemorySaver(max_checkpoints_per_thread=2)
+        graph = build_graph(saver)
+        for i in range(5):
+            result = chat(graph, "t1", f"message {i}")
+
+        assert len(result["messages"]) == 10
+        assert len(list(saver.list({"configurable": {"thread_id": "t1"}}))) == 2
+        assert saver.footprint()["checkpoints"] == 2
+        # the conversation state is still complete
+        state = graph.get_state({"configurable": {"thread_id": "t1"}})
+        assert len(state.values["messages"]) == 10
+
+    def test_evicts_least_recently_used_thread(self):
+        saver = BoundedMemorySaver(max_threads=2)
+        graph = build_graph(saver)
+        chat(graph, "t1")
+        chat(graph, "t2")
+        chat(graph, "t1")
+        chat(graph, "t3")
+
+        assert saver.footprint()["threads"] == 2
+        assert saver.footprint()["evicted_threads"] == 1
+        assert saver.get_tuple({"configurable": {"thread_id": "t2"}}) is None
+        assert not any(k[0] == "t2" for k in saver.blobs)
+        # an evicted thread starts a new conversation
+        assert len(chat(graph, "t2")["messages"]) == 2
+
+    def test_evicts_idle_threads(self):
+        saver = BoundedMemorySaver(ttl=0.01)
+        graph = build_graph(saver)
+        chat(graph, "t1")
+        time.sleep(0.02)
+        chat(graph, "t2")
+
+        assert saver.get_tuple({"configurable": {"thread_id": "t1"}}) is None
+        assert saver.footprint()["threads"] == 1
+
+    def test_memory_cap(self):
+        saver = BoundedMemorySaver(max_checkpoints_per_thread=3)
+        graph = build_graph(saver)
+        chat(graph, "t1")
+        thread_bytes = saver.footprint()["bytes"]
+        assert thread_bytes > 0
+
+        saver.max_bytes = int(2.5 * thread_bytes)
+        for thread_id in ("t2", "t3", "t4"):
+            chat(graph, thread_id)
+
+        assert saver.footprint()["bytes"] <= saver.max_bytes
+        assert saver.footprint()["threads"] == 2
+
+    def test_tracked_bytes_match_stored_entries(self):
+        saver = BoundedMemorySaver(max_checkpoints_per_thread=3)
+        graph = build_graph(saver)
+        for i in range(6):
+            chat(graph, "t1", f"message {i}")
+            chat(graph, "t2", f"message {i}" * 10)
+
+        stored = sum(
+            len(checkpoint[1]) + len(metadata[1])
+            for namespaces in saver.storage.values()
+            for checkpoints in namespaces.values()
+            for checkpoint, metadata, _ in checkpoints.values()
+        )
+        stored += sum(len(blob[1]) for blob in saver.blobs.values())
+        stored += sum(len(w[2][1]) for writes in saver.writes.values() for w in writes.values())
+        assert saver.footprint()["bytes"] == stored
+
+    def test_writes_of_evicted_thread_are_counted(self):
+        saver = BoundedMemorySaver()
+        chat(build_graph(saver), "t1")
+        config = saver.get_tuple({"configurable": {"thread_id": "t1"}}).config
+        saver.delete_thread("t1")
+        saver.put_writes(config, [("messages", "late"), ("messages", "later")], "task")
+
+        assert saver.footprint()["dropped_writes"] == 2
+        assert "t1" not in saver.storage
+
+    def test_unknown_thread_is_not_stored(self):
+        saver = BoundedMemorySaver()
+        assert saver.get_tuple({"configurable": {"thread_id": "unknown"}}) is None
+        assert list(saver.list({"configurable": {"thread_id": "unknown"}})) == []
+        assert "unknown" not in saver.storage
+
+    def test_invalid_limits(self):
+        with pytest.raises(ValueError):
+            BoundedMemorySaver(max_threads=0)
+
+
+class TestSqliteCheckpointer:
+    def test_state_survives_restart(self, tmp_path):
+        path = str(tmp_path / "checkpoints.sqlite")
+        saver = SqliteCheckpointer(path)
+        chat(build_graph(saver), "t1", "first")
+        saver.close()
+
+        saver = SqliteCheckpointer(path)
+        result = chat(build_graph(saver), "t1", "second")
+
+        assert [m.content for m in result["messages"]] == [
+            "first",
+            "echo: first",
+            "second",
+            "echo: second",
+        ]
+        assert saver.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def test_messages_stored_as_deltas(self):
+        saver = SqliteCheckpointer(":memory:", snapshot_every=3)
+        graph = build_graph(saver)
+        for i in range(4):
+            result = chat(graph, "t1", f"message {i}")
+
+        bases = [
+            row[0]
+            for row in saver.conn.execute(
+                "SELECT base_version FROM blobs WHERE channel = 'messages' ORDER BY rowid"
+            )
+        ]
+        # full snapshot, then at most `snapshot_every` deltas in a row
+        assert bases[0] is None
+        assert all(b is not None for b in bases[1:4])
+        assert bases[4] is None
+        state = graph.get_state({"configurable": {"thread_id": "t1"}})
+        assert state.values["messages"] == result["messages"]
+
+    def test_list_and_delete_thread(self):
+        saver = SqliteCheckpointer(":memory:")
+        graph = build_graph(saver)
+        chat(graph, "t1")
+        chat(graph, "t2")
+        config = {"configurable": {"thread_id": "t1"}}
+
+        checkpoints = list(saver.list(config))
+        assert len(checkpoints) == 3
+        assert len(list(saver.list(config, limit=1))) == 1
+        assert list(saver.list(config, before=checkpoints[0].config)) == checkpoints[1:]
+
+        saver.delete_thread("t1")
+        assert saver.get_tuple(config) is None
+        assert saver.get_tuple({"configurable": {"thread_id": "t2"}}) is not None
+
+    def test_list_filters_metadata_in_query(self):
+        saver = SqliteCheckpointer(":memory:")
+        graph = build_graph(saver)
+        chat(graph, "t1", "first")
+        chat(graph, "t1", "second")
+        config = {"configurable": {"thread_id": "t1"}}
+
+        inputs = list(saver.list(config, filter={"source": "input"}))
+        assert [c.metadata["step"] for c in inputs] == [2, -1]
+        assert [c.metadata["step"] for c in saver.list(config, filter={"source": "loop"}, limit=1)] == [4]
+        assert list(saver.list(config, filter={"source": "loop", "step": 0})) == [
+            c for c in saver.list(config) if c.metadata["step"] == 0
+        ]
+        assert list(saver.list(config, filter={"source": "unknown"})) == []
+
+    def test_writes_are_committed_with_the_next_checkpoint(self, tmp_path):
+        path = str(tmp_path / "checkpoints.sqlite")
+        saver = SqliteCheckpointer(path)
+        chat(build_graph(saver), "t1")
+        config = saver.get_tuple({"configurable": {"thread_id": "t1"}}).config
+        other = sqlite3.connect(path)
+
+        saver.put_writes(config, [("messages", "pending")], "task-1")
+        # buffered until the thread's next checkpoint, but visible to the readers of the checkpointer
+        assert other.execute("SELECT COUNT(*) FROM writes WHERE task_id = 'task-1'").fetchone() == (0,)
+        assert ("task-1", "messages", "pending") in saver.get_tuple(config).pending_writes
+
+        # another request's failing checkpoint neither commits nor discards the writes
+        with mock.patch.object(saver, "_put_blob", side_effect=sqlite3.OperationalError), pytest.raises(
+            sqlite3.OperationalError
+        ):
+            chat(build_graph(saver), "t2")
+        assert other.execute("SELECT COUNT(*) FROM writes WHERE task_id = 'task-1'").fetchone() == (0,)
+
+        chat(build_graph(saver), "t1")
+        assert other.execute("SELECT COUNT(*) FROM writes WHERE task_id = 'task-1'").fetchone() == (1,)
+
+    def test_special_and_excess_writes_are_committed_right_away(self, tmp_path):
+        path = str(tmp_path / "checkpoints.sqlite")
+        saver = SqliteCheckpointer(path, max_buffered_writes=2)
+        chat(build_graph(saver), "t1")
+        config = saver.get_tuple({"configurable": {"thread_id": "t1"}}).config
+        other = sqlite3.connect(path)
+
+        saver.put_writes(config, [("__error__", "failed")], "task-1")
+        assert other.execute("SELECT COUNT(*) FROM writes WHERE task_id = 'task-1'").fetchone() == (1,)
+
+        saver.put_writes(config, [("a", 1), ("b", 2)], "task-2")
+        assert other.execute("SELECT COUNT(*) FROM writes WHERE task_id = 'task-2'").fetchone() == (0,)
+        saver.put_writes(config, [("c", 3)], "task-3")
+        assert other.execute("SELECT COUNT(*) FROM writes WHERE task_id IN ('task-2', 'task-3')").fetchone() == (3,)
@@ -0,0 +1,87 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from langgraph_react_agent.compaction import HistoryCompactor, split_turns
+from tests.fake_chat_model import ScriptedChatModel
+from tests.stubs import StubRuntimeContext, build_ai_service, make_payload
+
+SYSTEM = SystemMessage(content="system prompt")
+
+
+def make_turn(i: int, output_chars: int = 2000) -> list:
+    return [
+        HumanMessage(content=f"question {i}"),
+        AIMessage(content="", tool_calls=[{"name": "tool", "args": {}, "id": f"call-{i}"}]),
+        ToolMessage(content="x" * output_chars, name="tool", tool_call_id=f"call-{i}"),
+        AIMessage(content=f"answer {i}"),
+    ]
+
+
+HISTORY = [message for i in range(4) for message in make_turn(i)]
+
+
+class TestHistoryCompactor:
+    def test_split_turns(self):
+        assert [len(turn) for turn in split_turns(HISTORY)] == [4] * 4
+
+    def test_digests_old_tool_outputs_only(self):
+        prompt, report = HistoryCompactor(keep_turns=2, digest_chars=50).compact(SYSTEM, HISTORY)
+
+        assert prompt[0] is SYSTEM
+        assert len(prompt) == len(HISTORY) + 1
+        tool_outputs = [m.content for m in prompt if m.type == "tool"]
+        assert all(len(content) < 200 and "omitted" in content for content in tool_outputs[:2])
+        assert tool_outputs[2:] == ["x" * 2000] * 2
+        assert report["after"] < report["before"]
+        # the checkpointed history is left untouched
+        assert HISTORY[2].content == "x" * 2000
+
+    def test_token_budget_drops_oldest_turns(self):
+        compactor = HistoryCompactor(token_budget=1200, keep_turns=2, digest_chars=50)
+        prompt, report = compactor.compact(SYSTEM, HISTORY)
+
+        assert prompt[1].content == "question 1"
+        assert report["after"] <= 1200
+        assert prompt[-8:] == HISTORY[-8:]
+
+    def test_recent_turns_are_kept_over_budget(self):
+        prompt, report = HistoryCompactor(token_budget=10, keep_turns=1).compact(SYSTEM, HISTORY)
+
+        assert prompt == [SYSTEM, *HISTORY[-4:]]
+        assert report["after"] > 10
+
+    def test_invalid_keep_turns(self):
+        with pytest.raises(ValueError):
+            HistoryCompactor(keep_turns=0)
+
+
+def test_generate_reports_prompt_tokens():
+    generate, _ = build_ai_service(
+        ScriptedChatModel(),
+        {"model_id": "scripted", "thread_id": "thread-1", "history_keep_turns": 1, "history_token_budget": 400},
+    )
+    rng = np.random.default_rng(0)
+    generate(StubRuntimeContext(make_payload(rng, 25) | {"thread_id": "thread-1"}))
+    response = generate(StubRuntimeContext(make_payload(rng, 25) | {"thread_id": "thread-1"}))
+
+    headers = response["headers"]
+    before = [int(v) for v in headers["X-Prompt-Tokens-Before"].split(",")]
+    after = [int(v) for v in headers["X-Prompt-Tokens-After"].split(",")]
+    assert len(before) == len(after) >= 2
+    # the first turn is dropped from every model call of the second one
+    assert all(a < b for a, b in zip(after, before))
+
+
+def test_concurrent_requests_of_a_thread_get_their_own_reports():
+    generate, _ = build_ai_service(ScriptedChatModel(latency=0.05), {"model_id": "scripted", "thread_id": "thread-1"})
+    rng = np.random.default_rng(0)
+    payloads = [make_payload(rng, 25) | {"thread_id": "thread-1"} for _ in range(4)]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        responses = list(executor.map(lambda payload: generate(StubRuntimeContext(payload)), payloads))
+
+    # every response reports the two model calls made for its own request
+    assert [len(r["headers"]["X-Prompt-Tokens-Before"].split(",")) for r in responses] == [2] * 4
@@ -0,0 +1,185 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from unittest import mock
+
+import numpy as np
+import pytest
+from ibm_watsonx_ai import APIClient, Credentials
+from ibm_watsonx_ai.utils.auth import TokenAuth
+from pydantic import Field
+
+import ai_service
+from langgraph_react_agent.credentials import (
+    REQUEST_TOKEN,
+    RequestScopedAuth,
+    aiterate_with_token,
+    http_client_config,
+    iterate_with_token,
+    request_token,
+    scope_credentials,
+)
+from langgraph_react_agent.datasets import DATASETS
+from tests.fake_chat_model import ScriptedChatModel
+from tests.stubs import StubAPIClient, StubRuntimeContext, make_payload
+
+
+class TokenRecordingChatModel(ScriptedChatModel):
+    """Scripted model recording the token the shared client would authenticate each call with"""
+
+    client: Any = None
+    calls: list = Field(default_factory=list)
+
+    def _next_step(self, messages):
+        request_message = next(m for m in reversed(messages) if m.type == "human")
+        self.calls.append((request_message.content, self.client.token))
+        return super()._next_step(messages)
+
+
+class TestRequestScopedAuth:
+    def test_falls_back_to_wrapped_auth(self):
+        auth = RequestScopedAuth(TokenAuth("deployment-token"))
+        assert auth.get_token() == "deployment-token"
+
+        with request_token("user-token"):
+            assert auth.get_token() == "user-token"
+            assert asyncio.run(auth.aget_token()) == "user-token"
+        assert auth.get_token() == "deployment-token"
+
+    def test_iterate_with_token_keeps_caller_context_clean(self):
+        def tokens():
+            for _ in range(3):
+                yield REQUEST_TOKEN.get()
+
+        first, second = iterate_with_token(tokens(), "first"), iterate_with_token(tokens(), "second")
+        # interleaved streams consumed by one thread
+        assert [next(first), next(second), next(first), next(second)] == ["first", "second"] * 2
+        assert REQUEST_TOKEN.get() is None
+
+    def test_aiterate_with_token_keeps_caller_context_clean(self):
+        closed = []
+
+        async def tokens(name: str):
+            try:
+                for _ in range(3):
+                    yield REQUEST_TOKEN.get()
+            finally:
+                closed.append((name, REQUEST_TOKEN.get()))
+
+        async def consume():
+            first = aiterate_with_token(tokens("first"), "first")
+            second = aiterate_with_token(tokens("second"), "second")
+            items = [await anext(first), await anext(second), await anext(first), await anext(second)]
+            assert REQUEST_TOKEN.get() is None
+            # abandoned streams are closed with their token
+            await first.aclose()
+            await second.aclose()
+            return items
+
+        assert asyncio.run(consume()) == ["first", "second"] * 2
+        assert closed == [("first", "first"), ("second", "second")]
+
+
+def test_scope_credentials_of_api_client():
+    # Built as the service builds it, without the request validating the connection
+    with mock.patch("ibm_watsonx_ai.spaces.Spaces._connection_validation"):
+        client = scope_credentials(
+            APIClient(
+                credentials=Credentials(url="https://us-south.ml.cloud.ibm.com", token="deployment-token"),
+                httpx_client=http_client_config(2),
+                async_httpx_client=http_client_config(2),
+            )
+        )
+    # the authentication method is wrapped once
+    assert isinstance(scope_credentials(client)._auth_method.auth_method, TokenAuth)
+
+    with request_token("user-token"):
+        assert client.token == "user-token"
+        assert client._get_headers()["Authorization"].endswith(" user-token")
+    assert client._get_headers()["Authorization"].endswith(" deployment-token")
+
+
+@pytest.fixture(scope="module")
+def services():
+    built = {}
+    for use_async in (False, True):
+        model = TokenRecordingChatModel(latency=0.01)
+
+        def chat_watsonx(watsonx_client, model=model, **kwargs):
+            model.client = watsonx_client
+            return model
+
+        with (
+            mock.patch("ibm_watsonx_ai.APIClient", StubAPIClient),
+            mock.patch("langchain_ibm.ChatWatsonx", chat_watsonx),
+        ):
+            handlers = ai_service.deployable_ai_service(
+                StubRuntimeContext(token="deployment-token"),
+                model_id="scripted",
+                thread_id="thread-1",
+                async_handlers=use_async,
+            )
+        built[use_async] = (model, handlers)
+    return built
+
+
+def assert_no_leak(model: TokenRecordingChatModel, payloads: list[dict], tokens: list[str]) -> None:
+    expected = {DATASETS.register(p["messages"][0]["data"]["exog"]): t for p, t in zip(payloads, tokens)}
+    assert len(model.calls) >= 2 * len(payloads)
+    for content, token in model.calls:
+        # every model call is authenticated with the token of the request it serves
+        assert [t for h, t in expected.items() if h in content] == [token]
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_no_token_leak_between_concurrent_requests(services, stream):
+    model, handlers = services[False]
+    model.calls.clear()
+    rng = np.random.default_rng(0)
+    payloads = [make_payload(rng, 25) for _ in range(16)]
+    tokens = [f"user-{i}-token" for i in range(16)]
+    handler = handlers[stream]
+
+    def send(payload: dict, token: str):
+        response = handler(StubRuntimeContext(payload, token=token))
+        return list(response) if stream else response
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(send, payloads, tokens))
+
+    assert_no_leak(model, payloads, tokens)
+    assert model.client.token == "deployment-token"
+
+
+def test_no_token_leak_between_concurrent_async_requests(services):
+    model, (agenerate, agenerate_stream) = services[True]
+    model.calls.clear()
+    rng = np.random.default_rng(1)
+    payloads = [make_payload(rng, 25) for _ in range(16)]
+    tokens = [f"user-{i}-token" for i in range(16)]
+
+    async def stream(payload: dict, token: str):
+        return [chunk async for chunk in agenerate_stream(StubRuntimeContext(payload, token=token))]
+
+    async def send_all():
+        return await asyncio.gather(
+            *(agenerate(StubRuntimeContext(p, token=t)) for p, t in zip(payloads[:8], tokens[:8])),
+            *(stream(p, t) for p, t in zip(payloads[8:], tokens[8:])),
+        )
+
+    asyncio.run(send_all())
+    assert_no_leak(model, payloads, tokens)
+    assert REQUEST_TOKEN.get() is None
+
+
+def test_async_stream_does_not_hold_the_token_between_chunks(services):
+    _, (_, agenerate_stream) = services[True]
+
+    async def first_chunk():
+        stream = agenerate_stream(StubRuntimeContext(make_payload(np.random.default_rng(2), 25), token="user-token"))
+        await anext(stream)
+        token = REQUEST_TOKEN.get()
+        await stream.aclose()
+        return token
+
+    assert asyncio.run(first_chunk()) is None
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from langgraph_react_agent import dataset_store, pearson_correlation
+from langgraph_react_agent.dataset_store import DatasetStore
+from langgraph_react_agent.datasets import DATASETS, resolve_array
+from tests.fake_chat_model import ScriptedChatModel
+from tests.stubs import StubRuntimeContext, build_ai_service
+
+RNG = np.random.default_rng(0)
+EXOG = pd.DataFrame(RNG.normal(size=(100, 4)), columns=["a", "b", "c", "d"])
+ENDOG = pd.Series(RNG.normal(size=100), name="y")
+
+
+@pytest.fixture
+def store(tmp_path):
+    return DatasetStore(tmp_path / "datasets")
+
+
+@pytest.fixture
+def configured_store(store, monkeypatch):
+    store.register("sample", EXOG, ENDOG)
+    monkeypatch.setattr(dataset_store, "STORE", store)
+    return store
+
+
+class FakeStatsmodelsDataset:
+    __name__ = "statsmodels.datasets.sample"
+
+    def __init__(self):
+        self.loads = 0
+
+    def load_pandas(self):
+        self.loads += 1
+        return type("Dataset", (), {"exog": EXOG, "endog": ENDOG})
+
+
+def test_datasets_are_converted_once(store):
+    module = FakeStatsmodelsDataset()
+    store.register_statsmodels(module)
+    dataset = DatasetStore(store.root).register_statsmodels(module)
+
+    assert module.loads == 1
+    assert store.names() == ["sample"]
+    assert (dataset.exog_names, dataset.endog_name, dataset.nobs) == (["a", "b", "c", "d"], "y", 100)
+
+
+def test_windows_are_views_of_the_mapped_files(store):
+    dataset = store.register("sample", EXOG, ENDOG)
+
+    rows = dataset.window("exog", slice(10, 35))
+    columns = dataset.window("exog", slice(10, 35), columns=["b", "c"])
+
+    np.testing.assert_array_equal(rows, EXOG.to_numpy()[10:35])
+    np.testing.assert_array_equal(columns, EXOG[["b", "c"]].to_numpy()[10:35])
+    np.testing.assert_array_equal(dataset.column("y", slice(0, 5)), ENDOG.to_numpy()[:5])
+    for window in (rows, columns, dataset.column("d"), dataset.window("endog")):
+        assert isinstance(window, np.memmap) and not window.flags.owndata and not window.flags.writeable
+    # Scattered columns are copied, only the window is read
+    np.testing.assert_array_equal(dataset.window("exog", slice(0, 5), ["d", "a"]), EXOG[["d", "a"]].to_numpy()[:5])
+
+
+def test_references(configured_store):
+    dataset = configured_store.open("sample")
+    window, digest = configured_store.resolve(dataset.reference("exog", slice(0, 25)))
+
+    assert dataset.reference("exog", slice(0, 25)) == "sample/exog[0:25]"
+    np.testing.assert_array_equal(window, EXOG.to_numpy()[:25])
+    np.testing.assert_array_equal(resolve_array("`sample/b,c[5:10]`"), EXOG[["b", "c"]].to_numpy()[5:10])
+    assert configured_store.resolve("sample/exog[:25]")[1] == digest
+    assert configured_store.resolve("sample/exog[0:26]")[1] != digest
+
+    with pytest.raises(ValueError, match="Unknown column `e`"):
+        resolve_array("sample/e[0:5]")
+    with pytest.raises(ValueError, match="Unknown dataset `other`"):
+        resolve_array("other/exog")
+
+
+@pytest.mark.parametrize("name", [".", "..", ".hidden"])
+def test_names_outside_of_the_store_are_rejected(configured_store, name):
+    outside = configured_store.root.parent / "outside"
+    DatasetStore(outside).register("x", EXOG, ENDOG)
+
+    with pytest.raises(ValueError, match="Invalid dataset"):
+        resolve_array(f"{name}/x/a")
+    with pytest.raises(ValueError, match="Invalid dataset name"):
+        configured_store.open(name)
+    with pytest.raises(ValueError, match="Invalid dataset name"):
+        configured_store.register(name, EXOG, ENDOG)
+
+
+def test_references_require_a_store(monkeypatch):
+    monkeypatch.setattr(dataset_store, "STORE", None)
+
+    with pytest.raises(ValueError, match="no dataset store is configured"):
+        resolve_array("sample/exog[0:25]")
+
+
+def test_tools_accept_references(configured_store):
+    handle = dataset_store.register_data("sample/a[0:50]")
+
+    # The registered window is the mapped one, it is not copied
+    assert np.shares_memory(DATASETS.get(handle), configured_store.open("sample").column("a"))
+    assert pearson_correlation.run({"exog": handle, "endog": "sample/endog[0:50]"}) == pearson_correlation.run(
+        {"exog": EXOG["a"].to_numpy()[:50].tolist(), "endog": ENDOG.to_numpy()[:50].tolist()}
+    )
+
+
+def test_messages_reference_stored_datasets(configured_store):
+    generate, _ = build_ai_service(
+        ScriptedChatModel(), {"model_id": "scripted", "dataset_store": str(configured_store.root)}
+    )
+    data = {"exog": "sample/exog[0:25]", "endog": "sample/endog[0:25]"}
+
+    body = generate(StubRuntimeContext({"messages": [{"role": "user", "content": "Fit OLS", "data": data}]}))["body"]
+
+    exog_handle = dataset_store.register_data(data["exog"])
+    assert exog_handle in body["choices"][0]["message"]["tool_calls"][0]["function"]["arguments"]
+    assert body["choices"][-1]["message"]["content"].startswith("The data shows")
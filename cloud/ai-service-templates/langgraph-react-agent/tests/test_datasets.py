@@ -0,0 +1,87 @@
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from langgraph_react_agent import ordinary_least_squared_regression, pearson_correlation
+from langgraph_react_agent.datasets import DATASETS, DatasetExpiredError, DatasetRegistry, resolve_array
+
+EXOG = [1, 2, 3, 4, 5, 6, 7, 8]
+ENDOG = [8.00, 10.58, 14.58, 18.67, 20.12, 23.34, 28.36, 30.77]
+
+
+class TestDatasetRegistry:
+    def test_register_is_content_addressed(self):
+        registry = DatasetRegistry()
+        handle = registry.register(EXOG)
+
+        assert handle.startswith("ds-")
+        assert registry.register(np.array(EXOG, dtype=float)) == handle
+        assert registry.register(ENDOG) != handle
+        assert len(registry) == 2
+
+    def test_describe(self):
+        registry = DatasetRegistry()
+        handle = registry.register(EXOG)
+        description = registry.describe(handle)
+
+        assert handle in description
+        assert "shape (8,)" in description
+        assert "mean 4.5" in description
+
+    def test_lru_eviction(self):
+        registry = DatasetRegistry(maxsize=1)
+        handle = registry.register(EXOG)
+        registry.register(ENDOG)
+
+        assert handle not in registry
+        with pytest.raises(DatasetExpiredError, match="has expired"):
+            registry.get(handle)
+        with pytest.raises(ValueError, match="Unknown dataset handle"):
+            registry.get("ds-000000000000")
+
+    def test_reregistered_dataset_is_not_expired(self):
+        registry = DatasetRegistry(maxsize=1)
+        handle = registry.register(EXOG)
+        registry.register(ENDOG)
+
+        assert registry.register(EXOG) == handle
+        np.testing.assert_array_equal(registry.get(handle), EXOG)
+
+    def test_registered_arrays_stay_writable(self):
+        registry = DatasetRegistry()
+        arr = np.array(EXOG, dtype=float)
+        handle = registry.register(arr)
+
+        assert arr.flags.writeable
+        assert not registry.get(handle).flags.writeable
+        with pytest.raises(ValueError, match="read-only"):
+            registry.get(handle)[0] = 0.0
+
+
+def test_resolve_array():
+    handle = DATASETS.register(EXOG)
+
+    np.testing.assert_array_equal(resolve_array(handle), EXOG)
+    np.testing.assert_array_equal(resolve_array(f"`{handle}`"), EXOG)
+    np.testing.assert_array_equal(resolve_array(EXOG), EXOG)
+
+
+def test_tools_report_expired_handles():
+    registry = DatasetRegistry(maxsize=1)
+    payload = {"exog": registry.register(EXOG), "endog": registry.register(ENDOG)}
+
+    with mock.patch("langgraph_react_agent.datasets.DATASETS", registry):
+        with pytest.raises(DatasetExpiredError, match=payload["exog"]):
+            pearson_correlation.run(payload)
+
+
+def test_tools_accept_handles():
+    payload = {"exog": DATASETS.register(EXOG), "endog": DATASETS.register(ENDOG)}
+
+    assert pearson_correlation.run(payload) == pearson_correlation.run(
+        {"exog": EXOG, "endog": ENDOG}
+    )
+    assert ordinary_least_squared_regression.run(payload) == ordinary_least_squared_regression.run(
+        {"exog": EXOG, "endog": ENDOG}
+    )
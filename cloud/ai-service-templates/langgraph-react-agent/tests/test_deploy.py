@@ -0,0 +1,120 @@
+import time
+import zipfile
+
+import pytest
+
+from scripts import deploy
+from scripts._dry_run_client import DryRunAPIClient
+from scripts.build_package import write_zip
+from scripts.pipeline import Manifest, Step, run_pipeline
+
+DEP_CONFIG = {"custom": {"model_id": "mistralai/mistral-large", "thread_id": "thread-1"}}
+
+
+@pytest.fixture
+def fake_build(monkeypatch):
+    builds = []
+
+    def build_zip_sc(path):
+        builds.append(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"package")
+
+    monkeypatch.setattr(deploy, "build_zip_sc", build_zip_sc)
+    return builds
+
+
+def deploy_with(tmp_path, dep_config=DEP_CONFIG, client=None, **kwargs) -> dict[str, str]:
+    client = client or DryRunAPIClient(latency=0.0)
+    steps = deploy.get_steps(client, dep_config, tmp_path / "dist")
+    reports = run_pipeline(steps, Manifest(tmp_path / "dist" / "deploy_manifest.json"), **kwargs)
+    return {report.name: report.status for report in reports}
+
+
+def test_unchanged_inputs_skip_every_step(tmp_path, fake_build):
+    assert set(deploy_with(tmp_path).values()) == {"ran"}
+    assert set(deploy_with(tmp_path).values()) == {"skipped"}
+    assert len(fake_build) == 1
+
+    assert set(deploy_with(tmp_path, force=True).values()) == {"ran"}
+
+
+def test_changed_parameters_only_redeploy(tmp_path, fake_build):
+    deploy_with(tmp_path)
+    statuses = deploy_with(tmp_path, {"custom": DEP_CONFIG["custom"] | {"tool_workers": 8}})
+
+    assert [step for step, status in statuses.items() if status == "ran"] == ["deployment"]
+
+
+def test_missing_package_is_rebuilt(tmp_path, fake_build):
+    deploy_with(tmp_path)
+    fake_build[0].unlink()
+
+    assert deploy_with(tmp_path)["build"] == "ran"
+    # The package's content has not changed, the uploaded one is reused
+    assert deploy_with(tmp_path)["package_extension"] == "skipped"
+
+
+def test_deleted_assets_are_created_again(tmp_path, fake_build):
+    client = DryRunAPIClient(latency=0.0)
+    deploy_with(tmp_path, client=client)
+    manifest = Manifest(tmp_path / "dist" / "deploy_manifest.json")
+    client.delete_asset(manifest.steps["ai_service"]["output"])
+
+    statuses = deploy_with(tmp_path, client=client)
+
+    assert [step for step, status in statuses.items() if status == "ran"] == ["ai_service", "deployment"]
+    # The new ids are recorded, the next run skips every step
+    assert set(deploy_with(tmp_path, client=client).values()) == {"skipped"}
+
+
+def test_new_space_redeploys_the_assets(tmp_path, fake_build):
+    deploy_with(tmp_path)
+    statuses = deploy_with(tmp_path, client=DryRunAPIClient(latency=0.0, space_id="another-space"))
+
+    assert statuses["build"] == "skipped"
+    assert {status for step, status in statuses.items() if step != "build"} == {"ran"}
+
+
+def test_dry_run_does_not_update_the_manifest(tmp_path, fake_build):
+    client = DryRunAPIClient(latency=0.0)
+    steps = deploy.get_steps(client, DEP_CONFIG, tmp_path / "dist", build=False)
+    manifest = Manifest(tmp_path / "dist" / "deploy_manifest.json", read_only=True)
+
+    reports = run_pipeline(steps, manifest, dry_run=True)
+
+    assert {report.status for report in reports} == {"would run"}
+    assert not fake_build and not (tmp_path / "dist").exists()
+    assert client.calls[-1] == "deployment.create"
+
+
+def test_independent_steps_run_concurrently():
+    def sleep(_):
+        time.sleep(0.1)
+        return "done"
+
+    steps = [Step("a", sleep), Step("b", sleep), Step("c", sleep, deps=("a", "b"))]
+    start = time.perf_counter()
+    reports = run_pipeline(steps, Manifest(None))
+
+    assert [report.status for report in reports] == ["ran"] * 3
+    assert time.perf_counter() - start < 0.28
+
+
+def test_circular_dependencies_are_rejected():
+    with pytest.raises(ValueError, match="a -> b -> a"):
+        run_pipeline([Step("a", str, deps=("b",)), Step("b", str, deps=("a",))], Manifest(None))
+
+
+def test_zip_only_depends_on_the_content(tmp_path):
+    source = tmp_path / "package"
+    (source / "module").mkdir(parents=True)
+    (source / "module" / "__init__.py").write_text("VERSION = 1\n")
+
+    write_zip(source, tmp_path / "first.zip")
+    (source / "module" / "__init__.py").touch()
+    time.sleep(0.01)
+    write_zip(source, tmp_path / "second.zip")
+
+    assert (tmp_path / "first.zip").read_bytes() == (tmp_path / "second.zip").read_bytes()
+    assert zipfile.ZipFile(tmp_path / "first.zip").namelist() == ["module/__init__.py"]
@@ -0,0 +1,117 @@
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from langgraph_react_agent.metrics import METRICS, MetricsRegistry, RequestTimings
+from langgraph_react_agent.validation import RequestValidationError
+from tests.fake_chat_model import ScriptedChatModel
+from tests.stubs import StubRuntimeContext, build_ai_service, make_payload
+
+
+class TestMetricsRegistry:
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry(buckets=(0.1, 1.0))
+        for seconds in (0.05, 0.5, 0.5, 5.0):
+            registry.observe("agent", seconds)
+
+        histogram = registry.snapshot()["spans"]["agent"]
+        assert histogram["count"] == 4
+        assert histogram["sum"] == pytest.approx(6.05)
+        assert histogram["buckets"] == {"0.1": 1, "1.0": 3, "+Inf": 4}
+
+    def test_prometheus_dump(self):
+        registry = MetricsRegistry(buckets=(0.1,))
+        registry.observe("tool.pearson_correlation", 0.01)
+        registry.register_gauge("response_cache_hit_rate", lambda: 0.25, "Hit rate.")
+
+        assert registry.to_prometheus().splitlines()[2:] == [
+            'ai_service_span_seconds_bucket{span="tool.pearson_correlation",le="0.1"} 1',
+            'ai_service_span_seconds_bucket{span="tool.pearson_correlation",le="+Inf"} 1',
+            'ai_service_span_seconds_sum{span="tool.pearson_correlation"} 0.01',
+            'ai_service_span_seconds_count{span="tool.pearson_correlation"} 1',
+            "# HELP ai_service_response_cache_hit_rate Hit rate.",
+            "# TYPE ai_service_response_cache_hit_rate gauge",
+            "ai_service_response_cache_hit_rate 0.25",
+        ]
+
+    def test_histograms_with_their_own_buckets(self):
+        registry = MetricsRegistry(buckets=(0.1,))
+        registry.register_histogram("model_tokens_per_second", (10.0, 100.0), "Tokens per second.")
+        for value in (5.0, 50.0, 500.0):
+            registry.observe_value("model_tokens_per_second", value)
+
+        assert registry.snapshot()["histograms"]["model_tokens_per_second"]["buckets"] == {
+            "10.0": 1,
+            "100.0": 2,
+            "+Inf": 3,
+        }
+        assert registry.to_prometheus().splitlines()[2:5] == [
+            "# HELP ai_service_model_tokens_per_second Tokens per second.",
+            "# TYPE ai_service_model_tokens_per_second histogram",
+            'ai_service_model_tokens_per_second_bucket{le="10.0"} 1',
+        ]
+
+    def test_disabled_timings_record_nothing(self):
+        timings = RequestTimings(None)
+        with timings.span("convert_messages"):
+            pass
+
+        assert not timings.enabled
+        assert timings.spans == {}
+        assert timings.callbacks() == []
+
+
+@pytest.fixture
+def service():
+    METRICS.clear()
+    return build_ai_service(
+        ScriptedChatModel(), {"model_id": "scripted", "thread_id": "thread-1", "metrics": True, "timing_header": True}
+    )
+
+
+def test_generate_reports_timing_breakdown(service):
+    generate, _ = service
+    response = generate(StubRuntimeContext(make_payload(np.random.default_rng(0), 25)))
+
+    spans = dict(entry.split(";dur=") for entry in response["headers"]["Server-Timing"].split(", "))
+    for name in ("convert_messages", "get_graph", "checkpoint.get", "checkpoint.put", "node.agent", "llm",
+                 "node.tools", "tool.pearson_correlation", "total"):
+        assert float(spans[name]) >= 0.0
+    assert float(spans["node.agent"]) >= float(spans["llm"])
+
+    dump = generate(StubRuntimeContext({"messages": [], "metrics": "json"}))["body"]["metrics"]
+    assert dump["spans"]["llm"]["count"] == 2
+    assert dump["gauges"]["ols_fit_cache_misses"] >= 1
+
+
+def test_generate_stream_records_time_to_first_chunk(service):
+    _, generate_stream = service
+    list(generate_stream(StubRuntimeContext(make_payload(np.random.default_rng(0), 25))))
+
+    spans = METRICS.snapshot()["spans"]
+    assert spans["time_to_first_chunk"]["count"] == 1
+    assert spans["checkpoint.put_writes"]["count"] >= 2
+    assert "ai_service_span_seconds_count{span=\"node.tools\"} 1" in METRICS.to_prometheus()
+
+
+def test_metrics_are_opt_in():
+    METRICS.clear()
+    generate, _ = build_ai_service(ScriptedChatModel(), {"model_id": "scripted", "thread_id": "thread-1"})
+    response = generate(StubRuntimeContext(make_payload(np.random.default_rng(0), 25)))
+
+    assert "Server-Timing" not in response["headers"]
+    assert METRICS.snapshot()["spans"] == {}
+
+
+def test_metrics_requests_require_metrics():
+    generate, generate_stream = build_ai_service(ScriptedChatModel(), {"model_id": "scripted"})
+    context = StubRuntimeContext({"messages": [], "metrics": "json"})
+
+    with mock.patch("langgraph.pregel.Pregel.invoke") as invoke, pytest.raises(
+        RequestValidationError, match="metrics are disabled"
+    ):
+        generate(context)
+    invoke.assert_not_called()
+    with pytest.raises(RequestValidationError, match="only returned by `generate`"):
+        next(generate_stream(context))
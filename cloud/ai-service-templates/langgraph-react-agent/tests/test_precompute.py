@@ -0,0 +1,113 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from langgraph_react_agent import check_residuals_normality, regression, regression_diagnostics
+from langgraph_react_agent.datasets import DATASETS
+from langgraph_react_agent.metrics import METRICS, MetricsRegistry
+from langgraph_react_agent.precompute import Precomputer
+from langgraph_react_agent.regression import OLSFitCache
+from tests.fake_chat_model import ScriptedChatModel
+from tests.stubs import StubRuntimeContext, build_ai_service, make_payload
+
+RNG = np.random.default_rng(0)
+EXOG = RNG.normal(size=(200, 2))
+ENDOG = 1.0 + EXOG @ [2.0, -1.0] + RNG.normal(size=200)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = OLSFitCache()
+    monkeypatch.setattr(regression, "OLS_FIT_CACHE", cache)
+    return cache
+
+
+@pytest.fixture
+def slow_fit(monkeypatch):
+    fit = OLSFitCache._fit
+    calls = []
+
+    def _fit(exog, endog):
+        calls.append(threading.current_thread().name)
+        time.sleep(0.2)
+        return fit(exog, endog)
+
+    monkeypatch.setattr(OLSFitCache, "_fit", staticmethod(_fit))
+    return calls
+
+
+def test_in_flight_results_are_waited_for(cache, slow_fit):
+    threads = [threading.Thread(target=cache.get, args=(EXOG, ENDOG)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(slow_fit) == 1
+    assert cache.stats()["misses"] == 1 and cache.stats()["hits"] == 3
+
+
+def test_tools_use_the_precomputed_results(cache):
+    metrics = MetricsRegistry()
+    precomputer = Precomputer(metrics=metrics)
+    handles = DATASETS.register(EXOG), DATASETS.register(ENDOG)
+    precomputer.submit(*handles).result()
+
+    assert precomputer.submit(*handles).done()  # the same data is not processed again
+    assert precomputer.stats()["wasted_ratio"] == 1.0  # no tool has used it yet
+
+    result = regression_diagnostics.run({"exog": handles[0], "endog": handles[1]})
+    check_residuals_normality.run({"exog": handles[0], "endog": handles[1]})
+
+    assert result["nobs"] == 200
+    assert cache.stats()["misses"] == 1
+    stats = precomputer.stats()
+    assert (stats["used"], stats["wasted_ratio"], stats["overlap_ratio"]) == (1, 0.0, 1.0)
+    assert metrics.snapshot()["spans"]["precompute"]["count"] == 1
+
+
+def test_tool_call_during_the_precomputation(cache, slow_fit):
+    precomputer = Precomputer()
+    handles = DATASETS.register(EXOG), DATASETS.register(ENDOG)
+    job = precomputer.submit(*handles)
+    time.sleep(0.05)
+
+    check_residuals_normality.run({"exog": handles[0], "endog": handles[1]})
+    job.result()
+
+    # The tool waited for the fit started in the background
+    assert [name.startswith("precompute") for name in slow_fit] == [True]
+    assert 0.0 < precomputer.stats()["overlap_ratio"] < 1.0
+
+
+def test_precomputation_overlaps_the_model(cache):
+    generate, _ = build_ai_service(ScriptedChatModel(latency=0.05), {"model_id": "scripted", "metrics": True})
+    cache.clear()  # the warm-up fit
+    generate(StubRuntimeContext(make_payload(np.random.default_rng(1), 500)))
+
+    # One fit, computed in the background while the model generated the tool calls
+    assert cache.stats()["misses"] == 1
+    gauges = METRICS.snapshot()["gauges"]
+    assert gauges["precompute_overlap_ratio"] > 0.5
+    assert gauges["precompute_wasted_ratio"] == 0.0
+
+
+def test_cached_responses_are_not_precomputed(monkeypatch):
+    submitted = []
+    submit = Precomputer.submit
+
+    def counting_submit(self, exog_handle, endog_handle):
+        submitted.append((exog_handle, endog_handle))
+        return submit(self, exog_handle, endog_handle)
+
+    monkeypatch.setattr(Precomputer, "submit", counting_submit)
+    generate, _ = build_ai_service(ScriptedChatModel(), {"model_id": "scripted", "response_cache": True})
+    payload = make_payload(np.random.default_rng(2), 25)
+
+    generate(StubRuntimeContext(payload | {"thread_id": "first"}))
+    response = generate(StubRuntimeContext(payload | {"thread_id": "second"}))
+
+    assert response["headers"]["X-Response-Cache"] == "hit"
+    assert len(submitted) == 1
@@ -0,0 +1,221 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+import statsmodels.api as sm
+from scipy import stats
+from scipy.stats import jarque_bera
+from statsmodels.stats.diagnostic import het_breuschpagan
+from statsmodels.stats.stattools import durbin_watson
+
+from langgraph_react_agent import (
+    check_residuals_normality,
+    data_independence_test,
+    homoscedasticity_tests,
+    ordinary_least_squared_regression,
+)
+from langgraph_react_agent import diagnostics, regression
+from langgraph_react_agent.regression import OLS_FIT_CACHE, IncrementalOLS, OLSFitCache
+
+EXOG = [1, 2, 3, 4, 5, 6, 7, 8]
+ENDOG = [8.00, 10.58, 14.58, 18.67, 20.12, 23.34, 28.36, 30.77]
+
+
+class TestOLSFitCache:
+    def test_hit_returns_same_fit(self):
+        cache = OLSFitCache(maxsize=2)
+        first = cache.get(EXOG, ENDOG)
+        second = cache.get(np.array(EXOG), np.array(ENDOG))
+
+        assert first is second
+        assert cache.stats() == {"hits": 1, "misses": 1, "size": 1, "maxsize": 2}
+
+    def test_key_depends_on_content(self):
+        cache = OLSFitCache()
+        cache.get(EXOG, ENDOG)
+        cache.get(EXOG, ENDOG[::-1])
+
+        assert cache.misses == 2
+        assert len(cache) == 2
+
+    def test_lru_eviction(self):
+        cache = OLSFitCache(maxsize=2)
+        cache.get(EXOG, ENDOG)
+        cache.get(EXOG, ENDOG[::-1])
+        cache.get(EXOG, ENDOG)  # refresh the first entry
+        cache.get(ENDOG, EXOG)  # evicts the least recently used one
+
+        cache.get(EXOG, ENDOG)
+        assert cache.hits == 2
+        cache.get(EXOG, ENDOG[::-1])
+        assert cache.misses == 4
+
+    def test_fit_matches_design_matrix(self):
+        fit = OLSFitCache().get(EXOG, ENDOG)
+
+        assert fit.exog.shape == (len(EXOG), 2)
+        np.testing.assert_allclose(fit.exog[:, 0], 1.0)
+        np.testing.assert_allclose(fit.resid, fit.endog - fit.exog @ fit.results.params)
+
+    def test_invalid_maxsize(self):
+        with pytest.raises(ValueError):
+            OLSFitCache(maxsize=0)
+
+
+def test_tools_share_single_fit():
+    OLS_FIT_CACHE.clear()
+    payload = {"exog": EXOG, "endog": ENDOG}
+    for t in (
+        ordinary_least_squared_regression,
+        check_residuals_normality,
+        data_independence_test,
+        homoscedasticity_tests,
+    ):
+        t.run(payload)
+
+    assert OLS_FIT_CACHE.stats()["misses"] == 1
+    assert OLS_FIT_CACHE.stats()["hits"] == 3
+
+
+class TestIncrementalOLS:
+    @pytest.fixture
+    def data(self):
+        rng = np.random.default_rng(0)
+        exog = rng.normal(50.0, 10.0, size=(5_000, 3))
+        endog = 2.0 + exog @ [1.5, -0.5, 0.25] + rng.normal(0.0, 1.0 + 0.05 * exog[:, 0])
+        return exog, endog
+
+    def test_matches_statsmodels(self, data):
+        exog, endog = data
+        design = sm.add_constant(exog)
+        expected = sm.OLS(endog, design).fit()
+        engine = IncrementalOLS.from_arrays(exog, endog, chunk_size=777)
+
+        np.testing.assert_allclose(engine.params, expected.params, rtol=1e-8)
+        np.testing.assert_allclose(engine.bse, expected.bse, rtol=1e-6)
+        assert engine.rsquared == pytest.approx(expected.rsquared, rel=1e-8)
+        np.testing.assert_allclose(engine.pvalues, expected.pvalues, rtol=1e-6, atol=1e-300)
+        assert (engine.fvalue, engine.f_pvalue) == pytest.approx((expected.fvalue, expected.f_pvalue), rel=1e-6)
+        assert engine.durbin_watson() == pytest.approx(durbin_watson(expected.resid), rel=1e-6)
+        lm, lm_p_value, _, _ = het_breuschpagan(expected.resid, design)
+        assert engine.breusch_pagan() == pytest.approx((lm, lm_p_value), rel=1e-6)
+        jb = jarque_bera(expected.resid)
+        assert engine.normality_test() == pytest.approx((jb.statistic, jb.pvalue), rel=1e-6)
+
+    def test_chunking_does_not_change_the_fit(self, data):
+        exog, endog = data
+        whole = IncrementalOLS.from_arrays(exog[:, 0], endog, chunk_size=len(endog))
+        chunked = IncrementalOLS.from_arrays(exog[:, 0], endog, chunk_size=10)
+
+        np.testing.assert_allclose(chunked.params, whole.params)
+        assert chunked.durbin_watson() == pytest.approx(whole.durbin_watson())
+
+    def test_large_datasets_use_streaming_engine(self, data):
+        exog, endog = data
+        cache = OLSFitCache()
+        regression.configure(streaming_threshold=1_000)
+        try:
+            fit = cache.get(exog, endog)
+        finally:
+            regression.configure(streaming_threshold=100_000)
+
+        assert isinstance(fit, IncrementalOLS)
+        assert fit.summary().startswith("OLS Regression Results")
+        assert not isinstance(cache.get(exog[:100], endog[:100]), IncrementalOLS)
+
+    def test_memory_is_bounded(self):
+        k = regression.STREAMING_MAX_VARIABLES
+        rng = np.random.default_rng(0)
+        exog = rng.normal(size=(100_000, k))
+        endog = exog.sum(axis=1) + rng.normal(size=len(exog))
+        engine = IncrementalOLS(k)
+
+        tracemalloc.start()
+        try:
+            engine.update(exog, endog)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        # The moments and a few chunk-sized temporaries, instead of the 100_000 x p^2 outer products (387 MB)
+        moments = 8 * ((k + 2) ** 4 + (k + 2) ** 3)
+        assert peak < moments + 4 * 8 * regression.CHUNK_ELEMENTS
+        assert engine.nobs == len(exog)
+
+    def test_many_variables_are_fitted_in_memory(self, monkeypatch):
+        monkeypatch.setattr(regression, "STREAMING_THRESHOLD", 100)
+        rng = np.random.default_rng(0)
+        exog = rng.normal(size=(1_000, regression.STREAMING_MAX_VARIABLES + 1))
+
+        assert not isinstance(OLSFitCache().get(exog, exog.sum(axis=1)), IncrementalOLS)
+        with pytest.raises(ValueError, match="at most"):
+            IncrementalOLS(exog.shape[1])
+
+
+class TestDiagnostics:
+    @pytest.fixture
+    def heteroscedastic(self):
+        rng = np.random.default_rng(1)
+        exog = rng.normal(size=(8_000, 2))
+        endog = 1.0 + exog @ [1.0, -2.0] + rng.standard_t(5, size=8_000) * (1.0 + 0.3 * np.abs(exog[:, 0]))
+        design = sm.add_constant(exog)
+        return regression.OLSFit(results=sm.OLS(endog, design).fit(), exog=design, endog=endog)
+
+    @pytest.mark.parametrize("n", [20, 500, 100_000])
+    def test_moment_tests_match_scipy(self, n):
+        values = np.random.default_rng(n).gamma(4.0, size=n)
+        moments = diagnostics.sample_moments(values)
+
+        assert moments[1:] == pytest.approx([stats.moment(values, order) for order in (2, 3, 4)], rel=1e-9)
+        expected = stats.normaltest(values)
+        assert diagnostics.dagostino_pearson_from_moments(*moments) == pytest.approx(
+            (expected.statistic, expected.pvalue), rel=1e-6
+        )
+        expected = jarque_bera(values)
+        assert diagnostics.jarque_bera_from_moments(*moments) == pytest.approx(
+            (expected.statistic, expected.pvalue), rel=1e-6
+        )
+
+    def test_breusch_pagan_matches_statsmodels(self, heteroscedastic):
+        lm, lm_p_value, _, _ = het_breuschpagan(heteroscedastic.resid, heteroscedastic.exog)
+
+        assert heteroscedastic.breusch_pagan() == pytest.approx((lm, lm_p_value), rel=1e-8)
+
+    def test_normality_test_is_chosen_by_sample_size(self, heteroscedastic):
+        resid = heteroscedastic.resid
+        small = stats.shapiro(resid[:100])
+        large = stats.normaltest(resid)
+
+        assert diagnostics.normality_test(resid[:100]) == pytest.approx((small.statistic, small.pvalue))
+        assert heteroscedastic.normality_method == "dagostino-pearson"
+        assert heteroscedastic.normality_test() == pytest.approx((large.statistic, large.pvalue), rel=1e-6)
+        assert diagnostics.select_normality_test(len(resid), "jarque-bera") == "jarque-bera"
+        with pytest.raises(ValueError, match="Unknown normality test"):
+            diagnostics.select_normality_test(10, "lilliefors")
+
+    def test_small_samples_fall_back_to_shapiro_wilk(self, monkeypatch):
+        monkeypatch.setattr(regression, "NORMALITY_TEST", "dagostino-pearson")
+        exog = np.arange(6.0)
+        endog = 1.0 + 2.0 * exog + np.array([0.1, -0.2, 0.05, 0.3, -0.1, 0.0])
+        design = sm.add_constant(exog)
+        fit = regression.OLSFit(results=sm.OLS(endog, design).fit(), exog=design, endog=endog)
+        expected = stats.shapiro(fit.resid)
+
+        assert fit.normality_method == "shapiro-wilk"
+        assert fit.normality_test() == pytest.approx((expected.statistic, expected.pvalue))
+        assert not np.isnan(fit.normality_test()).any()
+        assert diagnostics.select_normality_test(8, "dagostino-pearson") == "dagostino-pearson"
+
+    def test_subsampling_is_reproducible(self, heteroscedastic, monkeypatch):
+        monkeypatch.setattr(regression, "DIAGNOSTICS_SAMPLE_SIZE", 1_000)
+        sample = diagnostics.subsample(heteroscedastic.resid, 1_000, seed=0)
+        expected = stats.shapiro(sample)
+
+        assert heteroscedastic.normality_method == "shapiro-wilk"
+        assert heteroscedastic.normality_test() == pytest.approx((expected.statistic, expected.pvalue))
+        assert heteroscedastic.normality_test() == heteroscedastic.normality_test()
+        # The subsample keeps the order of the residuals
+        resid = np.asarray(heteroscedastic.resid)
+        np.testing.assert_array_equal(resid[np.isin(resid, sample)], sample)
+        monkeypatch.setattr(regression, "DIAGNOSTICS_SEED", 1)
+        assert heteroscedastic.normality_test() != pytest.approx((expected.statistic, expected.pvalue))
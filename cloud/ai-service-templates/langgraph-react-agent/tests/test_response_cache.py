@@ -0,0 +1,164 @@
+import time
+
+import numpy as np
+import pytest
+from langchain_core.messages import AIMessage
+from pydantic import Field
+
+from langgraph_react_agent import dataset_store
+from langgraph_react_agent.dataset_store import DatasetStore
+from langgraph_react_agent.response_cache import ResponseCache, normalise_request
+from tests.fake_chat_model import ScriptedChatModel
+from tests.stubs import StubRuntimeContext, build_ai_service, make_payload
+
+ANSWER = [AIMessage(content="answer")]
+
+
+class CountingChatModel(ScriptedChatModel):
+    calls: list = Field(default_factory=list)
+
+    def _next_step(self, messages):
+        self.calls.append(len(messages))
+        return super()._next_step(messages)
+
+
+class TestResponseCache:
+    def test_hit_and_stats(self):
+        cache = ResponseCache(maxsize=2)
+        assert cache.get("k") is None
+        cache.put("k", ANSWER)
+
+        assert cache.get("k") == ANSWER
+        assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "size": 1, "maxsize": 2}
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(maxsize=2)
+        cache.put("a", ANSWER)
+        cache.put("b", ANSWER)
+        cache.get("a")
+        cache.put("c", ANSWER)
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+
+    def test_ttl(self):
+        cache = ResponseCache(ttl=0.01)
+        cache.put("k", ANSWER)
+        time.sleep(0.02)
+
+        assert cache.get("k") is None
+        assert len(cache) == 0
+
+    def test_key_depends_on_data_and_normalises_content(self):
+        message = {"role": "user", "content": "Is it linear?", "data": {"exog": [1, 2, 3], "endog": [2, 4, 6]}}
+        other_data = message | {"data": {"exog": [1, 2, 3], "endog": [2, 4, 7]}}
+        padded = message | {"content": "  Is it linear?\n"}
+
+        key = ResponseCache.key("model", normalise_request([message]))
+        assert key == ResponseCache.key("model", normalise_request([padded]))
+        assert key != ResponseCache.key("model", normalise_request([other_data]))
+        assert key != ResponseCache.key("other-model", normalise_request([message]))
+
+    def test_key_of_store_references(self, tmp_path, monkeypatch):
+        store = DatasetStore(tmp_path / "datasets")
+        rng = np.random.default_rng(0)
+        store.register("sample", rng.normal(size=(50, 2)), rng.normal(size=50))
+        monkeypatch.setattr(dataset_store, "STORE", store)
+
+        def key(exog):
+            data = {"exog": exog, "endog": "sample/endog[0:25]"}
+            return ResponseCache.key("model", normalise_request([{"role": "user", "content": "Fit", "data": data}]))
+
+        assert key("sample/exog[0:25]") == key(" sample/exog[:25]")
+        assert key("sample/exog[0:25]") != key("sample/exog[25:50]")
+
+    def test_invalid_maxsize(self):
+        with pytest.raises(ValueError):
+            ResponseCache(maxsize=0)
+
+
+@pytest.fixture
+def service():
+    model = CountingChatModel()
+    generate, generate_stream = build_ai_service(
+        model, {"model_id": "scripted", "thread_id": "thread-1", "response_cache": True}
+    )
+    return model, generate, generate_stream
+
+
+def test_generate_replays_cached_response(service):
+    model, generate, _ = service
+    payload = make_payload(np.random.default_rng(0), 25)
+    first = generate(StubRuntimeContext(payload))
+    calls = len(model.calls)
+    second = generate(StubRuntimeContext(payload | {"thread_id": "another-thread"}))
+
+    assert len(model.calls) == calls
+    assert first["headers"]["X-Response-Cache"] == "miss"
+    assert second["headers"]["X-Response-Cache"] == "hit"
+    assert second["headers"]["X-Response-Cache-Hit-Rate"] == "0.5000"
+
+    def contents(response):
+        messages = [c["message"] for c in response["body"]["choices"]]
+        return [(m["role"], m.get("content"), m.get("tool_calls")) for m in messages]
+
+    assert contents(second) == contents(first)
+
+
+def test_replayed_response_is_stored_in_the_thread(service):
+    model, generate, _ = service
+    payload = make_payload(np.random.default_rng(0), 25)
+    generate(StubRuntimeContext(payload | {"thread_id": "first"}))
+    generate(StubRuntimeContext(payload | {"thread_id": "second"}))
+
+    # the follow-up question sees the whole conversation, so it is not answered from the cache
+    follow_up = {"thread_id": "second", "messages": [{"role": "user", "content": "Thanks, and why?"}]}
+    response = generate(StubRuntimeContext(follow_up))
+    assert response["headers"]["X-Response-Cache"] == "miss"
+    assert model.calls[-1] > len(payload["messages"]) + 6
+
+
+def test_generate_stream_replays_cached_response(service):
+    model, _, generate_stream = service
+    payload = make_payload(np.random.default_rng(1), 25)
+    first = list(generate_stream(StubRuntimeContext(payload)))
+    calls = len(model.calls)
+    second = list(generate_stream(StubRuntimeContext(payload | {"thread_id": "another-thread"})))
+
+    assert len(model.calls) == calls
+
+    def answer(chunks):
+        return "".join(c["choices"][0]["message"].get("delta", "") for c in chunks if c["choices"])
+
+    assert answer(second) == answer(first)
+    assert [c["choices"][0]["message"]["role"] for c in second[:5]] == ["assistant"] + ["tool"] * 4
+    assert second[-1]["usage"]["model_calls"] == 0
+
+
+def test_cache_is_opt_in():
+    model = CountingChatModel()
+    generate, _ = build_ai_service(model, {"model_id": "scripted", "thread_id": "thread-1"})
+    payload = make_payload(np.random.default_rng(0), 25)
+    response = generate(StubRuntimeContext(payload))
+    calls = len(model.calls)
+    generate(StubRuntimeContext(payload | {"thread_id": "another-thread"}))
+
+    assert "X-Response-Cache" not in response["headers"]
+    assert len(model.calls) == 2 * calls
+
+
+def test_generate_replays_response_of_store_references(tmp_path, monkeypatch):
+    store = DatasetStore(tmp_path / "datasets")
+    rng = np.random.default_rng(0)
+    store.register("sample", rng.normal(size=(50, 2)), rng.normal(size=50))
+    monkeypatch.setattr(dataset_store, "STORE", store)
+    model = CountingChatModel()
+    generate, _ = build_ai_service(model, {"model_id": "scripted", "response_cache": True})
+    data = {"exog": "sample/exog[0:25]", "endog": "sample/endog[0:25]"}
+    payload = {"messages": [{"role": "user", "content": "Fit OLS", "data": data}]}
+
+    first = generate(StubRuntimeContext(payload | {"thread_id": "first"}))
+    second = generate(StubRuntimeContext(payload | {"thread_id": "second"}))
+
+    assert (first["headers"]["X-Response-Cache"], second["headers"]["X-Response-Cache"]) == ("miss", "hit")
+    assert second["body"]["choices"][-1]["message"]["content"].startswith("The data shows")
@@ -0,0 +1,173 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from langgraph_react_agent.streaming import acoalesce_chunks, coalesce_chunks, delta_chunk, get_delta
+from tests.fake_chat_model import ScriptedChatModel
+from tests.stubs import StubRuntimeContext, build_ai_service, make_payload
+
+TOOL_CHUNK = {"choices": [{"index": 0, "message": {"role": "tool", "name": "tool", "content": "True"}}]}
+
+
+def tokens(n: int, delay: float = 0.0):
+    for i in range(n):
+        if delay:
+            time.sleep(delay)
+        yield delta_chunk(f"t{i} ")
+
+
+def deltas(chunks: list[dict]) -> list[str | None]:
+    return [get_delta(chunk) for chunk in chunks]
+
+
+class TestCoalesceChunks:
+    def test_merges_deltas_up_to_max_bytes(self):
+        chunks = list(coalesce_chunks(tokens(9), max_bytes=8, max_delay=10.0))
+
+        # the first token is sent right away, the next ones in chunks of at least 8 bytes
+        assert deltas(chunks) == ["t0 ", "t1 t2 t3 ", "t4 t5 t6 ", "t7 t8 "]
+
+    def test_other_chunks_flush_the_buffer(self):
+        stream = [*tokens(3), TOOL_CHUNK, *tokens(2)]
+        chunks = list(coalesce_chunks(iter(stream), max_bytes=64, max_delay=10.0))
+
+        assert deltas(chunks) == ["t0 ", "t1 t2 ", None, "t0 t1 "]
+
+    def test_flushes_on_time_while_the_model_pauses(self):
+        def paused():
+            yield from tokens(3)
+            time.sleep(0.2)
+            yield from tokens(1)
+
+        received = []
+        start = time.monotonic()
+        for chunk in coalesce_chunks(paused(), max_bytes=1024, max_delay=0.02):
+            received.append((get_delta(chunk), time.monotonic() - start))
+
+        assert [delta for delta, _ in received] == ["t0 ", "t1 t2 ", "t0 "]
+        assert received[1][1] < 0.15
+
+    def test_disabled_passes_chunks_through(self):
+        assert len(list(coalesce_chunks(tokens(5), max_bytes=0, max_delay=0))) == 5
+
+    def test_slow_consumer_holds_back_the_producer(self):
+        produced = []
+
+        def counted():
+            for chunk in tokens(100):
+                produced.append(chunk)
+                yield chunk
+
+        stream = coalesce_chunks(counted(), max_bytes=1, max_delay=10.0, buffer_size=4)
+        next(stream)
+        time.sleep(0.1)
+        assert len(produced) <= 6
+        stream.close()
+
+    def test_closing_stops_the_producer(self):
+        closed = threading.Event()
+
+        def endless():
+            try:
+                while True:
+                    yield delta_chunk("t ")
+            finally:
+                closed.set()
+
+        stream = coalesce_chunks(endless(), buffer_size=2)
+        next(stream)
+        stream.close()
+        assert closed.wait(1.0)
+
+    def test_errors_are_raised_to_the_consumer(self):
+        def failing():
+            yield from tokens(2)
+            raise RuntimeError("model failed")
+
+        with pytest.raises(RuntimeError, match="model failed"):
+            list(coalesce_chunks(failing()))
+
+
+def test_acoalesce_chunks():
+    async def atokens():
+        for chunk in [*tokens(3), TOOL_CHUNK, *tokens(3)]:
+            await asyncio.sleep(0)
+            yield chunk
+
+    async def collect():
+        return [chunk async for chunk in acoalesce_chunks(atokens(), max_bytes=64, max_delay=10.0)]
+
+    assert deltas(asyncio.run(collect())) == ["t0 ", "t1 t2 ", None, "t0 t1 t2 "]
+
+
+def test_acoalesce_chunks_loses_no_chunk_while_flushing_on_time():
+    async def paced():
+        for chunk in tokens(50):
+            await asyncio.sleep(0.001)
+            yield chunk
+
+    async def collect():
+        return [chunk async for chunk in acoalesce_chunks(paced(), max_bytes=1024, max_delay=0.001)]
+
+    assert "".join(deltas(asyncio.run(collect()))) == "".join(f"t{i} " for i in range(50))
+
+
+@pytest.mark.parametrize("cancel", [False, True])
+@pytest.mark.parametrize("stalled", [False, True])
+def test_acoalesce_chunks_closes_the_stream(stalled, cancel):
+    closed = []
+
+    async def source():
+        try:
+            while True:
+                yield delta_chunk("t ")
+                if stalled:
+                    await asyncio.Event().wait()
+        finally:
+            closed.append(True)
+
+    async def consume():
+        # the producer either waits for the model or for room in the queue
+        stream = acoalesce_chunks(source(), max_bytes=10**6, max_delay=10.0, buffer_size=1)
+        await anext(stream)
+        if cancel:
+            # the consumer's task is cancelled while it waits for the next chunk
+            task = asyncio.ensure_future(anext(stream))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        await stream.aclose()
+        return list(closed)
+
+    assert asyncio.run(consume()) == [True]
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_generate_stream_sends_fewer_chunks_with_the_same_answer(use_async):
+    payload = make_payload(np.random.default_rng(0), 25)
+
+    def stream(custom: dict) -> list[dict]:
+        _, generate_stream = build_ai_service(
+            ScriptedChatModel(token_rate=1000), {"model_id": "scripted", "async_handlers": use_async} | custom
+        )
+        context = StubRuntimeContext(payload | {"thread_id": str(custom)})
+        if not use_async:
+            return list(generate_stream(context))
+
+        async def collect():
+            return [chunk async for chunk in generate_stream(context)]
+
+        return asyncio.run(collect())
+
+    per_token = stream({"stream_coalesce_bytes": 0, "stream_coalesce_delay": 0})
+    coalesced = stream({"stream_coalesce_bytes": 64, "stream_coalesce_delay": 0.02})
+
+    def answer(chunks):
+        return "".join(delta for delta in deltas(chunks) if delta)
+
+    assert answer(coalesced) == answer(per_token)
+    assert len(coalesced) < len(per_token) / 2
@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+
+from langgraph_react_agent.tool_node import ParallelToolNode
+
+
+@tool
+def slow_square(x: float, delay: float) -> float:
+    """Squares x after sleeping for `delay` seconds."""
+    time.sleep(delay)
+    return x**2
+
+
+def tool_calls_message(*delays: float) -> AIMessage:
+    return AIMessage(
+        content="",
+        tool_calls=[
+            {"name": "slow_square", "args": {"x": i, "delay": delay}, "id": f"call-{i}"}
+            for i, delay in enumerate(delays)
+        ],
+    )
+
+
+class TestParallelToolNode:
+    def test_runs_tool_calls_concurrently(self):
+        node = ParallelToolNode([slow_square], max_workers=3)
+        start = time.perf_counter()
+        result = node.invoke({"messages": [tool_calls_message(0.2, 0.2, 0.2)]})
+        elapsed = time.perf_counter() - start
+
+        messages = result["messages"]
+        assert [m.content for m in messages] == ["0.0", "1.0", "4.0"]
+        assert [m.tool_call_id for m in messages] == ["call-0", "call-1", "call-2"]
+        assert elapsed < 0.5
+        for message in messages:
+            assert message.response_metadata["duration"] == pytest.approx(0.2, abs=0.1)
+            assert message.response_metadata["step_duration"] >= message.response_metadata["duration"]
+
+    def test_pool_is_bounded(self):
+        node = ParallelToolNode([slow_square], max_workers=1)
+        start = time.perf_counter()
+        node.invoke({"messages": [tool_calls_message(0.1, 0.1, 0.1)]})
+
+        assert time.perf_counter() - start >= 0.3
+
+    def test_timed_out_call_returns_error(self):
+        node = ParallelToolNode([slow_square], timeout={"slow_square": 0.1})
+        messages = node.invoke({"messages": [tool_calls_message(0.0, 0.5)]})["messages"]
+
+        assert messages[0].status == "success"
+        assert messages[1].status == "error"
+        assert "did not finish within 0.1 s" in messages[1].content
+
+    @pytest.mark.parametrize("use_async", [False, True])
+    def test_queued_calls_end_with_the_step(self, use_async):
+        # The calls queue behind each other on the single worker, the step ends after the largest timeout
+        node = ParallelToolNode([slow_square], max_workers=1, timeout={"slow_square": 0.3})
+        payload = {"messages": [tool_calls_message(0.1, 0.1, 0.2, 0.1)]}
+        start = time.perf_counter()
+        result = asyncio.run(node.ainvoke(payload)) if use_async else node.invoke(payload)
+
+        assert [m.status for m in result["messages"]] == ["success", "success", "error", "error"]
+        assert time.perf_counter() - start < 0.38
+
+    @pytest.mark.parametrize("use_async", [False, True])
+    def test_abandoned_calls_cannot_exhaust_the_pool(self, use_async):
+        node = ParallelToolNode([slow_square], max_workers=1, timeout=0.05, max_pending=1)
+
+        def invoke(*delays):
+            payload = {"messages": [tool_calls_message(*delays)]}
+            return (asyncio.run(node.ainvoke(payload)) if use_async else node.invoke(payload))["messages"]
+
+        assert invoke(0.3)[0].status == "error"
+        # The hung call still holds the only slot, the next calls are rejected instead of queued
+        rejected = invoke(0.0)[0]
+        assert rejected.status == "error" and "too many tool calls" in rejected.content
+        time.sleep(0.3)
+        assert invoke(0.0)[0].content == "0.0"
+
+    def test_async_execution(self):
+        node = ParallelToolNode([slow_square], timeout=0.1)
+        messages = asyncio.run(node.ainvoke({"messages": [tool_calls_message(0.0, 0.5)]}))["messages"]
+
+        assert messages[0].content == "0.0"
+        assert messages[1].status == "error"
+
+    def test_invalid_max_workers(self):
+        with pytest.raises(ValueError):
+            ParallelToolNode([slow_square], max_workers=0)
+        with pytest.raises(ValueError):
+            ParallelToolNode([slow_square], max_workers=4, max_pending=2)
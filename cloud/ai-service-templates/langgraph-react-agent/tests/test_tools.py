@@ -1,12 +1,21 @@
+from unittest import mock
+
+import numpy as np
 import pytest
+import statsmodels.api as sm
+from scipy.stats import pearsonr
 
 from langgraph_react_agent import (
+    TOOLS,
     ordinary_least_squared_regression,
     pearson_correlation,
     check_residuals_normality,
     data_independence_test,
-    homoscedasticity_tests
+    homoscedasticity_tests,
+    regression_diagnostics,
 )
+from langgraph_react_agent.regression import OLS_FIT_CACHE, OLSFitCache
+from langgraph_react_agent.tools import warm_up_tools
 
 
 @pytest.mark.parametrize("exog, endog", [
@@ -22,6 +31,14 @@ from langgraph_react_agent import (
 class TestStatisticalTools:
     def test_ordinary_least_squared_regression(self, exog, endog):
         result = ordinary_least_squared_regression.run({"exog": exog, "endog": endog})
+        expected = sm.OLS(endog, sm.add_constant(exog)).fit()
+        assert result["rsquared"] == pytest.approx(expected.rsquared, rel=1e-3)
+        assert result["f_pvalue"] == pytest.approx(expected.f_pvalue, rel=1e-3)
+        assert [c["name"] for c in result["coefficients"]] == ["const", "x1"]
+        assert [c["p_value"] for c in result["coefficients"]] == pytest.approx(expected.pvalues, rel=1e-3)
+
+    def test_ordinary_least_squared_regression_full_summary(self, exog, endog):
+        result = ordinary_least_squared_regression.run({"exog": exog, "endog": endog, "full_summary": True})
         assert "OLS Regression Results" in result  # Check if the result contains OLS summary
 
     def test_pearson_correlation(self, exog, endog):
@@ -36,3 +53,41 @@ class TestStatisticalTools:
 
     def test_homoscedasticity_tests(self, exog, endog):
         assert homoscedasticity_tests.run({"exog": exog, "endog": endog})
+
+
+def test_regression_diagnostics_multivariate():
+    rng = np.random.default_rng(0)
+    exog = rng.normal(size=(50, 3))
+    endog = 1.0 + exog @ [2.0, 0.0, -1.0] + rng.normal(scale=0.5, size=50)
+    result = regression_diagnostics.run({"exog": exog.tolist(), "endog": endog.tolist()})
+
+    expected = sm.OLS(endog, sm.add_constant(exog)).fit()
+    assert result["nobs"] == 50
+    assert result["rsquared"] == pytest.approx(expected.rsquared, rel=1e-3)
+    assert [v["coefficient"] for v in result["variables"]] == pytest.approx(expected.params[1:], rel=1e-3)
+    for i, variable in enumerate(result["variables"]):
+        assert variable["correlation"] == pytest.approx(pearsonr(exog[:, i], endog)[0], rel=1e-3)
+        assert variable["correlation_p_value"] == pytest.approx(pearsonr(exog[:, i], endog)[1], rel=1e-3)
+    assert result["residuals_normality"]["satisfied"]
+    assert result["data_independence"]["satisfied"]
+    assert result["homoscedasticity"]["satisfied"]
+
+
+def test_pearson_correlation_per_column():
+    exog = [[1, 8], [2, 6], [3, 7], [4, 3], [5, 1]]
+    endog = [1.1, 2.3, 2.9, 4.2, 5.0]
+    result = pearson_correlation.run({"exog": exog, "endog": endog})
+
+    assert len(result["correlation_coefficient"]) == 2
+    assert result["correlation_coefficient"][0] > 0 > result["correlation_coefficient"][1]
+
+
+def test_warm_up_tools_calls_every_tool():
+    OLS_FIT_CACHE.clear()
+    with mock.patch.object(OLSFitCache, "_fit", side_effect=OLSFitCache._fit) as fit:
+        warm_up_tools(TOOLS)
+
+    # the synthetic dataset is fitted once and shared by the regression tools, outside of the shared cache
+    assert fit.call_count == 1
+    stats = OLS_FIT_CACHE.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (0, 0, 0)
\ No newline at end of file
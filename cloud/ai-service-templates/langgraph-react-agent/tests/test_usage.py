@@ -0,0 +1,118 @@
+import json
+import uuid
+from importlib.resources import files
+
+import numpy as np
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from langgraph_react_agent.metrics import MetricsRegistry
+from langgraph_react_agent.usage import UsageTracker, get_token_usage
+from langgraph_react_agent.validation import compile_schema
+from tests.fake_chat_model import ScriptedChatModel
+from tests.stubs import StubRuntimeContext, build_ai_service, make_payload
+
+
+def result(message: AIMessage, llm_output: dict | None = None) -> LLMResult:
+    return LLMResult(generations=[[ChatGeneration(message=message)]], llm_output=llm_output)
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        result(AIMessage("", usage_metadata={"input_tokens": 7, "output_tokens": 3, "total_tokens": 10})),
+        result(AIMessage("", response_metadata={"token_usage": {"prompt_tokens": 7, "completion_tokens": 3}})),
+        result(AIMessage(""), {"token_usage": {"input_token_count": 7, "generated_token_count": 3}}),
+    ],
+)
+def test_token_usage_reported_by_the_model(response):
+    assert get_token_usage(response) == (7, 3)
+
+
+def call(tracker: UsageTracker, messages: list, prompt_tokens: int, completion_tokens: int, stream: bool = False):
+    run_id = uuid.uuid4()
+    tracker.on_chat_model_start({}, [messages], run_id=run_id)
+    if stream:
+        tracker.on_llm_new_token("token", run_id=run_id)
+    usage = {"input_tokens": prompt_tokens, "output_tokens": completion_tokens, "total_tokens": 0}
+    tracker.on_llm_end(result(AIMessage("", usage_metadata=usage)), run_id=run_id)
+
+
+def test_prompt_growth_is_attributed_to_the_tool_outputs():
+    metrics = MetricsRegistry()
+    thread = {"prompt_tokens": 100, "completion_tokens": 10, "total_tokens": 110, "model_calls": 1}
+    tracker = UsageTracker(thread, metrics)
+    question = [HumanMessage("Fit OLS")]
+    tool_calls = AIMessage("", tool_calls=[{"name": "t", "args": {}, "id": "1"}, {"name": "t", "args": {}, "id": "2"}])
+    outputs = [
+        ToolMessage("a" * 300, name="fit", tool_call_id="1"),
+        ToolMessage("b" * 100, name="test", tool_call_id="2"),
+    ]
+    call(tracker, question, 50, 20)
+    call(tracker, question + [tool_calls] + outputs, 110, 30, stream=True)
+
+    usage = tracker.summary()
+    assert (usage["prompt_tokens"], usage["completion_tokens"], usage["model_calls"]) == (160, 50, 2)
+    # 40 tokens added by the tool outputs, split by their length
+    assert usage["calls"][1]["tool_output_tokens"] == {"fit": 30, "test": 10}
+    assert "tool_output_tokens" not in usage["calls"][0]
+    assert usage["calls"][0]["time_to_first_token"] is None and usage["calls"][1]["time_to_first_token"] >= 0
+    assert usage["thread"] == {"prompt_tokens": 260, "completion_tokens": 60, "total_tokens": 320, "model_calls": 3}
+    snapshot = metrics.snapshot()
+    assert snapshot["histograms"]["model_tokens_per_second"]["count"] == 2
+    assert snapshot["spans"]["model.time_to_first_token"]["count"] == 1
+
+
+def test_responses_report_the_usage_of_the_request_and_the_thread():
+    generate, generate_stream = build_ai_service(ScriptedChatModel(), {"model_id": "scripted"})
+    payload = make_payload(np.random.default_rng(0), 25)
+
+    first = generate(StubRuntimeContext(payload))["body"]["usage"]
+    *_, last = generate_stream(StubRuntimeContext(payload))
+    second = last["usage"]
+
+    assert first["model_calls"] == second["model_calls"] == 2
+    assert first["thread"]["model_calls"] == 2
+    assert second["thread"]["total_tokens"] == first["total_tokens"] + second["total_tokens"]
+    assert second["time_to_first_token"] is not None
+    assert set(second["calls"][1]["tool_output_tokens"]) == {
+        "pearson_correlation",
+        "check_residuals_normality",
+        "data_independence_test",
+        "homoscedasticity_tests",
+    }
+
+
+def test_usage_is_described_by_the_response_schema():
+    schema = json.loads(files("langgraph_react_agent").joinpath("schema", "response.json").read_text())
+    properties = schema["application/json"]["properties"]
+    check_usage, check_choices = compile_schema(properties["usage"]), compile_schema(properties["choices"])
+    generate, generate_stream = build_ai_service(ScriptedChatModel(), {"model_id": "scripted"})
+    payload = make_payload(np.random.default_rng(0), 25)
+
+    check_usage(generate(StubRuntimeContext(payload))["body"]["usage"], "$.usage")
+    *_, last = generate_stream(StubRuntimeContext(payload))
+    check_choices(last["choices"], "$.choices")
+    check_usage(last["usage"], "$.usage")
+
+
+def test_thread_totals_are_kept_in_the_checkpoints(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite")
+    custom = {"model_id": "scripted", "checkpointer": "sqlite", "checkpointer_path": path}
+    payload = make_payload(np.random.default_rng(0), 25)
+    first = build_ai_service(ScriptedChatModel(), custom)[0](StubRuntimeContext(payload))["body"]["usage"]
+
+    # The totals survive a restart of the service
+    second = build_ai_service(ScriptedChatModel(), custom)[0](StubRuntimeContext(payload))["body"]["usage"]
+
+    assert second["thread"]["model_calls"] == 4
+    assert second["thread"]["prompt_tokens"] == first["prompt_tokens"] + second["prompt_tokens"]
+
+
+def test_usage_accounting_can_be_disabled():
+    generate, generate_stream = build_ai_service(ScriptedChatModel(), {"model_id": "scripted", "usage": False})
+    payload = make_payload(np.random.default_rng(0), 25)
+
+    assert "usage" not in generate(StubRuntimeContext(payload))["body"]
+    assert all(chunk["choices"] for chunk in generate_stream(StubRuntimeContext(payload)))
@@ -0,0 +1,96 @@
+import json
+
+import numpy as np
+import pytest
+
+from langgraph_react_agent.encoding import dumps
+from langgraph_react_agent.validation import RequestValidationError, compile_schema, request_validator
+from tests.fake_chat_model import ScriptedChatModel
+from tests.stubs import StubRuntimeContext, build_ai_service, make_payload
+
+
+@pytest.fixture(scope="module")
+def validate():
+    return request_validator(max_messages=3, max_observations=5, max_variables=2)
+
+
+def message(**fields) -> dict:
+    return {"role": "user", "content": "Hello!"} | fields
+
+
+class TestRequestValidator:
+    def test_valid_requests(self, validate):
+        validate({"messages": [message()], "thread_id": "thread-1"})
+        validate({"messages": [message(data={"exog": [[1, 2.5], [3, 4]], "endog": [1.0, 2.0]})]})
+        validate({"messages": [message(data={"exog": [1, 2], "endog": [1, 2]})]})
+        validate({"messages": [message(data={"exog": "cancer/exog[0:25]", "endog": "cancer/endog[0:25]"})]})
+        validate({"messages": [], "metrics": "prometheus"})
+
+    @pytest.mark.parametrize(
+        "payload, path",
+        [
+            ({}, "$"),
+            ({"messages": {}}, "$.messages"),
+            ({"messages": [message(role="robot")]}, "$.messages[0].role"),
+            ({"messages": [message(), {"role": "user"}]}, "$.messages[1]"),
+            ({"messages": [message(content=None)]}, "$.messages[0].content"),
+            ({"messages": [message()] * 4}, "$.messages"),
+            ({"messages": [message(data={"exog": [1, 2]})]}, "$.messages[0].data"),
+            ({"messages": [message(data={"exog": [1, 2], "endog": [1, "2"]})]}, "$.messages[0].data.endog[1]"),
+            ({"messages": [message(data={"exog": [1, True], "endog": [1, 2]})]}, "$.messages[0].data.exog[1]"),
+            ({"messages": [message(data={"exog": list(range(6)), "endog": [1]})]}, "$.messages[0].data.exog"),
+            ({"messages": [message(data={"exog": [[1, 2, 3]], "endog": [1]})]}, "$.messages[0].data.exog[0]"),
+            ({"messages": [message(data={"exog": [[1, "2"]], "endog": [1]})]}, "$.messages[0].data.exog[0][1]"),
+            ({"messages": [], "metrics": "xml"}, "$.metrics"),
+            ({"messages": [message(data={"exog": [[1, 2], [3]], "endog": [1, 2]})]}, "$.messages[0].data.exog[1]"),
+            ({"messages": [message(data={"exog": [1, [2, 3]], "endog": [1, 2]})]}, "$.messages[0].data.exog[1]"),
+            ({"messages": [message(data={"exog": [[1], 2], "endog": [1, 2]})]}, "$.messages[0].data.exog[1]"),
+            ({"messages": [message(data={"exog": [1, 2, 3], "endog": [1, 2]})]}, "$.messages[0].data.endog"),
+        ],
+    )
+    def test_invalid_requests(self, validate, payload, path):
+        with pytest.raises(RequestValidationError) as error:
+            validate(payload)
+        assert error.value.path == path
+
+
+def test_unsupported_keywords_are_rejected():
+    with pytest.raises(ValueError, match="pattern"):
+        compile_schema({"type": "string", "pattern": "^a"})
+
+
+def test_invalid_request_is_rejected_before_running_the_agent():
+    generate, generate_stream = build_ai_service(ScriptedChatModel(), {"model_id": "scripted", "thread_id": "thread-1"})
+    context = StubRuntimeContext({"messages": [{"role": "robot", "content": "Hello!"}]})
+
+    with pytest.raises(RequestValidationError, match="messages\\[0\\].role"):
+        generate(context)
+    with pytest.raises(RequestValidationError, match="messages\\[0\\].role"):
+        next(generate_stream(context))
+
+
+def test_ragged_data_of_batch_conversation_is_rejected():
+    generate, _ = build_ai_service(ScriptedChatModel(), {"model_id": "scripted"})
+    data = {"exog": [[1.0], [2.0, 3.0]], "endog": [1.0, 2.0]}
+    payload = {"messages": [], "conversations": [{"messages": [message(data=data)]}]}
+
+    error = generate(StubRuntimeContext(payload))["body"]["conversations"][0]["error"]
+    assert error["type"] == "RequestValidationError"
+    assert "$.conversations[0].messages[0].data.exog[1]" in error["message"]
+
+
+def test_encoded_responses():
+    payload = make_payload(np.random.default_rng(0), 25)
+    custom = {"model_id": "scripted", "encode_responses": True}
+    generate, generate_stream = build_ai_service(ScriptedChatModel(), custom)
+
+    body = generate(StubRuntimeContext(payload | {"thread_id": "json"}))["body"]
+    chunks = list(generate_stream(StubRuntimeContext(payload | {"thread_id": "sse"})))
+
+    assert json.loads(body)["choices"][-1]["message"]["content"].startswith("The data shows")
+    assert all(isinstance(chunk, str) for chunk in chunks)
+    assert json.loads(chunks[0])["choices"][0]["message"]["tool_calls"]
+
+
+def test_dumps_is_compact_and_sorts_keys():
+    assert dumps({"b": [1, 2.5], "a": "ą"}, sort_keys=True) == '{"a":"ą","b":[1,2.5]}'.encode()